@@ -1,3 +1,6 @@
+import threading
+import typing
+
 import smolagents
 
 from .prompts import (
@@ -6,11 +9,171 @@ from .prompts import (
     DUAL_FIDELITY_COORDINATION,
 )
 from .tools import AnalyticalTool, FiniteElementTool
+from .tools.acceptance import Convergence
+from .tools.fea_pool import FEAWorkerPool
+from .compaction import compact_messages
+from .metrics import AgentMetrics
+from .timing import StepTimer
+
+if typing.TYPE_CHECKING:
+    # SQLAlchemy is only imported by programs that create a logger
+    from .tools.logger import AgentLogger
+
+
+class BoltDesignAgent(smolagents.agents.ToolCallingAgent):
+    """
+    Base class of the bolted connection design agents.
+
+    Every agent can record its steps with an AgentLogger, tagged with an agent and run identifier and the target
+    factor of safety of the run, and aggregate its LLM latency, tool latencies, token counts and step counts in an
+    AgentMetrics instance.
 
-from .tools.logger import AgentLogger
+    With `compact_memory`, all but the most recent steps are collapsed into a table of the designs they evaluated
+    before being sent to the model, so the prompt stays roughly the same size however long the run.
 
+    With `stop_on_convergence`, the run ends as soon as a tool reports a design that passed every factor of safety
+    check, with that design as the final answer, instead of waiting for the model to give its answer.
 
-class GuessingAgent(smolagents.agents.ToolCallingAgent):
+    `interrupt` stops a run before its next step. A run whose `cancel_event` was set before it started is
+    interrupted as well, whereas run() would clear an earlier interrupt.
+    """
+
+    cancel_event: threading.Event | None = None
+
+    def __init__(
+        self,
+        name: str,
+        tools: list,
+        instructions: str,
+        model: smolagents.models.Model,
+        agent_id: str | None = None,
+        run_id: str | None = None,
+        target_fos: float | None = None,
+        agent_logger: "AgentLogger | None" = None,
+        max_steps: int = 20,
+        metrics: AgentMetrics | None = None,
+        stop_on_convergence: bool | typing.Iterable[str] = False,
+        compact_memory: int | None = None,
+    ) -> None:
+        """
+        Initializes the agent.
+
+        Args:
+            name: Name of the agent.
+            tools: Tools available to the agent.
+            instructions: Instructions added to the system prompt.
+            model: An instance of smolagents.Model to be used by the agent.
+            agent_id: Identifier of the agent in the log. Defaults to the name of the agent.
+            run_id: Identifier of the run in the log.
+            target_fos: Target factor of safety of the run, recorded in the log.
+            agent_logger: Optional logger recording every step of the agent.
+            max_steps: Maximum number of steps before the agent has to give an answer.
+            metrics: Optional metrics shared by any number of agents, labelled with the agent identifier.
+            stop_on_convergence: Whether to end the run once a tool signals convergence, or the names of the tools
+                whose signal ends the run, e.g. only the finite element tool of a DualFidelityAgent.
+            compact_memory: Number of most recent steps written to the prompt in full, older steps are
+                summarized. The whole memory is written when not given.
+        """
+        self.agent_logger = agent_logger
+        self.metrics = metrics
+        self.agent_id = agent_id or name
+        self.run_id = run_id
+        self.target_fos = target_fos
+        self.step_timer = StepTimer()
+        self.stop_on_convergence = (
+            stop_on_convergence if isinstance(stop_on_convergence, bool) else frozenset(stop_on_convergence)
+        )
+        self.convergence: Convergence | None = None
+        self.compact_memory = compact_memory
+
+        instrumented = self.agent_logger is not None or self.metrics is not None
+        callbacks = (
+            {smolagents.ActionStep: [self.log], smolagents.FinalAnswerStep: [self.record_run]}
+            if instrumented
+            else []
+        )
+
+        super().__init__(
+            name=name,
+            tools=tools,
+            add_base_tools=False,
+            model=self.step_timer.instrument_model(model) if instrumented else model,
+            instructions=instructions,
+            step_callbacks=callbacks,
+            verbosity_level=2,
+            max_steps=max_steps,
+        )
+
+        if instrumented:
+            self.step_timer.instrument_tools(self.tools)
+
+    def write_memory_to_messages(self, summary_mode: bool = False):
+        if self.compact_memory is None or summary_mode:
+            return super().write_memory_to_messages(summary_mode=summary_mode)
+        return compact_messages(self, self.compact_memory)
+
+    def _converging_tools(self) -> list:
+        """
+        Returns the tools whose convergence signal ends the run.
+        """
+        if not self.stop_on_convergence:
+            return []
+
+        return [
+            tool
+            for name, tool in self.tools.items()
+            if hasattr(tool, "convergence") and (self.stop_on_convergence is True or name in self.stop_on_convergence)
+        ]
+
+    # _run_stream and _step_stream are private generators of smolagents, whose version is pinned in pyproject.toml.
+    # Stopping on convergence and cancellation rely on their loop, see test_agents.py and test_racing.py.
+
+    def _run_stream(self, *args, **kwargs):
+        # run() clears the interrupt switch, so a cancellation requested before the run started is applied here
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            self.interrupt()
+        yield from super()._run_stream(*args, **kwargs)
+
+    def _step_stream(self, memory_step):
+        if memory_step.step_number == 1:
+            self.convergence = None
+
+        converging_tools = self._converging_tools()
+        for tool in converging_tools:
+            tool.convergence = None
+
+        for output in super()._step_stream(memory_step):
+            if isinstance(output, smolagents.agents.ActionOutput) and not output.is_final_answer:
+                converged = next((tool.convergence for tool in converging_tools if tool.convergence), None)
+                if converged is not None:
+                    self.convergence = converged
+                    output = smolagents.agents.ActionOutput(
+                        output=f"Converged design: {converged.describe()}.", is_final_answer=True
+                    )
+            yield output
+
+    def log(self, step, agent):
+        timings = self.step_timer.pop()
+
+        if self.metrics is not None:
+            self.metrics.record_step(self.agent_id, step, timings)
+
+        if self.agent_logger:
+            self.agent_logger.log(
+                agent_id=self.agent_id,
+                run_id=self.run_id,
+                target_fos=self.target_fos,
+                action_step=step,
+                llm_latency=timings.llm_latency,
+                tool_latency=timings.tool_latency,
+            )
+
+    def record_run(self, step, agent):
+        if self.metrics is not None:
+            self.metrics.record_run(self.agent_id, self.step_number - 1)
+
+
+class GuessingAgent(BoltDesignAgent):
     """
     An agent that makes guesses without using any tools.
 
@@ -18,24 +181,24 @@ class GuessingAgent(smolagents.agents.ToolCallingAgent):
     It is designed to provide initial estimates or solutions based on its knowledge and reasoning capabilities.
     """
 
-    def __init__(self, model: smolagents.models.Model) -> None:
+    def __init__(self, model: smolagents.models.Model, **kwargs) -> None:
         """
         Initializes a GuessingAgent that does not use any tools.
 
         Args:
             model: An instance of smolagents.Model to be used by the agent.
+            **kwargs: Logging and metrics options and step limit, see BoltDesignAgent.
         """
         super().__init__(
             name="GuessingAgent",
             tools=[],
-            add_base_tools=False,
             model=model,
             instructions=BASE_INSTRUCTIONS,
-            verbosity_level=2,
+            **kwargs,
         )
 
 
-class LowFidelityAgent(smolagents.agents.ToolCallingAgent):
+class LowFidelityAgent(BoltDesignAgent):
     """
     An agent that utilizes a low-fidelity analytical tool for bolted connection design.
 
@@ -43,43 +206,43 @@ class LowFidelityAgent(smolagents.agents.ToolCallingAgent):
     It is designed to provide solutions based on simplified models and assumptions, making it suitable for quick estimates and preliminary designs.
     """
 
-    def __init__(self, model: smolagents.models.Model, agent_id: str, run_id: str, target_fos: float, agent_logger: AgentLogger|None = None, max_steps=20) -> None:
+    def __init__(
+        self,
+        model: smolagents.models.Model,
+        agent_id: str | None = None,
+        run_id: str | None = None,
+        target_fos: float | None = None,
+        agent_logger: "AgentLogger | None" = None,
+        max_steps: int = 20,
+        **kwargs,
+    ) -> None:
         """
         Initializes a LowFidelityAgent that uses an analytical tool.
 
         Args:
             model: An instance of smolagents.Model to be used by the agent.
+            agent_id: Identifier of the agent in the log. Defaults to the name of the agent.
+            run_id: Identifier of the run in the log.
+            target_fos: Target factor of safety of the run, recorded in the log.
+            agent_logger: Optional logger recording every step of the agent.
+            max_steps: Maximum number of steps before the agent has to give an answer.
+            **kwargs: Metrics, convergence and memory options, see BoltDesignAgent.
         """
-
-        self.agent_logger = agent_logger
-        self.agent_id = agent_id
-        self.run_id = run_id
-        self.target_fos = target_fos
-
-        callbacks = [self.log] if self.agent_logger else []
-
         super().__init__(
             name="LowFidelityAgent",
             tools=[AnalyticalTool()],
-            add_base_tools=False,
             model=model,
             instructions=BASE_INSTRUCTIONS + TOOL_USING_INSTRUCTION,
-            step_callbacks = callbacks,
-            verbosity_level=2,
-            max_steps=max_steps
+            agent_id=agent_id,
+            run_id=run_id,
+            target_fos=target_fos,
+            agent_logger=agent_logger,
+            max_steps=max_steps,
+            **kwargs,
         )
 
-    def log(self, step, agent):
-        if self.agent_logger and  step.__class__.__name__ == "ActionStep":
-            self.agent_logger.log(
-                agent_id=self.agent_id, 
-                run_id=self.run_id, 
-                target_fos=self.target_fos, 
-                action_step=step
-            )
 
-
-class HighFidelityAgent(smolagents.agents.ToolCallingAgent):
+class HighFidelityAgent(BoltDesignAgent):
     """
     An agent that utilizes a high-fidelity finite element analysis tool for bolted connection design.
 
@@ -87,24 +250,28 @@ class HighFidelityAgent(smolagents.agents.ToolCallingAgent):
     It is designed to provide accurate and reliable solutions based on comprehensive models, making it suitable for
     """
 
-    def __init__(self, model: smolagents.models.Model) -> None:
+    def __init__(
+        self, model: smolagents.models.Model, fea_pool: FEAWorkerPool | None = None, **kwargs
+    ) -> None:
         """
         Initializes a HighFidelityAgent that uses a finite element tool.
 
         Args:
             model: An instance of smolagents.Model to be used by the agent.
+            fea_pool: Optional pool of worker processes running the finite element solves, which makes them
+                cancellable. Solves run inline when not given.
+            **kwargs: Logging and metrics options and step limit, see BoltDesignAgent.
         """
         super().__init__(
             name="HighFidelityAgent",
-            tools=[FiniteElementTool()],
-            add_base_tools=False,
+            tools=[FiniteElementTool(pool=fea_pool)],
             model=model,
             instructions=BASE_INSTRUCTIONS + TOOL_USING_INSTRUCTION,
-            verbosity_level=2,
+            **kwargs,
         )
 
 
-class DualFidelityAgent(smolagents.agents.ToolCallingAgent):
+class DualFidelityAgent(BoltDesignAgent):
     """
     An agent that utilizes both low-fidelity and high-fidelity tools for bolted connection design.
 
@@ -112,20 +279,24 @@ class DualFidelityAgent(smolagents.agents.ToolCallingAgent):
     It is designed to provide solutions that balance speed and accuracy by using the low-fidelity tool
     """
 
-    def __init__(self, model: smolagents.models.Model) -> None:
+    def __init__(
+        self, model: smolagents.models.Model, fea_pool: FEAWorkerPool | None = None, **kwargs
+    ) -> None:
         """
         Initializes a DualFidelityAgent that uses both analytical and finite element tools.
 
         Args:
             model: An instance of smolagents.Model to be used by the agent.
+            fea_pool: Optional pool of worker processes running the finite element solves, which makes them
+                cancellable. Solves run inline when not given.
+            **kwargs: Logging and metrics options and step limit, see BoltDesignAgent.
         """
         super().__init__(
             name="DualFidelityAgent",
-            tools=[AnalyticalTool(), FiniteElementTool()],
-            add_base_tools=False,
+            tools=[AnalyticalTool(), FiniteElementTool(pool=fea_pool)],
             model=model,
             instructions=BASE_INSTRUCTIONS
             + TOOL_USING_INSTRUCTION
             + DUAL_FIDELITY_COORDINATION,
-            verbosity_level=2,
+            **kwargs,
         )
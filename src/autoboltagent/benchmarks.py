@@ -0,0 +1,405 @@
+"""
+Micro-benchmarks of the analytical tools, the finite element tool wrapper and the agent logger.
+
+Run with `python -m autoboltagent.benchmarks --output results.json`. Passing `--baseline baseline.json` compares the
+results with a previous run and exits with a non-zero status when a benchmark is slower than the baseline by more
+than `--threshold`. Every benchmark runs offline on the CPU, the finite element solver is replaced by a constant so
+only the overhead of the tool is measured.
+
+`--agents` also runs every agent class with a ScriptedModel and reports the time per step spent in the model, in the
+tools, and in the agent loop itself.
+"""
+
+import argparse
+import datetime
+import io
+import json
+import platform
+import sys
+import tempfile
+import timeit
+import typing
+from pathlib import Path
+
+import numpy
+import rich.console
+import smolagents
+
+from . import agents
+from .prompts import EXAMPLE_TASK_INSTRUCTIONS
+from .scripted_model import ScriptedModel, final_answer
+from .timing import StepTimer
+from .tools.fastener_toolkit import (
+    batch_safety_factor_gradients,
+    batch_safety_factors,
+    get_joint_constant,
+    get_joint_constants,
+)
+from .tools.high_fidelity_tool import FiniteElementTool
+from .tools.low_fidelity_tool import AnalyticalTool, BatchAnalyticalTool
+
+# Slowdown relative to the baseline above which a benchmark is reported as a regression
+DEFAULT_THRESHOLD = 1.25
+
+# Number of designs evaluated per call by the batch benchmarks
+BATCH_SIZE = 1000
+
+# Agents whose loop overhead is measured with --agents
+AGENT_CLASSES = [
+    agents.GuessingAgent,
+    agents.LowFidelityAgent,
+    agents.HighFidelityAgent,
+    agents.DualFidelityAgent,
+]
+
+# Joint of prompts.EXAMPLE_TASK_INSTRUCTIONS
+EXAMPLE_DESIGN = dict(
+    desired_safety_factor=3.0,
+    load=60000.0,
+    preload=150000.0,
+    num_bolts=4,
+    bolt_diameter=12.0,
+    bolt_yield_strength=940.0,
+    bolt_elastic_modulus=210.0,
+    plate_thickness=10.0,
+    plate_elastic_modulus=210.0,
+    plate_yield_strength=250.0,
+    pitch=1.5,
+)
+
+
+class Benchmark(typing.NamedTuple):
+    """
+    A benchmark. `setup` returns the function timed, and a cleanup function or None. Each call of the timed function
+    performs `operations` operations, e.g. designs evaluated or rows logged.
+    """
+
+    name: str
+    setup: typing.Callable[[], typing.Tuple[typing.Callable[[], object], typing.Optional[typing.Callable[[], None]]]]
+    operations: int = 1
+
+
+class _StubbedFiniteElementTool(FiniteElementTool):
+    """
+    FiniteElementTool whose solver returns a constant, so that only the tool's own work is timed.
+    """
+
+    def _solve(self, arguments):
+        return 3.0
+
+
+def _batch_designs(size: int) -> typing.Dict[str, numpy.ndarray]:
+    rng = numpy.random.default_rng(0)
+    designs = {name: numpy.full(size, value) for name, value in EXAMPLE_DESIGN.items()}
+    designs["num_bolts"] = rng.integers(1, 9, size).astype(float)
+    designs["bolt_diameter"] = rng.choice([6.0, 8.0, 10.0, 12.0, 16.0, 20.0], size)
+    return designs
+
+
+def _joint_constant():
+    return (lambda: get_joint_constant(12.0, 20.0, 210.0, 210.0)), None
+
+
+def _joint_constants():
+    d_b = numpy.linspace(3.0, 36.0, BATCH_SIZE)
+    return (lambda: get_joint_constants(d_b, 20.0, 210.0, 210.0)), None
+
+
+def _analytical_tool():
+    tool = AnalyticalTool()
+    return (lambda: tool.forward(**EXAMPLE_DESIGN)), None
+
+
+def _batch_analytical_tool():
+    tool = BatchAnalyticalTool()
+    designs = _batch_designs(BATCH_SIZE)
+    arguments = dict(
+        EXAMPLE_DESIGN,
+        num_bolts=designs["num_bolts"].tolist(),
+        bolt_diameter=designs["bolt_diameter"].tolist(),
+    )
+    return (lambda: tool.forward(**arguments)), None
+
+
+def _batch_safety_factors():
+    designs = _batch_designs(BATCH_SIZE)
+    return (lambda: batch_safety_factors(designs)), None
+
+
+def _batch_safety_factor_gradients():
+    designs = _batch_designs(BATCH_SIZE)
+    return (lambda: batch_safety_factor_gradients(designs)), None
+
+
+def _finite_element_tool():
+    tool = _StubbedFiniteElementTool()
+    return (lambda: tool.forward(**EXAMPLE_DESIGN)), None
+
+
+def _logger(rows_per_flush: int):
+    def setup():
+        from smolagents import ActionStep, ChatMessage, MessageRole, Timing, TokenUsage, ToolCall
+
+        from .tools.logger import AgentLogger
+
+        # The benchmark logs to a private instance, the caller's logger and its database are left untouched
+        directory = tempfile.TemporaryDirectory()
+        instance = AgentLogger._instance
+        AgentLogger._instance = None
+        try:
+            logger = AgentLogger(f"sqlite:///{Path(directory.name) / 'benchmark.db'}")
+        finally:
+            AgentLogger._instance = instance
+
+        step = ActionStep(
+            step_number=1,
+            timing=Timing(start_time=0.0, end_time=1.0),
+            observations="The factor of safety for the assembly is 3.02 (within acceptable range).",
+            tool_calls=[ToolCall(name="fea_fos_calculation", arguments=EXAMPLE_DESIGN, id="call_0")],
+            model_output_message=ChatMessage(role=MessageRole.ASSISTANT, content="Checking the design."),
+            token_usage=TokenUsage(input_tokens=1000, output_tokens=50),
+        )
+
+        def write():
+            for _ in range(rows_per_flush):
+                logger.log(run_id="benchmark", agent_id="benchmark", target_fos=3.0, action_step=step)
+            logger.flush()
+
+        def cleanup():
+            logger.close()
+            directory.cleanup()
+
+        return write, cleanup
+
+    return setup
+
+
+BENCHMARKS = [
+    Benchmark("get_joint_constant", _joint_constant),
+    Benchmark("get_joint_constants", _joint_constants, BATCH_SIZE),
+    Benchmark("analytical_tool", _analytical_tool),
+    Benchmark("batch_analytical_tool", _batch_analytical_tool, BATCH_SIZE),
+    Benchmark("batch_safety_factors", _batch_safety_factors, BATCH_SIZE),
+    Benchmark("batch_safety_factor_gradients", _batch_safety_factor_gradients, BATCH_SIZE),
+    Benchmark("finite_element_tool_overhead", _finite_element_tool),
+    Benchmark("logger_single_write", _logger(1)),
+    Benchmark("logger_bulk_write", _logger(BATCH_SIZE), BATCH_SIZE),
+]
+
+
+def run_benchmark(benchmark: Benchmark, repeat: int = 5, min_time: float = 0.2) -> typing.Dict[str, float]:
+    """
+    Times a benchmark.
+
+    Args:
+        benchmark: Benchmark to run.
+        repeat: Number of timed repetitions.
+        min_time: Minimum duration of a repetition [s], the timed function is called as many times as needed.
+
+    Returns:
+        The best and median time per operation over the repetitions [s], and the number of calls per repetition.
+    """
+    function, cleanup = benchmark.setup()
+    try:
+        timer = timeit.Timer(function)
+
+        # Warm up, then pick the number of calls per repetition
+        function()
+        number = 1
+        while timer.timeit(number) < min_time:
+            number *= 2
+
+        times = numpy.array(timer.repeat(repeat=repeat, number=number)) / (number * benchmark.operations)
+    finally:
+        if cleanup is not None:
+            cleanup()
+
+    return dict(best=float(times.min()), median=float(numpy.median(times)), number=number)
+
+
+def run_benchmarks(
+    names: typing.Optional[typing.Iterable[str]] = None, repeat: int = 5, min_time: float = 0.2
+) -> typing.Dict[str, typing.Any]:
+    """
+    Runs the benchmarks, all of them by default.
+
+    Returns:
+        The results, keyed by benchmark name, with a description of the machine and library versions.
+    """
+    names = None if names is None else set(names)
+    unknown = (names or set()) - {benchmark.name for benchmark in BENCHMARKS}
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    results = {
+        benchmark.name: run_benchmark(benchmark, repeat=repeat, min_time=min_time)
+        for benchmark in BENCHMARKS
+        if names is None or benchmark.name in names
+    }
+
+    return dict(
+        metadata=dict(
+            timestamp=datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            python=platform.python_version(),
+            platform=platform.platform(),
+            processor=platform.processor(),
+            numpy=numpy.__version__,
+        ),
+        results=results,
+    )
+
+
+def compare_results(
+    results: typing.Dict[str, typing.Any],
+    baseline: typing.Dict[str, typing.Any],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> typing.List[typing.Dict[str, typing.Any]]:
+    """
+    Compares the best times of two runs of the benchmarks. Benchmarks missing from either run are ignored.
+
+    Args:
+        results: Output of run_benchmarks.
+        baseline: Output of an earlier run_benchmarks, typically loaded from a file.
+        threshold: Ratio of the current to the baseline time above which a benchmark has regressed.
+
+    Returns:
+        One entry per benchmark in both runs with its name, baseline and current time [s], their ratio, and
+        whether it exceeds the threshold.
+    """
+    comparison = []
+    for name, result in results["results"].items():
+        if name not in baseline["results"]:
+            continue
+
+        before = baseline["results"][name]["best"]
+        ratio = result["best"] / before
+        comparison.append(
+            dict(name=name, baseline=before, current=result["best"], ratio=ratio, regressed=ratio > threshold)
+        )
+
+    return comparison
+
+
+class AgentOverhead(typing.NamedTuple):
+    """
+    Mean time per step of an agent run with a scripted model [s], split into the time generating with the model,
+    running tools, and the remainder spent in the agent loop (prompt building, parsing, memory and callbacks).
+    """
+
+    agent: str
+    steps: int
+    step_time: float
+    model_time: float
+    tool_time: float
+
+    @property
+    def overhead(self) -> float:
+        return self.step_time - self.model_time - self.tool_time
+
+
+def measure_agent_overhead(
+    agent_class: type,
+    calls_per_tool: int = 2,
+    latency: float = 0.0,
+    repeat: int = 3,
+    stub_solver: bool = True,
+    script: typing.Optional[typing.Sequence] = None,
+) -> AgentOverhead:
+    """
+    Runs an agent with a ScriptedModel and measures where the time of its steps goes.
+
+    Args:
+        agent_class: Agent class of agents.py.
+        calls_per_tool: Number of calls of each tool of the agent in the default script, made with the design of
+            EXAMPLE_DESIGN, before the final answer.
+        latency: Simulated generation time of the model [s].
+        repeat: Number of runs averaged.
+        stub_solver: Whether the finite element tools return a constant instead of solving.
+        script: Script of the model, replacing the default one.
+
+    Returns:
+        The mean time per step.
+    """
+    steps = []
+
+    for _ in range(repeat):
+        timer = StepTimer()
+        model = ScriptedModel([], latency=latency)
+        agent = agent_class(timer.instrument_model(model), max_steps=100)
+
+        # Console output is still rendered, as in real runs, but not shown
+        agent.logger.console = rich.console.Console(file=io.StringIO(), highlight=False)
+
+        if stub_solver:
+            for tool in agent.tools.values():
+                if isinstance(tool, FiniteElementTool):
+                    tool._solve = _StubbedFiniteElementTool._solve.__get__(tool)
+        timer.instrument_tools(agent.tools)
+
+        if script is None:
+            calls = [
+                (name, EXAMPLE_DESIGN) for name in agent.tools if name != "final_answer" for _ in range(calls_per_tool)
+            ]
+            model.script = [*calls, final_answer("4 x M12")]
+        else:
+            model.script = list(script)
+
+        def record(step, agent=None, timer=timer):
+            timings = timer.pop()
+            steps.append((step.timing.duration, timings.llm_latency, timings.tool_latency))
+
+        agent.step_callbacks.register(smolagents.ActionStep, record)
+        agent.run(EXAMPLE_TASK_INSTRUCTIONS)
+
+    step_time, model_time, tool_time = numpy.mean(steps, axis=0)
+    return AgentOverhead(
+        agent=agent_class.__name__,
+        steps=len(steps) // repeat,
+        step_time=float(step_time),
+        model_time=float(model_time),
+        tool_time=float(tool_time),
+    )
+
+
+def main(argv: typing.Optional[typing.List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", type=Path, help="file to write the results to, as JSON")
+    parser.add_argument("--baseline", type=Path, help="results of an earlier run to compare with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="slowdown ratio failing the run")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timed repetitions per benchmark")
+    parser.add_argument("--min-time", type=float, default=0.2, help="minimum duration of a repetition [s]")
+    parser.add_argument("--agents", action="store_true", help="also measure the per step overhead of every agent")
+    parser.add_argument("benchmarks", nargs="*", help="benchmarks to run, all by default")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.benchmarks or None, repeat=args.repeat, min_time=args.min_time)
+
+    for name, result in results["results"].items():
+        print(f"{name:32s} {result['best'] * 1e6:12.3f} us/op (median {result['median'] * 1e6:.3f})")
+
+    if args.agents:
+        results["agents"] = {}
+        for agent_class in AGENT_CLASSES:
+            overhead = measure_agent_overhead(agent_class, repeat=args.repeat)
+            results["agents"][overhead.agent] = dict(overhead._asdict(), overhead=overhead.overhead)
+            print(
+                f"{overhead.agent:32s} {overhead.steps} steps, per step: model {overhead.model_time * 1e3:.3f} ms, "
+                f"tools {overhead.tool_time * 1e3:.3f} ms, agent loop {overhead.overhead * 1e3:.3f} ms"
+            )
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+    if not args.baseline:
+        return 0
+
+    comparison = compare_results(results, json.loads(args.baseline.read_text()), args.threshold)
+    for entry in comparison:
+        flag = "REGRESSED" if entry["regressed"] else "ok"
+        print(f"{entry['name']:32s} {entry['ratio']:6.2f}x baseline  {flag}")
+
+    return 1 if any(entry["regressed"] for entry in comparison) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+import math
+import re
+import typing
+
+import smolagents
+
+from .tools.acceptance import HIGHER_THAN_DESIRED, LOWER_THAN_DESIRED, WITHIN_ACCEPTABLE_RANGE
+
+# Number of characters of an error message kept in the table of designs
+ERROR_LENGTH = 80
+
+# Verbose phrases of the tool outputs and their short forms in the table of designs
+_ABBREVIATIONS = (
+    ("The factor of safety for the assembly is", "assembly"),
+    ("The factor of safety for bolts is", "bolt"),
+    (" and the factor of safety for plates is", ", plate"),
+    (HIGHER_THAN_DESIRED, "high"),
+    (LOWER_THAN_DESIRED, "low"),
+    (WITHIN_ACCEPTABLE_RANGE, "ok"),
+    ("The design is not feasible: ", "infeasible, "),
+)
+
+_FOS = re.compile(r"(-?\d+(?:\.\d+)?|inf) \((?:high|low|ok)\)")
+
+
+def abbreviate(observation: str) -> str:
+    """
+    Shortens the output of a tool to its factors of safety and how they compare with the desired one, e.g.
+    "bolt 2.02 (low), plate 3.00 (ok)".
+    """
+    for phrase, abbreviation in _ABBREVIATIONS:
+        observation = observation.replace(phrase, abbreviation)
+    return " ".join(observation.split()).rstrip(".")
+
+
+def _distance(result: str, desired_safety_factor: typing.Any) -> float:
+    """
+    Largest deviation of the factors of safety in an abbreviated result from the desired one.
+    """
+    values = [float(value) for value in _FOS.findall(result)]
+    if not values or not isinstance(desired_safety_factor, (int, float)):
+        return math.inf
+    return max(abs(value - desired_safety_factor) for value in values)
+
+
+def design_rows(step: smolagents.ActionStep) -> typing.List[typing.Tuple[typing.Any, typing.Any, str, float]]:
+    """
+    Summarizes the designs evaluated in a step as (bolt diameter, number of bolts, result, distance to the desired
+    factor of safety) rows. Steps calling several tools share their abbreviated observations.
+    """
+    if step.error is not None:
+        result = "error: " + str(step.error).splitlines()[0][:ERROR_LENGTH]
+    else:
+        result = abbreviate(str(step.observations or ""))
+
+    rows = []
+    for tool_call in step.tool_calls or []:
+        if tool_call.name == "final_answer":
+            continue
+
+        arguments = tool_call.arguments if isinstance(tool_call.arguments, dict) else {}
+        diameter = arguments.get("bolt_diameter", "-")
+        num_bolts = arguments.get("num_bolts", "-")
+        desired = arguments.get("desired_safety_factor")
+
+        # The results of a single design in a single call can be ranked
+        single = len(step.tool_calls) == 1 and not isinstance(num_bolts, list)
+        rows.append((diameter, num_bolts, result, _distance(result, desired) if single else math.inf))
+
+    return rows
+
+
+def compact_messages(
+    agent: smolagents.agents.MultiStepAgent, keep_recent_steps: int
+) -> typing.List[smolagents.ChatMessage]:
+    """
+    Writes the memory of an agent to messages, collapsing all but the `keep_recent_steps` most recent action steps
+    into a table of the designs they evaluated, followed by the best design so far.
+
+    The system prompt, the tasks and the recent steps are written in full.
+    """
+    action_steps = [step for step in agent.memory.steps if isinstance(step, smolagents.ActionStep)]
+    compacted = action_steps[: max(len(action_steps) - keep_recent_steps, 0)]
+    compacted_ids = {id(step) for step in compacted}
+
+    messages = agent.memory.system_prompt.to_messages()
+    for step in agent.memory.steps:
+        if id(step) not in compacted_ids:
+            messages.extend(step.to_messages())
+        elif step is compacted[-1]:
+            # The summary takes the place of the last compacted step
+            messages.append(_summary_message(compacted))
+
+    return messages
+
+
+def _summary_message(steps: typing.List[smolagents.ActionStep]) -> smolagents.ChatMessage:
+    rows = [row for step in steps for row in design_rows(step)]
+
+    lines = [f"Designs evaluated in the {len(steps)} earlier steps:", "diameter | num_bolts | result"]
+    lines += [f"{diameter} | {num_bolts} | {result}" for diameter, num_bolts, result, _ in rows]
+
+    ranked = [row for row in rows if math.isfinite(row[3])]
+    if ranked:
+        diameter, num_bolts, result, _ = min(ranked, key=lambda row: row[3])
+        lines.append(f"Best design so far: {num_bolts} bolts of {diameter} mm, {result}")
+
+    return smolagents.ChatMessage(
+        role=smolagents.MessageRole.USER,
+        content=[{"type": "text", "text": "\n".join(lines)}],
+    )
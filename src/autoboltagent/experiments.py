@@ -0,0 +1,234 @@
+import dataclasses
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import time
+import typing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import numpy
+import smolagents
+
+from .tools.logger import AgentLogger
+
+
+@dataclasses.dataclass(frozen=True)
+class ExperimentRun:
+    """
+    One agent run of an experiment.
+
+    Attributes:
+        agent_class: Agent class to run, e.g. LowFidelityAgent.
+        model_id: Identifier of the model, passed to the model factory of the experiment.
+        target_fos: Target factor of safety of the run.
+        task: Task prompt given to the agent.
+        seed: Seed of the random number generators of the run.
+    """
+
+    agent_class: type
+    model_id: str
+    target_fos: float
+    task: str
+    seed: int = 0
+
+    @property
+    def run_id(self) -> str:
+        """
+        Identifier of the run in the log, derived from its settings so that the same run is recognised when an
+        experiment is resumed.
+        """
+        settings = json.dumps(
+            [self.agent_class.__name__, self.model_id, self.target_fos, self.task, self.seed]
+        )
+        return hashlib.sha256(settings.encode()).hexdigest()[:16]
+
+
+class RunResult(typing.NamedTuple):
+    """
+    Outcome of an experiment run. `status` is "completed", "failed" or "skipped" when the log already held a
+    completed run with the same identifier.
+    """
+
+    run_id: str
+    status: str
+    answer: typing.Optional[str] = None
+    duration: typing.Optional[float] = None
+    error: typing.Optional[str] = None
+
+
+def experiment_grid(
+    agent_classes: typing.Iterable[type],
+    model_ids: typing.Iterable[str],
+    target_fos_values: typing.Iterable[float],
+    tasks: typing.Iterable[str],
+    seeds: typing.Iterable[int] = (0,),
+) -> typing.List[ExperimentRun]:
+    """
+    Builds the runs of a full factorial experiment over agents, models, target factors of safety, tasks and seeds.
+    """
+    return [
+        ExperimentRun(agent_class, model_id, target_fos, task, seed)
+        for agent_class, model_id, target_fos, task, seed in itertools.product(
+            agent_classes, model_ids, target_fos_values, tasks, seeds
+        )
+    ]
+
+
+def _seed_everything(seed: int) -> None:
+    random.seed(seed)
+    numpy.random.seed(seed)
+
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.manual_seed(seed)
+
+
+def _open_logger(db_url: str) -> AgentLogger:
+    """
+    Returns the AgentLogger of `db_url`. AgentLogger is a singleton, so a logger already open on another database
+    would otherwise receive the rows of the experiment.
+    """
+    agent_logger = AgentLogger(db_url)
+    if agent_logger.db_url != db_url:
+        raise ValueError(
+            f"An AgentLogger is already open on {agent_logger.db_url}, close it before logging an experiment to {db_url}"
+        )
+    return agent_logger
+
+
+def run_experiment(
+    run: ExperimentRun,
+    model_factory: typing.Callable[[str], smolagents.models.Model],
+    db_url: str,
+    max_steps: int = 20,
+    agent_kwargs: typing.Optional[typing.Dict[str, typing.Any]] = None,
+) -> RunResult:
+    """
+    Runs one agent and records its steps and outcome with the AgentLogger of `db_url`.
+
+    Args:
+        run: Run to perform.
+        model_factory: Function building the model of a model identifier.
+        db_url: Database URL of the log.
+        max_steps: Maximum number of steps of the agent.
+        agent_kwargs: Additional keyword arguments of the agent class.
+
+    Returns:
+        The outcome of the run. Exceptions raised by the agent are recorded as a failed run instead of propagated.
+
+    Raises:
+        ValueError: If an AgentLogger is already open on another database.
+    """
+    agent_logger = _open_logger(db_url)
+    run_id = run.run_id
+    _seed_everything(run.seed)
+
+    start_time = time.time()
+    agent_id = run.agent_class.__name__
+    try:
+        agent = run.agent_class(
+            model_factory(run.model_id),
+            run_id=run_id,
+            target_fos=run.target_fos,
+            agent_logger=agent_logger,
+            max_steps=max_steps,
+            **(agent_kwargs or {}),
+        )
+        agent_id = agent.agent_id
+        answer = agent.run(run.task)
+    except Exception as e:
+        end_time = time.time()
+        error = f"{type(e).__name__}: {e}"
+        agent_logger.log_run(run_id, agent_id, start_time, end_time, "failed", error_message=error)
+        agent_logger.flush()
+        return RunResult(run_id, "failed", duration=end_time - start_time, error=error)
+
+    end_time = time.time()
+    answer = None if answer is None else str(answer)
+    agent_logger.log_run(run_id, agent_id, start_time, end_time, "completed", final_answer=answer)
+    agent_logger.flush()
+    return RunResult(run_id, "completed", answer=answer, duration=end_time - start_time)
+
+
+def run_experiments(
+    runs: typing.Iterable[ExperimentRun],
+    model_factory: typing.Callable[[str], smolagents.models.Model],
+    db_url: str,
+    max_workers: typing.Optional[int] = None,
+    executor: str = "thread",
+    max_steps: int = 20,
+    agent_kwargs: typing.Optional[typing.Dict[str, typing.Any]] = None,
+) -> typing.List[RunResult]:
+    """
+    Runs the runs of an experiment concurrently, logging every run with the AgentLogger of `db_url`.
+
+    Runs already recorded as completed in the log are skipped, so an interrupted experiment can be resumed by
+    calling this function again with the same runs. The steps logged by runs that did not complete are deleted
+    before they run again.
+
+    Threads suit agents waiting on remote model APIs. Processes suit local models and finite element tools, in
+    which case `model_factory` and the agent classes must be picklable, i.e. defined at module level. Runs in
+    threads share the global random number generators, so seeds only make runs reproducible with processes or a
+    single worker.
+
+    Args:
+        runs: Runs of the experiment, see `experiment_grid`.
+        model_factory: Function building the model of a model identifier, called once per run.
+        db_url: Database URL of the log.
+        max_workers: Number of runs performed at once. Defaults to the number of CPUs.
+        executor: "thread" or "process".
+        max_steps: Maximum number of steps of each agent.
+        agent_kwargs: Additional keyword arguments of the agent classes.
+
+    Returns:
+        The outcome of every run, in the order of `runs`.
+
+    Raises:
+        ValueError: If an AgentLogger is already open on another database.
+    """
+    if executor not in ("thread", "process"):
+        raise ValueError(f"Unknown executor {executor!r}, expected 'thread' or 'process'")
+
+    runs = list(runs)
+    agent_logger = _open_logger(db_url)
+    completed = agent_logger.completed_run_ids()
+
+    results: typing.List[typing.Optional[RunResult]] = [None] * len(runs)
+    pending = []
+    seen = set()
+    for i, run in enumerate(runs):
+        run_id = run.run_id
+        if run_id in seen:
+            raise ValueError(f"The experiment holds the same run twice: {run}")
+        seen.add(run_id)
+
+        if run_id in completed:
+            results[i] = RunResult(run_id, "skipped")
+        else:
+            agent_logger.delete_run(run_id)
+            pending.append(i)
+
+    if not pending:
+        return typing.cast(typing.List[RunResult], results)
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if executor == "thread":
+        pool: Executor = ThreadPoolExecutor(max_workers=max_workers)
+    else:
+        # Forked workers would inherit the logger without its writer thread
+        pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+
+    with pool:
+        futures = {
+            pool.submit(run_experiment, runs[i], model_factory, db_url, max_steps, agent_kwargs): i
+            for i in pending
+        }
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+
+    return typing.cast(typing.List[RunResult], results)
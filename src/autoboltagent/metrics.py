@@ -0,0 +1,224 @@
+import bisect
+import json
+import threading
+import typing
+from pathlib import Path
+
+import smolagents
+
+from .timing import StepTimings
+
+# Upper bounds of the histogram buckets. Latencies span fast analytical calls up to finite element solves of
+# several minutes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)  # [s]
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072)
+STEP_BUCKETS = (1, 2, 3, 5, 8, 10, 15, 20, 30, 50)
+
+Labels = typing.Tuple[typing.Tuple[str, str], ...]
+
+
+class Histogram:
+    """
+    Distribution of observed values over fixed buckets, with their count and sum.
+    """
+
+    def __init__(self, buckets: typing.Sequence[float]) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative_counts(self) -> typing.List[int]:
+        """
+        Number of observations at most each bucket bound, the last entry counting every observation.
+        """
+        counts, total = [], 0
+        for count in self.counts:
+            total += count
+            counts.append(total)
+        return counts
+
+
+class _Family(typing.NamedTuple):
+    kind: str
+    help: str
+    buckets: typing.Sequence[float] = ()
+
+
+# Metrics recorded by AgentMetrics
+_FAMILIES = {
+    "autoboltagent_llm_latency_seconds": _Family(
+        "histogram", "Time spent generating with the model per step.", LATENCY_BUCKETS
+    ),
+    "autoboltagent_tool_latency_seconds": _Family(
+        "histogram", "Time spent in each tool per step.", LATENCY_BUCKETS
+    ),
+    "autoboltagent_input_tokens": _Family("histogram", "Input tokens of the model per step.", TOKEN_BUCKETS),
+    "autoboltagent_output_tokens": _Family("histogram", "Output tokens of the model per step.", TOKEN_BUCKETS),
+    "autoboltagent_run_steps": _Family("histogram", "Number of steps per run.", STEP_BUCKETS),
+    "autoboltagent_steps_total": _Family("counter", "Number of steps."),
+    "autoboltagent_step_errors_total": _Family("counter", "Number of steps that ended with an error."),
+}
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class AgentMetrics:
+    """
+    In-memory metrics of agent runs: the LLM latency, the latency of every tool, the token counts and the number
+    of steps, labelled by agent.
+
+    A single instance can be shared by several agents, also across threads. The metrics can be exported in the
+    Prometheus text format or as a JSON snapshot.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms: typing.Dict[typing.Tuple[str, Labels], Histogram] = {}
+        self._counters: typing.Dict[typing.Tuple[str, Labels], float] = {}
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """
+        Records a value of a histogram.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(_FAMILIES[name].buckets)
+            histogram.observe(value)
+
+    def increment(self, name: str, amount: float = 1, **labels: str) -> None:
+        """
+        Increments a counter.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def record_step(self, agent_id: str, step: smolagents.ActionStep, timings: StepTimings) -> None:
+        """
+        Records the latencies and token counts of an agent step.
+        """
+        self.increment("autoboltagent_steps_total", agent=agent_id)
+        if step.error is not None:
+            self.increment("autoboltagent_step_errors_total", agent=agent_id)
+
+        self.observe("autoboltagent_llm_latency_seconds", timings.llm_latency, agent=agent_id)
+        for tool, latency in timings.tool_latencies.items():
+            self.observe("autoboltagent_tool_latency_seconds", latency, agent=agent_id, tool=tool)
+
+        if step.token_usage is not None:
+            self.observe("autoboltagent_input_tokens", step.token_usage.input_tokens, agent=agent_id)
+            self.observe("autoboltagent_output_tokens", step.token_usage.output_tokens, agent=agent_id)
+
+    def record_run(self, agent_id: str, steps: int) -> None:
+        """
+        Records the number of steps an agent took to finish a run.
+        """
+        self.observe("autoboltagent_run_steps", steps, agent=agent_id)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def snapshot(self) -> typing.Dict[str, typing.List[typing.Dict[str, typing.Any]]]:
+        """
+        Returns the metrics as JSON-serializable data: for every metric, one entry per set of labels with the
+        value of counters, or the count, sum, mean and cumulative bucket counts of histograms.
+        """
+        snapshot: typing.Dict[str, typing.List[typing.Dict[str, typing.Any]]] = {}
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                snapshot.setdefault(name, []).append(dict(labels=dict(labels), value=value))
+
+            for (name, labels), histogram in sorted(self._histograms.items(), key=lambda item: item[0]):
+                snapshot.setdefault(name, []).append(
+                    dict(
+                        labels=dict(labels),
+                        count=histogram.count,
+                        sum=histogram.sum,
+                        mean=histogram.sum / histogram.count if histogram.count else None,
+                        buckets=dict(
+                            zip(
+                                [*map(_format_number, histogram.buckets), "+Inf"],
+                                histogram.cumulative_counts(),
+                            )
+                        ),
+                    )
+                )
+
+        return snapshot
+
+    def to_prometheus(self) -> str:
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            for name, family in _FAMILIES.items():
+                if family.kind == "counter":
+                    series = sorted((labels, value) for (n, labels), value in self._counters.items() if n == name)
+                else:
+                    series = sorted(
+                        ((labels, h) for (n, labels), h in self._histograms.items() if n == name),
+                        key=lambda item: item[0],
+                    )
+                if not series:
+                    continue
+
+                lines.append(f"# HELP {name} {family.help}")
+                lines.append(f"# TYPE {name} {family.kind}")
+
+                for labels, value in series:
+                    if family.kind == "counter":
+                        lines.append(f"{name}{_format_labels(labels)} {_format_number(value)}")
+                        continue
+
+                    bounds = [*map(_format_number, value.buckets), "+Inf"]
+                    for bound, count in zip(bounds, value.cumulative_counts()):
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_number(value.sum)}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {value.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: typing.Union[str, Path]) -> None:
+        """
+        Writes the metrics to a text file in the Prometheus format, e.g. for the textfile collector of the node
+        exporter. The file is replaced atomically.
+        """
+        self._write(path, self.to_prometheus())
+
+    def write_json(self, path: typing.Union[str, Path]) -> None:
+        """
+        Writes a JSON snapshot of the metrics, see `snapshot`.
+        """
+        self._write(path, json.dumps(self.snapshot(), indent=2))
+
+    @staticmethod
+    def _write(path: typing.Union[str, Path], text: str) -> None:
+        path = Path(path)
+        temporary = path.with_name(path.name + ".tmp")
+        temporary.write_text(text)
+        temporary.replace(path)
@@ -0,0 +1,193 @@
+import dataclasses
+import hashlib
+import typing
+from pathlib import Path
+
+import smolagents
+from smolagents.models import ChatMessageToolCall, ChatMessageToolCallFunction, get_tool_json_schema
+
+from .tools.cache import ResultCache
+
+# Version of the layout of cached generations, entries written under another layout are ignored
+CACHE_FORMAT = "1"
+
+
+class GenerationCacheMiss(LookupError):
+    """
+    Raised by a strict CachedModel when a generation is not in its cache.
+    """
+
+
+class _UnkeyableValue(TypeError):
+    """
+    Raised by _jsonable for values without a form that is stable across processes.
+    """
+
+
+def _jsonable(value: typing.Any) -> typing.Any:
+    """
+    Converts messages and their contents to JSON-compatible data for cache keys. Binary contents, such as images
+    and arrays, are represented by their type, shape and a hash of their bytes. Other values raise _UnkeyableValue,
+    as their repr usually holds a memory address that changes from one process to the next.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {
+            field.name: _jsonable(getattr(value, field.name))
+            for field in dataclasses.fields(value)
+            if field.name not in ("raw", "token_usage")
+        }
+    if isinstance(value, (bytes, bytearray)):
+        return {"bytes": hashlib.sha256(value).hexdigest()}
+    if callable(getattr(value, "tobytes", None)):
+        # PIL images and numpy arrays
+        return {
+            "type": f"{type(value).__module__}.{type(value).__qualname__}",
+            "shape": [str(getattr(value, name, None)) for name in ("mode", "size", "dtype", "shape")],
+            "bytes": hashlib.sha256(value.tobytes()).hexdigest(),
+        }
+    raise _UnkeyableValue(f"{type(value).__name__} values have no stable cache key")
+
+
+def open_generation_cache(path: typing.Union[str, Path], max_entries: int = 100000) -> ResultCache:
+    """
+    Opens a persistent cache of model generations for CachedModel.
+
+    Args:
+        path: Location of the SQLite file holding the cache.
+        max_entries: Number of generations kept before the least recently used ones are evicted.
+    """
+    return ResultCache(path, max_entries=max_entries, version=CACHE_FORMAT)
+
+
+class CachedModel(smolagents.models.Model):
+    """
+    Wraps a model so that its generations are stored in a persistent ResultCache and replayed when the same
+    request is made again.
+
+    Requests are identified by the class and identifier of the wrapped model, its generation parameters, the
+    message history, the stop sequences and response format, and the schemas of the tools the model may call. A
+    re-run whose agents see the same histories therefore replays every generation from disk, including its token
+    usage. In strict mode a request missing from the cache raises GenerationCacheMiss instead of generating, which
+    guarantees a replay is deterministic. Requests holding values without a stable key, see `request_key`, are
+    generated without being cached, or raise GenerationCacheMiss in strict mode.
+    """
+
+    def __init__(self, model: smolagents.models.Model, cache: ResultCache, strict: bool = False) -> None:
+        """
+        Initializes a CachedModel.
+
+        Args:
+            model: Model generating on cache misses.
+            cache: Cache of generations, see `open_generation_cache`.
+            strict: Whether to raise GenerationCacheMiss on a miss instead of generating.
+        """
+        super().__init__(
+            model_id=model.model_id,
+            flatten_messages_as_text=model.flatten_messages_as_text,
+            tool_name_key=model.tool_name_key,
+            tool_arguments_key=model.tool_arguments_key,
+        )
+        self.model = model
+        self.cache = cache
+        self.strict = strict
+
+    def request_key(
+        self,
+        messages: typing.List[typing.Any],
+        stop_sequences: typing.Optional[typing.List[str]] = None,
+        response_format: typing.Optional[typing.Dict[str, typing.Any]] = None,
+        tools_to_call_from: typing.Optional[typing.List[smolagents.Tool]] = None,
+        **kwargs,
+    ) -> str:
+        """
+        Returns the cache key of a generation request, see `generate`.
+
+        Raises:
+            TypeError: If the request holds a value that has no stable key, i.e. neither JSON-compatible data nor
+                binary content such as an image.
+        """
+        return ResultCache.make_key(
+            dict(
+                model_class=f"{type(self.model).__module__}.{type(self.model).__qualname__}",
+                model_id=self.model.model_id,
+                model_parameters=_jsonable(getattr(self.model, "kwargs", {})),
+                messages=_jsonable(messages),
+                stop_sequences=_jsonable(stop_sequences),
+                response_format=_jsonable(response_format),
+                tools=[_jsonable(get_tool_json_schema(tool)) for tool in tools_to_call_from or []],
+                parameters=_jsonable(kwargs),
+            )
+        )
+
+    def generate(
+        self,
+        messages,
+        stop_sequences=None,
+        response_format=None,
+        tools_to_call_from=None,
+        **kwargs,
+    ) -> smolagents.ChatMessage:
+        try:
+            key = self.request_key(messages, stop_sequences, response_format, tools_to_call_from, **kwargs)
+        except _UnkeyableValue as e:
+            if self.strict:
+                raise GenerationCacheMiss(
+                    f"Generations of {self.model_id} for this request cannot be cached: {e}"
+                ) from e
+            key = None
+
+        cached = None if key is None else self.cache.get(key)
+        if cached is not None:
+            return _from_cache(cached)
+
+        if self.strict:
+            raise GenerationCacheMiss(f"No cached generation of {self.model_id} for this request (key {key})")
+
+        message = self.model.generate(
+            messages,
+            stop_sequences=stop_sequences,
+            response_format=response_format,
+            tools_to_call_from=tools_to_call_from,
+            **kwargs,
+        )
+        if key is not None:
+            self.cache.put(key, _to_cache(message))
+        return message
+
+    def parse_tool_calls(self, message: smolagents.ChatMessage) -> smolagents.ChatMessage:
+        return self.model.parse_tool_calls(message)
+
+
+def _to_cache(message: smolagents.ChatMessage) -> typing.Dict[str, typing.Any]:
+    token_usage = message.token_usage
+    return dict(
+        role=str(smolagents.MessageRole(message.role).value),
+        content=message.content,
+        tool_calls=[dataclasses.asdict(call) for call in message.tool_calls or []] or None,
+        token_usage=None if token_usage is None else [token_usage.input_tokens, token_usage.output_tokens],
+    )
+
+
+def _from_cache(value: typing.Dict[str, typing.Any]) -> smolagents.ChatMessage:
+    token_usage = value["token_usage"]
+    return smolagents.ChatMessage(
+        role=smolagents.MessageRole(value["role"]),
+        content=value["content"],
+        tool_calls=None
+        if value["tool_calls"] is None
+        else [
+            ChatMessageToolCall(
+                id=call["id"],
+                type=call["type"],
+                function=ChatMessageToolCallFunction(**call["function"]),
+            )
+            for call in value["tool_calls"]
+        ],
+        token_usage=None if token_usage is None else smolagents.TokenUsage(*token_usage),
+    )
@@ -0,0 +1,179 @@
+import threading
+import time
+import typing
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .agents import BoltDesignAgent
+from .tools.acceptance import Convergence
+
+
+class RaceEntry(typing.NamedTuple):
+    """
+    Outcome of one agent of a race, see `race_agents`.
+
+    Attributes:
+        agent_id: Identifier of the agent.
+        status: "won" for the first agent to converge, "converged" for an agent that converged after the winner,
+            "finished" for an agent that answered without converging, "cancelled" for an agent stopped because
+            another one won or the race timed out, "failed" when the agent raised, or "cancelling" for an agent
+            that was still stopping when the race returned.
+        duration: Time from the start of the race until the agent returned, including the time it took to stop, or
+            until the race returned for an agent still stopping [s].
+        answer: Final answer of the agent, if it gave one.
+        convergence: Converged design of the agent, if any.
+        error: Error raised by a failed agent.
+    """
+
+    agent_id: str
+    status: str
+    duration: float
+    answer: typing.Optional[str] = None
+    convergence: typing.Optional[Convergence] = None
+    error: typing.Optional[str] = None
+
+
+class RaceResult(typing.NamedTuple):
+    """
+    Outcome of a race, see `race_agents`.
+
+    Attributes:
+        winner: Identifier of the first agent to converge, or None when no agent converged.
+        answer: Final answer of the winner.
+        convergence: Converged design of the winner.
+        duration: Time until the race returned [s].
+        entries: Outcome of every agent, keyed by agent identifier, in the order the agents were given.
+        stopping: Futures of the final entries of the agents still stopping when the race returned, keyed by agent
+            identifier.
+    """
+
+    winner: typing.Optional[str]
+    answer: typing.Optional[str]
+    convergence: typing.Optional[Convergence]
+    duration: float
+    entries: typing.Dict[str, RaceEntry]
+    stopping: typing.Dict[str, "Future[RaceEntry]"]
+
+
+def race_agents(
+    agents: typing.Sequence[BoltDesignAgent],
+    task: str,
+    timeout: typing.Optional[float] = None,
+) -> RaceResult:
+    """
+    Runs several agents on the same task concurrently and keeps the answer of the first one to converge, i.e. to
+    evaluate a design within the acceptable range of the target factor of safety.
+
+    Every agent stops on convergence, so convergence is checked after each of its steps. As soon as one converges,
+    the race returns and the others are interrupted before their next step. Finite element solves they are waiting
+    for are cancelled when their FiniteElementTool runs on a FEAWorkerPool, e.g. `HighFidelityAgent(model,
+    fea_pool=pool)`, whereas inline solves are left to finish. Agents that answer without converging do not end
+    the race.
+
+    Losers stop in the background, their entries are "cancelling" until then and `stopping` resolves to their
+    final entries. The convergence and cancellation settings of each agent are restored once it stopped.
+
+    Args:
+        agents: Agents racing, e.g. a LowFidelityAgent, a DualFidelityAgent and a HighFidelityAgent. Their
+            identifiers must differ.
+        task: Task prompt given to every agent.
+        timeout: Time after which the race returns and every agent still running is cancelled [s]. The race has no
+            time limit when not given.
+
+    Returns:
+        The winner and its answer, and the outcome and duration of every agent.
+    """
+    if not agents:
+        raise ValueError("A race needs at least one agent")
+    agent_ids = [agent.agent_id for agent in agents]
+    if len(set(agent_ids)) != len(agent_ids):
+        raise ValueError(f"The agents of a race need distinct identifiers, got {agent_ids}")
+
+    events = {agent.agent_id: threading.Event() for agent in agents}
+    lock = threading.Lock()
+    decided = threading.Event()
+    winner: typing.List[str] = []
+    entries: typing.Dict[str, RaceEntry] = {}
+
+    def cancel(agent: BoltDesignAgent) -> None:
+        events[agent.agent_id].set()
+        agent.interrupt()
+
+    def take_over(agent: BoltDesignAgent) -> typing.List[typing.Tuple[typing.Any, str, typing.Any]]:
+        # The coordinator takes over the convergence and cancellation settings of the agent and its tools until
+        # the agent stopped
+        saved = [
+            (agent, "stop_on_convergence", agent.stop_on_convergence),
+            (agent, "cancel_event", agent.cancel_event),
+        ]
+        if not agent.stop_on_convergence:
+            agent.stop_on_convergence = True
+        agent.cancel_event = events[agent.agent_id]
+        for tool in agent.tools.values():
+            if hasattr(tool, "cancel_event"):
+                saved.append((tool, "cancel_event", tool.cancel_event))
+                tool.cancel_event = events[agent.agent_id]
+        return saved
+
+    def race(agent: BoltDesignAgent) -> RaceEntry:
+        try:
+            answer = agent.run(task)
+        except Exception as e:
+            status = "cancelled" if events[agent.agent_id].is_set() else "failed"
+            return RaceEntry(agent.agent_id, status, time.perf_counter() - start, error=f"{type(e).__name__}: {e}")
+
+        duration = time.perf_counter() - start
+        answer = None if answer is None else str(answer)
+        if agent.convergence is None:
+            return RaceEntry(agent.agent_id, "finished", duration, answer=answer)
+
+        with lock:
+            won = not winner
+            if won:
+                winner.append(agent.agent_id)
+        if won:
+            for other in agents:
+                if other is not agent:
+                    cancel(other)
+
+        return RaceEntry(agent.agent_id, "won" if won else "converged", duration, answer, agent.convergence)
+
+    def run(agent: BoltDesignAgent, saved) -> RaceEntry:
+        try:
+            entry = race(agent)
+        finally:
+            for owner, name, value in reversed(saved):
+                setattr(owner, name, value)
+
+        with lock:
+            entries[agent.agent_id] = entry
+            if entry.status == "won" or len(entries) == len(agents):
+                decided.set()
+        return entry
+
+    executor = ThreadPoolExecutor(max_workers=len(agents), thread_name_prefix="race")
+    try:
+        start = time.perf_counter()
+        futures = {agent.agent_id: executor.submit(run, agent, take_over(agent)) for agent in agents}
+        decided.wait(timeout)
+    finally:
+        # Losers finish stopping in the background
+        executor.shutdown(wait=False)
+
+    duration = time.perf_counter() - start
+    with lock:
+        finished = dict(entries)
+
+    for agent in agents:
+        if agent.agent_id not in finished:
+            cancel(agent)
+
+    result_entries = {
+        agent_id: finished.get(agent_id, RaceEntry(agent_id, "cancelling", duration)) for agent_id in agent_ids
+    }
+    stopping = {agent_id: futures[agent_id] for agent_id in agent_ids if agent_id not in finished}
+
+    entry = next((entry for entry in finished.values() if entry.status == "won"), None)
+    if entry is None:
+        return RaceResult(None, None, None, duration, result_entries, stopping)
+
+    return RaceResult(entry.agent_id, entry.answer, entry.convergence, duration, result_entries, stopping)
@@ -0,0 +1,293 @@
+import math
+import multiprocessing
+import statistics
+import typing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy
+
+from .tools.fastener_toolkit import DESIGN_COLUMNS, batch_safety_factors
+
+# Number of samples evaluated at once, which bounds the memory used to about a hundred bytes per sample
+CHUNK_SIZE = 100000
+
+
+class Normal(typing.NamedTuple):
+    """
+    Normally distributed scatter of an input.
+    """
+
+    mean: float
+    std: float
+
+    def sample(self, rng: numpy.random.Generator, size: int) -> numpy.ndarray:
+        return rng.normal(self.mean, self.std, size)
+
+
+class LogNormal(typing.NamedTuple):
+    """
+    Log-normally distributed scatter of a positive input, given by the mean and standard deviation of the input
+    itself rather than of its logarithm.
+    """
+
+    mean: float
+    std: float
+
+    def sample(self, rng: numpy.random.Generator, size: int) -> numpy.ndarray:
+        sigma = math.sqrt(math.log1p((self.std / self.mean) ** 2))
+        return rng.lognormal(math.log(self.mean) - sigma**2 / 2, sigma, size)
+
+
+class Uniform(typing.NamedTuple):
+    """
+    Uniformly distributed scatter of an input between two bounds.
+    """
+
+    low: float
+    high: float
+
+    def sample(self, rng: numpy.random.Generator, size: int) -> numpy.ndarray:
+        return rng.uniform(self.low, self.high, size)
+
+
+Distribution = typing.Union[Normal, LogNormal, Uniform]
+
+
+class ReliabilityResult(typing.NamedTuple):
+    """
+    Outcome of a Monte Carlo reliability analysis, see `analyze_reliability`.
+
+    Attributes:
+        samples: Number of samples drawn.
+        failures: Number of samples in which the bolts or the plates failed.
+        failure_probability: Estimated probability of failure.
+        confidence_interval: Wilson score interval of the probability of failure.
+        bolt_failure_probability: Estimated probability of the bolts yielding.
+        plate_failure_probability: Estimated probability of the plates failing in bearing.
+        sensitivities: Correlation of every scattered input with the governing factor of safety, the smaller of the
+            bolt and plate ones, ordered from the most to the least influential input. Inputs with a negative
+            correlation make failure more likely as they grow.
+    """
+
+    samples: int
+    failures: int
+    failure_probability: float
+    confidence_interval: typing.Tuple[float, float]
+    bolt_failure_probability: float
+    plate_failure_probability: float
+    sensitivities: typing.Dict[str, float]
+
+    @property
+    def reliability_index(self) -> float:
+        """
+        Reliability index beta, the number of standard deviations of a standard normal variable matching the
+        probability of failure.
+        """
+        if self.failure_probability <= 0:
+            return math.inf
+        if self.failure_probability >= 1:
+            return -math.inf
+        return -statistics.NormalDist().inv_cdf(self.failure_probability)
+
+
+class _Summary(typing.NamedTuple):
+    """
+    Failure counts and moments of a set of samples, which can be merged across chunks. `x_mean`, `x_m2` and `xy_c`
+    hold the mean, sum of squared deviations and co-moment with the governing factor of safety y of every scattered
+    input.
+    """
+
+    count: int
+    failures: int
+    bolt_failures: int
+    plate_failures: int
+    moments_count: int
+    x_mean: numpy.ndarray
+    x_m2: numpy.ndarray
+    y_mean: float
+    y_m2: float
+    xy_c: numpy.ndarray
+
+
+def _merge(a: _Summary, b: _Summary) -> _Summary:
+    """
+    Combines the summaries of two sets of samples with the pairwise update of Chan et al., which stays accurate
+    over many chunks.
+    """
+    n_a, n_b = a.moments_count, b.moments_count
+    n = n_a + n_b
+    if n_a == 0 or n_b == 0:
+        moments = b if n_a == 0 else a
+    else:
+        dx = b.x_mean - a.x_mean
+        dy = b.y_mean - a.y_mean
+        weight = n_a * n_b / n
+        moments = a._replace(
+            x_mean=a.x_mean + dx * n_b / n,
+            x_m2=a.x_m2 + b.x_m2 + dx**2 * weight,
+            y_mean=a.y_mean + dy * n_b / n,
+            y_m2=a.y_m2 + b.y_m2 + dy**2 * weight,
+            xy_c=a.xy_c + b.xy_c + dx * dy * weight,
+        )
+
+    return moments._replace(
+        count=a.count + b.count,
+        failures=a.failures + b.failures,
+        bolt_failures=a.bolt_failures + b.bolt_failures,
+        plate_failures=a.plate_failures + b.plate_failures,
+        moments_count=n,
+    )
+
+
+def _simulate_chunk(
+    design: typing.Mapping[str, float],
+    scatter: typing.Mapping[str, Distribution],
+    seed: numpy.random.SeedSequence,
+    size: int,
+    required_fos: float,
+) -> _Summary:
+    """
+    Draws and evaluates one chunk of samples.
+    """
+    rng = numpy.random.default_rng(seed)
+    names = [name for name in DESIGN_COLUMNS if name in scatter]
+
+    samples = dict(design)
+    for name in names:
+        samples[name] = scatter[name].sample(rng, size)
+
+    # Draws outside the physical range of an input give infinite or undefined factors of safety, which count as
+    # failures when below the required one and are left out of the sensitivities
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        bolt_fos, plate_fos = batch_safety_factors(samples)
+        bolt_failed = bolt_fos < required_fos
+        plate_failed = plate_fos < required_fos
+
+    y = numpy.minimum(bolt_fos, plate_fos)
+    finite = numpy.isfinite(y)
+    y = y[finite]
+    x = numpy.stack([samples[name][finite] for name in names])
+
+    x_mean = x.mean(axis=1) if len(y) else numpy.zeros(len(names))
+    y_mean = float(y.mean()) if len(y) else 0.0
+    dx = x - x_mean[:, None]
+    dy = y - y_mean
+
+    return _Summary(
+        count=size,
+        failures=int(numpy.count_nonzero(bolt_failed | plate_failed)),
+        bolt_failures=int(numpy.count_nonzero(bolt_failed)),
+        plate_failures=int(numpy.count_nonzero(plate_failed)),
+        moments_count=len(y),
+        x_mean=x_mean,
+        x_m2=(dx**2).sum(axis=1),
+        y_mean=y_mean,
+        y_m2=float((dy**2).sum()),
+        xy_c=(dx * dy).sum(axis=1),
+    )
+
+
+def _reduce(summaries: typing.Iterable[_Summary]) -> _Summary:
+    total = None
+    for summary in summaries:
+        total = summary if total is None else _merge(total, summary)
+    return typing.cast(_Summary, total)
+
+
+def wilson_interval(successes: int, trials: int, confidence: float = 0.95) -> typing.Tuple[float, float]:
+    """
+    Wilson score interval of a binomial proportion, which remains meaningful when no or every trial succeeds.
+    """
+    if trials == 0:
+        return 0.0, 1.0
+
+    z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+    p = successes / trials
+    denominator = 1 + z**2 / trials
+    center = (p + z**2 / (2 * trials)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / trials + z**2 / (4 * trials**2)) / denominator
+    low = 0.0 if successes == 0 else max(center - half_width, 0.0)
+    high = 1.0 if successes == trials else min(center + half_width, 1.0)
+    return low, high
+
+
+def analyze_reliability(
+    design: typing.Mapping[str, float],
+    scatter: typing.Mapping[str, Distribution],
+    samples: int = 1000000,
+    required_fos: float = 1.0,
+    confidence: float = 0.95,
+    seed: int = 0,
+    chunk_size: int = CHUNK_SIZE,
+    max_workers: typing.Optional[int] = None,
+) -> ReliabilityResult:
+    """
+    Estimates the probability that the bolts yield or the plates fail in bearing when the inputs of a design
+    scatter, by Monte Carlo sampling of the analytical model.
+
+    The samples are drawn and evaluated in chunks of `chunk_size`, so memory use does not depend on the number of
+    samples. Every chunk draws from its own stream spawned from `seed`, so the result only depends on the seed and
+    the chunk size, and not on how the chunks are spread across workers.
+
+    Args:
+        design: Nominal value of every input in DESIGN_COLUMNS without scatter, using the units of the tool inputs.
+        scatter: Distribution of every input with scatter, e.g. {"load": Normal(60000, 6000)}.
+        samples: Number of samples drawn.
+        required_fos: Factor of safety below which the bolts or plates are considered to fail.
+        confidence: Confidence level of the interval of the probability of failure.
+        seed: Seed of the random number generators.
+        chunk_size: Number of samples evaluated at once.
+        max_workers: Number of worker processes the chunks are spread across. By default the chunks are evaluated
+            in the calling process.
+
+    Returns:
+        The estimated probabilities of failure, their confidence interval and the sensitivity of the governing
+        factor of safety to every scattered input.
+    """
+    if samples < 1:
+        raise ValueError("At least one sample is needed")
+    if not scatter:
+        raise ValueError("No input has a distribution, the design is deterministic")
+    unknown = (set(design) | set(scatter)) - set(DESIGN_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown inputs {sorted(unknown)}, expected names in DESIGN_COLUMNS")
+    missing = set(DESIGN_COLUMNS) - set(design) - set(scatter)
+    if missing:
+        raise ValueError(f"No nominal value or distribution for {sorted(missing)}")
+
+    design = {name: value for name, value in design.items() if name not in scatter}
+    sizes = [min(chunk_size, samples - start) for start in range(0, samples, chunk_size)]
+    seeds = numpy.random.SeedSequence(seed).spawn(len(sizes))
+    arguments = (
+        [design] * len(sizes),
+        [scatter] * len(sizes),
+        seeds,
+        sizes,
+        [required_fos] * len(sizes),
+    )
+
+    if max_workers is None or max_workers <= 1:
+        summary = _reduce(map(_simulate_chunk, *arguments))
+    else:
+        # Spawned rather than forked, like the workers of run_experiments
+        with ProcessPoolExecutor(max_workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            summary = _reduce(pool.map(_simulate_chunk, *arguments))
+
+    names = [name for name in DESIGN_COLUMNS if name in scatter]
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        correlations = summary.xy_c / numpy.sqrt(summary.x_m2 * summary.y_m2)
+    sensitivities = {
+        name: float(correlation) if numpy.isfinite(correlation) else 0.0
+        for name, correlation in zip(names, correlations)
+    }
+
+    return ReliabilityResult(
+        samples=summary.count,
+        failures=summary.failures,
+        failure_probability=summary.failures / summary.count,
+        confidence_interval=wilson_interval(summary.failures, summary.count, confidence),
+        bolt_failure_probability=summary.bolt_failures / summary.count,
+        plate_failure_probability=summary.plate_failures / summary.count,
+        sensitivities=dict(sorted(sensitivities.items(), key=lambda item: -abs(item[1]))),
+    )
+
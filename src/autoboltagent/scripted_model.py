@@ -0,0 +1,112 @@
+import threading
+import time
+import typing
+
+import smolagents
+from smolagents.models import ChatMessageToolCall, ChatMessageToolCallFunction
+
+# One tool call, as the name of the tool and its arguments
+ToolCallSpec = typing.Tuple[str, typing.Dict[str, typing.Any]]
+
+# One model response: plain text, one tool call, or several tool calls made in the same step
+ScriptStep = typing.Union[str, ToolCallSpec, typing.List[ToolCallSpec]]
+
+
+def final_answer(answer: typing.Any) -> ToolCallSpec:
+    """
+    Returns the script step giving the final answer of the agent.
+    """
+    return ("final_answer", {"answer": answer})
+
+
+def _content(message) -> typing.Any:
+    return message["content"] if isinstance(message, dict) else message.content
+
+
+class ScriptedModel(smolagents.models.Model):
+    """
+    A model that replays a fixed sequence of responses instead of running inference.
+
+    Agents driven by a ScriptedModel run offline and deterministically, which makes them suitable for tests and for
+    measuring the time the agent loop and the tools take apart from the model. Every call of `generate` returns the
+    next step of the script after an optional simulated latency. Token usage is estimated at four characters per
+    token so that logs and metrics have plausible values.
+    """
+
+    def __init__(
+        self,
+        script: typing.Sequence[ScriptStep],
+        latency: typing.Union[float, typing.Callable[[int], float]] = 0.0,
+        model_id: str = "scripted",
+        **kwargs,
+    ) -> None:
+        """
+        Initializes a ScriptedModel.
+
+        Args:
+            script: Responses of the model, in order. Text is returned as the content of the message, tool calls as
+                tool calls of the message. Use `final_answer` to end the run.
+            latency: Time each generation takes [s], or a function of the index of the step returning it.
+            model_id: Identifier of the model.
+        """
+        super().__init__(model_id=model_id, **kwargs)
+        self.script = list(script)
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        """
+        Restarts the script from its first step.
+        """
+        with self._lock:
+            self.calls = 0
+
+    def generate(
+        self,
+        messages,
+        stop_sequences=None,
+        response_format=None,
+        tools_to_call_from=None,
+        **kwargs,
+    ) -> smolagents.ChatMessage:
+        with self._lock:
+            index = self.calls
+            self.calls += 1
+
+        if index >= len(self.script):
+            raise RuntimeError(f"The script of {self.model_id} has no step {index + 1}, it has {len(self.script)}")
+
+        latency = self.latency(index) if callable(self.latency) else self.latency
+        if latency > 0:
+            time.sleep(latency)
+
+        step = self.script[index]
+        if isinstance(step, str):
+            content, tool_calls = step, None
+        else:
+            calls = [step] if isinstance(step, tuple) else step
+            content = None
+            tool_calls = [
+                ChatMessageToolCall(
+                    id=f"call_{index}_{i}",
+                    type="function",
+                    function=ChatMessageToolCallFunction(name=name, arguments=dict(arguments)),
+                )
+                for i, (name, arguments) in enumerate(calls)
+            ]
+
+        prompt_characters = sum(len(str(_content(message))) for message in messages)
+        output_characters = len(content or "") + sum(
+            len(str(call.function.arguments)) for call in tool_calls or []
+        )
+
+        return smolagents.ChatMessage(
+            role=smolagents.MessageRole.ASSISTANT,
+            content=content,
+            tool_calls=tool_calls,
+            token_usage=smolagents.TokenUsage(
+                input_tokens=prompt_characters // 4,
+                output_tokens=output_characters // 4,
+            ),
+        )
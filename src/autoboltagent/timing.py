@@ -0,0 +1,99 @@
+import collections
+import threading
+import time
+import typing
+
+import smolagents
+
+
+class StepTimings(typing.NamedTuple):
+    """
+    Time spent during one agent step generating with the model and running each tool [s].
+    """
+
+    llm_latency: float
+    tool_latencies: typing.Dict[str, float]
+
+    @property
+    def tool_latency(self) -> float:
+        return sum(self.tool_latencies.values())
+
+
+class _TimedModel:
+    """
+    Wraps a model so that the time spent generating is reported to a StepTimer. Every other attribute is forwarded
+    to the wrapped model, which can be shared by several agents.
+    """
+
+    def __init__(self, model: smolagents.models.Model, timer: "StepTimer") -> None:
+        self._model = model
+        self._timer = timer
+
+    def __getattr__(self, name):
+        return getattr(self._model, name)
+
+    def generate(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._model.generate(*args, **kwargs)
+        finally:
+            self._timer.record_llm(time.perf_counter() - start)
+
+    def generate_stream(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            yield from self._model.generate_stream(*args, **kwargs)
+        finally:
+            self._timer.record_llm(time.perf_counter() - start)
+
+
+class StepTimer:
+    """
+    Measures the time an agent spends generating with its model and running each of its tools, step by step.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._llm_latency = 0.0
+        self._tool_latencies: typing.Dict[str, float] = collections.defaultdict(float)
+
+    def record_llm(self, seconds: float) -> None:
+        with self._lock:
+            self._llm_latency += seconds
+
+    def record_tool(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self._tool_latencies[name] += seconds
+
+    def instrument_model(self, model: smolagents.models.Model) -> smolagents.models.Model:
+        """
+        Returns a view of a model whose generation time is recorded by this timer.
+        """
+        return typing.cast(smolagents.models.Model, _TimedModel(model, self))
+
+    def instrument_tools(self, tools: typing.Dict[str, smolagents.Tool]) -> None:
+        """
+        Records the time spent in the forward method of each tool. Tools may run in parallel within a step, in which
+        case their times are summed.
+        """
+        for tool in tools.values():
+            forward = tool.forward
+
+            def timed_forward(*args, _forward=forward, _name=tool.name, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return _forward(*args, **kwargs)
+                finally:
+                    self.record_tool(_name, time.perf_counter() - start)
+
+            tool.forward = timed_forward
+
+    def pop(self) -> StepTimings:
+        """
+        Returns the times recorded since the last call and starts measuring the next step.
+        """
+        with self._lock:
+            timings = StepTimings(self._llm_latency, dict(self._tool_latencies))
+            self._llm_latency = 0.0
+            self._tool_latencies.clear()
+        return timings
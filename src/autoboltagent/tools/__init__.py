@@ -1,2 +1,5 @@
-from .high_fidelity_tool import FiniteElementTool
-from .low_fidelity_tool import AnalyticalTool
+from .high_fidelity_tool import FiniteElementTool, BatchFiniteElementTool
+from .low_fidelity_tool import AnalyticalTool, BatchAnalyticalTool
+from .design_search_tool import DesignSearchTool
+from .diameter_solver_tool import DiameterSolverTool
+from .screening_tool import ScreeningTool
@@ -0,0 +1,71 @@
+import typing
+
+# Half-widths of the bands around the desired factor of safety within which a design is accepted. The bolt and
+# assembly bands follow BASE_INSTRUCTIONS, the plate bearing check is held to a looser band.
+BOLT_FOS_TOLERANCE = 0.1
+PLATE_FOS_TOLERANCE = 0.5
+ASSEMBLY_FOS_TOLERANCE = 0.1
+
+# Outcomes of compare_fos, also written in the outputs of the tools
+HIGHER_THAN_DESIRED = "higher than desired"
+LOWER_THAN_DESIRED = "lower than desired"
+WITHIN_ACCEPTABLE_RANGE = "within acceptable range"
+
+
+def compare_fos(fos: float, desired_safety_factor: float, tolerance: float) -> str:
+    """
+    Describes how a factor of safety compares with the desired one
+    :param fos: The factor of safety of the design
+    :param desired_safety_factor: The desired factor of safety
+    :param tolerance: Half-width of the accepted band around the desired factor of safety
+    :return: "higher than desired", "lower than desired" or "within acceptable range"
+    """
+    if fos > desired_safety_factor + tolerance:
+        return HIGHER_THAN_DESIRED
+    elif fos < desired_safety_factor - tolerance:
+        return LOWER_THAN_DESIRED
+    else:
+        return WITHIN_ACCEPTABLE_RANGE
+
+
+def is_acceptable(*comparisons: str) -> bool:
+    """
+    Tells whether a design passed every factor of safety check
+    :param comparisons: The outcomes of compare_fos for every check of the design
+    :return: True if every check is within the acceptable range
+    """
+    return all(comparison == WITHIN_ACCEPTABLE_RANGE for comparison in comparisons)
+
+
+def observations_accepted(observations: typing.Optional[str]) -> bool:
+    """
+    Tells whether the outputs of the tools of a step judged every factor of safety to be within the acceptable range
+    :param observations: The observations of the step
+    :return: True if the observations hold an accepted factor of safety and no rejected one
+    """
+    return (
+        bool(observations)
+        and WITHIN_ACCEPTABLE_RANGE in observations
+        and HIGHER_THAN_DESIRED not in observations
+        and LOWER_THAN_DESIRED not in observations
+    )
+
+
+class Convergence(typing.NamedTuple):
+    """
+    Machine-readable signal of a tool call whose design passed every factor of safety check, set on the tool as
+    its `convergence` attribute.
+    :param tool: Name of the tool that evaluated the design
+    :param num_bolts: Number of bolts of the design
+    :param bolt_diameter: Diameter of the bolts [mm]
+    :param factors_of_safety: Factors of safety of the design, keyed by check ("bolt", "plate" or "assembly")
+    """
+
+    tool: str
+    num_bolts: float
+    bolt_diameter: float
+    factors_of_safety: typing.Dict[str, float]
+
+    def describe(self) -> str:
+        checks = ", ".join(f"{check} FOS {fos:.2f}" for check, fos in self.factors_of_safety.items())
+        return f"{self.num_bolts:g} bolts of {self.bolt_diameter:g} mm diameter ({checks})"
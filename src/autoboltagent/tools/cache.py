@@ -0,0 +1,204 @@
+import hashlib
+import json
+import numbers
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+# Number of cache hits whose recency is held in memory before being written, see ResultCache.get
+TOUCH_BATCH_SIZE = 1000
+
+
+class ResultCache:
+    """
+    A persistent, size-bounded store for the results of expensive calculations, backed by SQLite.
+
+    Entries are looked up by a content hash of their inputs (see `make_key`) and stored as JSON. Every entry records
+    the version of the code that produced it, so results from another version are never returned and can be
+    removed with `invalidate`. When the cache grows past `max_entries` the least recently used entries are evicted.
+
+    Hits only read the database. Their recency is written in batches, before entries are evicted and when the cache
+    is closed, so lookups from concurrent agents do not contend for the SQLite write lock.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_entries: int = 10000,
+        version: str = "",
+    ) -> None:
+        """
+        Opens (or creates) a cache file.
+
+        Args:
+            path: Location of the SQLite file holding the cache.
+            max_entries: Number of entries kept before the least recently used ones are evicted.
+            version: Version of the code producing the results. Entries written under another version are ignored.
+        """
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._touched: Dict[str, float] = {}
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL;")
+        self._conn.execute("PRAGMA synchronous=NORMAL;")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, version TEXT NOT NULL, value TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_entries_last_used ON entries (last_used)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(inputs: Any, significant_digits: int = 9) -> str:
+        """
+        Builds a content-addressed key from JSON-compatible inputs. Floats are rounded to a number of significant
+        digits so that inputs differing only by floating point noise share an entry.
+
+        Args:
+            inputs: The inputs of the calculation, made of dicts, lists, tuples, strings and numbers.
+            significant_digits: Number of significant digits kept for floats.
+
+        Returns:
+            A SHA-256 hex digest of the canonicalized inputs.
+        """
+
+        def canonicalize(value):
+            if isinstance(value, bool) or value is None or isinstance(value, str):
+                return value
+            if isinstance(value, numbers.Real):
+                # Also covers numpy integers and floats
+                return float(f"{float(value):.{significant_digits}g}")
+            if isinstance(value, dict):
+                return {str(k): canonicalize(v) for k, v in value.items()}
+            if isinstance(value, (list, tuple)):
+                return [canonicalize(v) for v in value]
+            raise TypeError(f"Cannot build a cache key from {type(value).__name__}")
+
+        payload = json.dumps(canonicalize(inputs), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Returns the value stored under a key, or `default` when there is no entry for the current version.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM entries WHERE key = ? AND version = ?",
+                (key, self.version),
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            self._touched[key] = time.time()
+            if len(self._touched) >= TOUCH_BATCH_SIZE:
+                self._write_touches()
+                self._conn.commit()
+
+        return json.loads(row[0])
+
+    def _write_touches(self) -> None:
+        """
+        Writes the recency of the hits held in memory. Must be called with the lock held.
+        """
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE entries SET last_used = ? WHERE key = ?",
+                [(last_used, key) for key, last_used in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Stores a JSON-serializable value under a key, evicting the least recently used entries if the cache is full.
+        """
+        with self._lock:
+            self._write_touches()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, version, value, last_used) VALUES (?, ?, ?, ?)",
+                (key, self.version, json.dumps(value), time.time()),
+            )
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE key IN "
+                    "(SELECT key FROM entries ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+            self._conn.commit()
+
+    def invalidate(self, version: Optional[str] = None) -> int:
+        """
+        Removes entries written by other versions than the current one, or every entry of a given version.
+
+        Args:
+            version: Version whose entries are removed. Defaults to all versions except the current one.
+
+        Returns:
+            The number of entries removed.
+        """
+        with self._lock:
+            if version is None:
+                cursor = self._conn.execute(
+                    "DELETE FROM entries WHERE version != ?", (self.version,)
+                )
+            else:
+                cursor = self._conn.execute(
+                    "DELETE FROM entries WHERE version = ?", (version,)
+                )
+            self._conn.commit()
+
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        """
+        Removes every entry and resets the hit and miss counters.
+        """
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Returns the number of entries, hits and misses, and the hit rate since the cache was opened.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._write_touches()
+            self._conn.commit()
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute(
+                "SELECT COUNT(*) FROM entries WHERE version = ?", (self.version,)
+            ).fetchone()
+        return count
+
+    def __enter__(self) -> "ResultCache":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,171 @@
+import typing
+
+import numpy
+import pandas
+import smolagents
+
+from .acceptance import BOLT_FOS_TOLERANCE, PLATE_FOS_TOLERANCE
+from .fastener_toolkit import ISO_METRIC_BOLTS, batch_safety_factors
+from .geometry import feasible_designs
+from .inputs import INPUTS
+
+# Largest number of bolts considered by the search
+MAX_BOLTS = 12
+
+# Number of designs reported back to the agent
+MAX_REPORTED_DESIGNS = 5
+
+
+def candidate_designs(
+    load: float,
+    preload: float,
+    bolt_yield_strength: float,
+    bolt_elastic_modulus: float,
+    plate_thickness: float,
+    plate_elastic_modulus: float,
+    plate_yield_strength: float,
+    pitch: typing.Optional[float] = None,
+    max_bolts: int = MAX_BOLTS,
+) -> pandas.DataFrame:
+    """
+    Builds every geometrically feasible combination of a standard metric bolt size and a bolt count for a joint.
+
+    Args:
+        load: Load applied to the bolted connection [N].
+        preload: Preload applied to the joint [N].
+        bolt_yield_strength: Yield strength of the bolt material [MPa].
+        bolt_elastic_modulus: Elastic modulus of the bolt [GPa].
+        plate_thickness: Thickness of the plate [mm].
+        plate_elastic_modulus: Elastic modulus of the plate [GPa].
+        plate_yield_strength: Yield strength of the plate material [MPa].
+        pitch: Thread pitch used for every size [mm]. Defaults to the coarse pitch of each size.
+        max_bolts: Largest number of bolts considered.
+
+    Returns:
+        One row per design with the inputs of `batch_safety_factors`.
+    """
+    sizes = len(ISO_METRIC_BOLTS)
+    counts = numpy.arange(1, max_bolts + 1)
+
+    designs = pandas.DataFrame(
+        {
+            "num_bolts": numpy.repeat(counts, sizes),
+            "bolt_diameter": numpy.tile(ISO_METRIC_BOLTS["d"].to_numpy(), len(counts)),
+            "pitch": numpy.tile(ISO_METRIC_BOLTS["pitch"].to_numpy(), len(counts)),
+        }
+    )
+    if pitch is not None:
+        designs["pitch"] = float(pitch)
+
+    designs["load"] = load
+    designs["preload"] = preload
+    designs["bolt_yield_strength"] = bolt_yield_strength
+    designs["bolt_elastic_modulus"] = bolt_elastic_modulus
+    designs["plate_thickness"] = plate_thickness
+    designs["plate_elastic_modulus"] = plate_elastic_modulus
+    designs["plate_yield_strength"] = plate_yield_strength
+
+    feasible = feasible_designs(
+        designs["num_bolts"], designs["bolt_diameter"], designs["plate_thickness"]
+    )
+    return designs[feasible].reset_index(drop=True)
+
+
+def search_designs(desired_safety_factor: float, **joint) -> pandas.DataFrame:
+    """
+    Evaluates every candidate design of a joint with the analytical model and ranks them.
+
+    Args:
+        desired_safety_factor: Desired factor of safety.
+        **joint: Description of the joint, see `candidate_designs`.
+
+    Returns:
+        The candidate designs with their bolt and plate factors of safety and whether both fall within the
+        accepted bands. Accepted designs come first, ordered by bolt count and then size, followed by the
+        remaining designs ordered by how far their factors of safety fall outside the bands.
+    """
+    designs = candidate_designs(**joint)
+    designs["bolt_fos"], designs["plate_fos"] = batch_safety_factors(designs)
+
+    bolt_excess = (designs["bolt_fos"] - desired_safety_factor).abs() - BOLT_FOS_TOLERANCE
+    plate_excess = (designs["plate_fos"] - desired_safety_factor).abs() - PLATE_FOS_TOLERANCE
+
+    designs["accepted"] = (bolt_excess <= 0) & (plate_excess <= 0)
+    designs["error"] = bolt_excess.clip(lower=0) + plate_excess.clip(lower=0)
+
+    accepted = designs[designs["accepted"]].sort_values(["num_bolts", "bolt_diameter"])
+    rejected = designs[~designs["accepted"]].sort_values(["error", "num_bolts", "bolt_diameter"])
+
+    return pandas.concat([accepted, rejected]).drop(columns="error").reset_index(drop=True)
+
+
+class DesignSearchTool(smolagents.Tool):
+    """
+    A tool that finds bolted connection designs by exhaustively evaluating standard bolt sizes and counts.
+
+    Instead of guessing a design and checking it, the agent describes the joint once and this tool evaluates
+    every standard metric bolt size for every bolt count with the analytical expressions, returning the designs
+    whose bolt and plate factors of safety are within the accepted bands.
+    """
+
+    name = "design_search"
+    description = (
+        "Searches standard metric bolt sizes and bolt counts for designs meeting the desired factor of safety "
+        "using analytical expressions. Returns the accepted designs, fewest and smallest bolts first."
+    )
+
+    inputs = {
+        name: spec
+        for name, spec in INPUTS.items()
+        if name not in ("num_bolts", "bolt_diameter", "pitch")
+    }
+    inputs["pitch"] = {
+        "type": "number",
+        "description": "Pitch of the bolt in mm, leave empty to use the coarse pitch of each size",
+        "nullable": True,
+    }
+
+    output_type = "string"
+
+    def forward(
+        self,
+        desired_safety_factor: float,
+        load: float,
+        preload: float,
+        bolt_yield_strength: float,
+        bolt_elastic_modulus: float,
+        plate_thickness: float,
+        plate_elastic_modulus: float,
+        plate_yield_strength: float,
+        pitch: typing.Optional[float] = None,
+    ) -> str:
+
+        designs = search_designs(
+            desired_safety_factor,
+            load=load,
+            preload=preload,
+            bolt_yield_strength=bolt_yield_strength,
+            bolt_elastic_modulus=bolt_elastic_modulus,
+            plate_thickness=plate_thickness,
+            plate_elastic_modulus=plate_elastic_modulus,
+            plate_yield_strength=plate_yield_strength,
+            pitch=pitch,
+        )
+
+        if designs.empty:
+            return "No standard bolt size fits on the plate."
+
+        accepted = designs[designs["accepted"]]
+        if accepted.empty:
+            header = "No standard design is within the acceptable range. The closest designs are:"
+            reported = designs.head(MAX_REPORTED_DESIGNS)
+        else:
+            header = f"Standard designs within the acceptable range ({len(accepted)} found):"
+            reported = accepted.head(MAX_REPORTED_DESIGNS)
+
+        rows = [
+            f"- {design.num_bolts:.0f} x M{design.bolt_diameter:g} bolts: "
+            f"bolt FOS {design.bolt_fos:.2f}, plate FOS {design.plate_fos:.2f}"
+            for design in reported.itertuples()
+        ]
+        return "\n".join([header, *rows])
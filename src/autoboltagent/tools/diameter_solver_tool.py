@@ -0,0 +1,409 @@
+import math
+import typing
+
+import numpy
+import smolagents
+
+from .acceptance import BOLT_FOS_TOLERANCE, PLATE_FOS_TOLERANCE, compare_fos
+from .design_search_tool import MAX_BOLTS
+from .fastener_toolkit import (
+    CORNWELL_PARAMS,
+    ISO_METRIC_BOLTS,
+    bolt_yield_safety_factor,
+    get_joint_constant,
+    get_tensile_stress_area,
+    plate_bearing_safety_factor,
+)
+from .geometry import HOLE_OFFSET_FROM_BOTTOM, PLATE_LENGTH
+from .inputs import INPUTS
+
+# Tolerance of the solved diameters [mm]
+DIAMETER_TOLERANCE = 1e-6
+
+# Factor of the pitch between the major diameter and the mean of the pitch and minor diameters, see
+# get_tensile_stress_area
+_STRESS_DIAMETER_OFFSET = (1.2268 + 0.649519) / 2
+
+_ISO_D = ISO_METRIC_BOLTS["d"].to_numpy()
+_ISO_PITCH = ISO_METRIC_BOLTS["pitch"].to_numpy()
+_ISO_STRESS_D = _ISO_D - _STRESS_DIAMETER_OFFSET * _ISO_PITCH
+_CORNWELL_COEFFICIENTS = CORNWELL_PARAMS[["p0", "p1", "p2", "p3"]].to_numpy()
+
+# Ratios of the bolt diameter to the clamped length at which get_joint_constant snaps to or leaves a table entry.
+# The joint constant, and so the bolt factor of safety, is continuous between them and jumps at them
+_CORNWELL_BREAKPOINTS = tuple(sorted(j + offset for j in CORNWELL_PARAMS["j"] for offset in (-0.01, 0.01)))
+
+
+class DiameterSolution(typing.NamedTuple):
+    """
+    Bolt diameters meeting a desired factor of safety for a given number of bolts, see `solve_diameters`. Diameters
+    are None when no diameter fitting on the plate meets the desired factor of safety.
+    :param num_bolts: Number of bolts
+    :param bolt_diameter: Smallest diameter at which the bolt factor of safety reaches the desired one [mm]
+    :param plate_diameter: Diameter at which the plate bearing factor of safety equals the desired one [mm]
+    :param diameter: Smallest diameter meeting both, the larger of the two above [mm]
+    :param standard_diameter: Smallest standard metric size meeting both [mm]
+    :param standard_pitch: Pitch of the standard size [mm]
+    :param bolt_fos: Bolt factor of safety of the standard size
+    :param plate_fos: Plate bearing factor of safety of the standard size
+    """
+
+    num_bolts: int
+    bolt_diameter: typing.Optional[float]
+    plate_diameter: typing.Optional[float]
+    diameter: typing.Optional[float]
+    standard_diameter: typing.Optional[float] = None
+    standard_pitch: typing.Optional[float] = None
+    bolt_fos: typing.Optional[float] = None
+    plate_fos: typing.Optional[float] = None
+
+
+def diameter_limit(num_bolts: int) -> float:
+    """
+    Returns the diameter [mm] from which holes for `num_bolts` bolts no longer fit on the plate, see check_geometry.
+    """
+    return min(HOLE_OFFSET_FROM_BOTTOM * 1000 * 2, PLATE_LENGTH * 1000 / num_bolts)
+
+
+def coarse_pitch(bolt_diameter):
+    """
+    Returns the coarse pitch [mm] of standard metric bolts, interpolated between the standard sizes and constant
+    beyond them.
+    """
+    return numpy.interp(bolt_diameter, _ISO_D, _ISO_PITCH)
+
+
+def tensile_stress_diameter(a_ts: float, pitch: typing.Optional[float] = None) -> float:
+    """
+    Inverse of get_tensile_stress_area, returns the major diameter of the bolt with a given tensile stress area
+    :param a_ts: Tensile stress area of the bolt [mm^2]
+    :param pitch: Pitch of the bolt [mm], defaults to the coarse pitch of the diameter, see coarse_pitch
+    :return: the major diameter of the bolt [mm]
+    """
+    stress_diameter = math.sqrt(4 * max(a_ts, 0.0) / math.pi)
+    if pitch is not None:
+        return stress_diameter + _STRESS_DIAMETER_OFFSET * pitch
+
+    # The stress diameter grows with the major diameter and is linear between the standard sizes
+    if stress_diameter <= _ISO_STRESS_D[0]:
+        return stress_diameter + _STRESS_DIAMETER_OFFSET * _ISO_PITCH[0]
+    if stress_diameter >= _ISO_STRESS_D[-1]:
+        return stress_diameter + _STRESS_DIAMETER_OFFSET * _ISO_PITCH[-1]
+    return float(numpy.interp(stress_diameter, _ISO_STRESS_D, _ISO_D))
+
+
+def _refine(
+    excess: typing.Callable[[float], float],
+    low: float,
+    high: float,
+    f_low: float,
+    f_high: float,
+    xtol: float,
+) -> float:
+    """
+    Narrows a bracket with excess(low) = f_low < 0 <= excess(high) = f_high down to `xtol` with the Illinois variant
+    of regula falsi, which also converges onto jumps of the function. Steps are kept within the bracket by half of
+    `xtol` so that it closes around the root, and the bracket is bisected while an end is infinite.
+
+    Returns:
+        The upper end of the bracket.
+    """
+    side = 0
+    while high - low > xtol:
+        if math.isfinite(f_high - f_low):
+            x = low - f_low * (high - low) / (f_high - f_low)
+        else:
+            x = (low + high) / 2
+        x = min(max(x, low + xtol / 2), high - xtol / 2)
+
+        f = excess(x)
+        if f >= 0:
+            high, f_high = x, f
+            if side == 1:
+                f_low /= 2
+            side = 1
+        else:
+            low, f_low = x, f
+            if side == -1:
+                f_high /= 2
+            side = -1
+
+    return high
+
+
+def solve_bolt_diameter(
+    desired_safety_factor: float,
+    load: float,
+    preload: float,
+    num_bolts: int,
+    bolt_yield_strength: float,
+    bolt_elastic_modulus: float,
+    plate_thickness: float,
+    plate_elastic_modulus: float,
+    pitch: typing.Optional[float] = None,
+    xtol: float = DIAMETER_TOLERANCE,
+) -> typing.Optional[float]:
+    """
+    Solves for the smallest bolt diameter whose analytical bolt factor of safety reaches the desired one.
+
+    The joint constant is bounded by the entries of the Cornwell table, which bounds the tensile stress area the
+    bolts need and so brackets every solution. The first crossing of the desired factor of safety is located among
+    the continuous pieces of the joint constant within the bracket and refined by root-finding on the analytical
+    expressions.
+
+    Args:
+        desired_safety_factor: Desired factor of safety.
+        load: Load applied to the bolted connection [N].
+        preload: Preload applied to the joint [N].
+        num_bolts: Number of bolts sharing the load.
+        bolt_yield_strength: Yield strength of the bolt material [MPa].
+        bolt_elastic_modulus: Elastic modulus of the bolt [GPa].
+        plate_thickness: Thickness of the plate [mm].
+        plate_elastic_modulus: Elastic modulus of the plate [GPa].
+        pitch: Thread pitch [mm]. Defaults to the coarse pitch, interpolated between the standard sizes.
+        xtol: Tolerance of the diameter [mm].
+
+    Returns:
+        The diameter [mm], within `xtol` above the exact solution, or None when no diameter fitting on the plate
+        reaches the desired factor of safety.
+    """
+    load_per_bolt = load / num_bolts
+    preload_per_bolt = preload / num_bolts
+
+    def evaluate(d):
+        c = get_joint_constant(d, plate_thickness * 2, plate_elastic_modulus, bolt_elastic_modulus)
+        a_ts = get_tensile_stress_area(d, float(coarse_pitch(d)) if pitch is None else pitch)
+        fos = bolt_yield_safety_factor(c, load_per_bolt, preload_per_bolt, a_ts, bolt_yield_strength)
+        return preload_per_bolt + c * load_per_bolt, fos - desired_safety_factor
+
+    def excess(d):
+        return evaluate(d)[1]
+
+    # Tensile stress areas reaching the desired factor of safety with the smallest and largest joint constant
+    r = plate_elastic_modulus / bolt_elastic_modulus
+    constants = _CORNWELL_COEFFICIENTS @ numpy.array([1.0, r, r**2, r**3])
+    bolt_loads = [preload_per_bolt + c * load_per_bolt for c in (constants.min(), constants.max())]
+    areas = [desired_safety_factor * bolt_load / bolt_yield_strength for bolt_load in bolt_loads]
+
+    # Bolts keep a positive minor diameter and fit on the plate
+    smallest = 1.2268 * (_ISO_PITCH[0] if pitch is None else pitch)
+    limit = diameter_limit(num_bolts)
+
+    low = max(tensile_stress_diameter(min(areas), pitch), smallest)
+    if min(bolt_loads) > 0:
+        # Widened by the tolerance, the factor of safety at the largest joint constant equals the desired one
+        high = min(max(tensile_stress_diameter(max(areas), pitch) + xtol, low), limit)
+    else:
+        # Joint constants below zero, outside the validity of the Cornwell table, can unload the bolts and give
+        # negative factors of safety anywhere up to the largest diameter
+        high = limit
+    if low >= limit:
+        return None
+
+    # The joint constant is linear in the diameter between its breakpoints, around which it is sampled on both
+    # sides
+    clamped_length = plate_thickness * 2
+    ends = []
+    for j in _CORNWELL_BREAKPOINTS:
+        if low < j * clamped_length < high:
+            ends += [j * clamped_length - xtol / 4, j * clamped_length + xtol / 4]
+
+    # Follow the pieces through the bracket up to the first diameter reaching the desired factor of safety. The
+    # factor of safety of a piece over which the bolts are unloaded turns positive and infinite where the bolt load
+    # crosses zero, the first diameter sampled beyond it
+    previous = low
+    load_previous, f_previous = evaluate(low)
+    if f_previous >= 0:
+        return low
+    for d in [*ends, high]:
+        bolt_load, f = evaluate(d)
+        if load_previous <= 0 < bolt_load and d - previous > xtol / 2:
+            unloaded = previous + (d - previous) * load_previous / (load_previous - bolt_load)
+            d = min(unloaded + xtol / 4, d)
+            bolt_load, f = evaluate(d)
+        if f >= 0:
+            return _refine(excess, previous, d, f_previous, f, xtol)
+        previous, load_previous, f_previous = d, bolt_load, f
+
+    return None
+
+
+def solve_plate_diameter(
+    desired_safety_factor: float,
+    load: float,
+    num_bolts: int,
+    plate_thickness: float,
+    plate_yield_strength: float,
+) -> typing.Optional[float]:
+    """
+    Solves for the bolt diameter at which the plate bearing factor of safety equals the desired one. The bearing
+    factor of safety is proportional to the diameter, so the solution is exact.
+
+    Returns:
+        The diameter [mm], or None when it does not fit on the plate.
+    """
+    diameter = desired_safety_factor * load / (1.5 * plate_yield_strength * plate_thickness * num_bolts)
+    return diameter if diameter < diameter_limit(num_bolts) else None
+
+
+def solve_diameters(
+    desired_safety_factor: float,
+    load: float,
+    preload: float,
+    bolt_yield_strength: float,
+    bolt_elastic_modulus: float,
+    plate_thickness: float,
+    plate_elastic_modulus: float,
+    plate_yield_strength: float,
+    pitch: typing.Optional[float] = None,
+    max_bolts: int = MAX_BOLTS,
+) -> typing.List[DiameterSolution]:
+    """
+    Solves for the smallest bolt diameter, and the smallest standard metric size, whose analytical bolt and plate
+    bearing factors of safety both reach the desired one, for every bolt count.
+
+    Args:
+        desired_safety_factor: Desired factor of safety.
+        load: Load applied to the bolted connection [N].
+        preload: Preload applied to the joint [N].
+        bolt_yield_strength: Yield strength of the bolt material [MPa].
+        bolt_elastic_modulus: Elastic modulus of the bolt [GPa].
+        plate_thickness: Thickness of the plate [mm].
+        plate_elastic_modulus: Elastic modulus of the plate [GPa].
+        plate_yield_strength: Yield strength of the plate material [MPa].
+        pitch: Thread pitch used for every diameter [mm]. Defaults to the coarse pitch of each size.
+        max_bolts: Largest number of bolts considered.
+
+    Returns:
+        One solution per bolt count from 1 to `max_bolts`.
+    """
+    solutions = []
+    for num_bolts in range(1, max_bolts + 1):
+        bolt_diameter = solve_bolt_diameter(
+            desired_safety_factor,
+            load,
+            preload,
+            num_bolts,
+            bolt_yield_strength,
+            bolt_elastic_modulus,
+            plate_thickness,
+            plate_elastic_modulus,
+            pitch,
+        )
+        plate_diameter = solve_plate_diameter(
+            desired_safety_factor, load, num_bolts, plate_thickness, plate_yield_strength
+        )
+        if bolt_diameter is None or plate_diameter is None:
+            solutions.append(DiameterSolution(num_bolts, bolt_diameter, plate_diameter, None))
+            continue
+
+        diameter = max(bolt_diameter, plate_diameter)
+        solution = DiameterSolution(num_bolts, bolt_diameter, plate_diameter, diameter)
+
+        # The first standard size at least as large, or a larger one should the bolt factor of safety dip below
+        # the desired one at that size
+        for d, coarse in zip(_ISO_D, _ISO_PITCH):
+            if d < diameter:
+                continue
+            if d >= diameter_limit(num_bolts):
+                break
+
+            standard_pitch = coarse if pitch is None else pitch
+            c = get_joint_constant(d, plate_thickness * 2, plate_elastic_modulus, bolt_elastic_modulus)
+            bolt_fos = bolt_yield_safety_factor(
+                c,
+                load / num_bolts,
+                preload / num_bolts,
+                get_tensile_stress_area(d, standard_pitch),
+                bolt_yield_strength,
+            )
+            plate_fos = plate_bearing_safety_factor(load, d, plate_thickness, num_bolts, plate_yield_strength)
+
+            if bolt_fos >= desired_safety_factor and plate_fos >= desired_safety_factor:
+                solution = solution._replace(
+                    standard_diameter=float(d),
+                    standard_pitch=float(standard_pitch),
+                    bolt_fos=bolt_fos,
+                    plate_fos=plate_fos,
+                )
+                break
+
+        solutions.append(solution)
+
+    return solutions
+
+
+class DiameterSolverTool(smolagents.Tool):
+    """
+    A tool that solves for the bolt diameter meeting the desired factor of safety for every bolt count.
+
+    Instead of guessing diameters, the agent describes the joint once and this tool inverts the analytical
+    expressions, returning for every bolt count the exact diameter at which both the bolt and plate factors of
+    safety reach the desired one and the smallest standard metric size that meets it.
+    """
+
+    name = "diameter_solver"
+    description = (
+        "Solves the analytical expressions for the smallest bolt diameter meeting the desired factor of safety for "
+        "every bolt count, and gives the smallest standard metric size meeting it with its factors of safety."
+    )
+
+    inputs = {
+        name: spec
+        for name, spec in INPUTS.items()
+        if name not in ("num_bolts", "bolt_diameter", "pitch")
+    }
+    inputs["pitch"] = {
+        "type": "number",
+        "description": "Pitch of the bolt in mm, leave empty to use the coarse pitch of each size",
+        "nullable": True,
+    }
+
+    output_type = "string"
+
+    def forward(
+        self,
+        desired_safety_factor: float,
+        load: float,
+        preload: float,
+        bolt_yield_strength: float,
+        bolt_elastic_modulus: float,
+        plate_thickness: float,
+        plate_elastic_modulus: float,
+        plate_yield_strength: float,
+        pitch: typing.Optional[float] = None,
+    ) -> str:
+
+        solutions = solve_diameters(
+            desired_safety_factor,
+            load=load,
+            preload=preload,
+            bolt_yield_strength=bolt_yield_strength,
+            bolt_elastic_modulus=bolt_elastic_modulus,
+            plate_thickness=plate_thickness,
+            plate_elastic_modulus=plate_elastic_modulus,
+            plate_yield_strength=plate_yield_strength,
+            pitch=pitch,
+        )
+
+        rows = [f"Smallest diameters reaching a factor of safety of {desired_safety_factor:g} per bolt count:"]
+        for solution in solutions:
+            if solution.diameter is None:
+                rows.append(f"- {solution.num_bolts} bolts: no diameter fitting on the plate is large enough")
+                continue
+
+            governing = "bolt" if solution.bolt_diameter >= solution.plate_diameter else "plate"
+            row = f"- {solution.num_bolts} bolts: {solution.diameter:.2f} mm ({governing} governs)"
+            if solution.standard_diameter is None:
+                row += ", no standard size fits on the plate"
+            else:
+                bolt_comparison = compare_fos(solution.bolt_fos, desired_safety_factor, BOLT_FOS_TOLERANCE)
+                plate_comparison = compare_fos(solution.plate_fos, desired_safety_factor, PLATE_FOS_TOLERANCE)
+                row += (
+                    f", standard size M{solution.standard_diameter:g} x {solution.standard_pitch:g}: "
+                    f"bolt FOS {solution.bolt_fos:.2f} ({bolt_comparison}), "
+                    f"plate FOS {solution.plate_fos:.2f} ({plate_comparison})"
+                )
+            rows.append(row)
+
+        return "\n".join(rows)
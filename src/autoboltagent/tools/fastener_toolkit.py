@@ -1,3 +1,4 @@
+import bisect
 import math
 import typing
 
@@ -28,6 +29,54 @@ CORNWELL_PARAMS = pandas.DataFrame(
     columns=["j", "p0", "p1", "p2", "p3"],
 )
 
+# Nominal major diameters and coarse thread pitches [mm] of the ISO 261 metric bolts, preferred and second choice sizes
+ISO_METRIC_BOLTS = pandas.DataFrame(
+    numpy.array(
+        [
+            [3, 0.5],
+            [4, 0.7],
+            [5, 0.8],
+            [6, 1.0],
+            [8, 1.25],
+            [10, 1.5],
+            [12, 1.75],
+            [14, 2.0],
+            [16, 2.0],
+            [18, 2.5],
+            [20, 2.5],
+            [22, 2.5],
+            [24, 3.0],
+            [27, 3.0],
+            [30, 3.5],
+            [33, 3.5],
+            [36, 4.0],
+        ]
+    ),
+    columns=["d", "pitch"],
+)
+
+# Contiguous copies of the Cornwell table used by the vectorized lookups
+_CORNWELL_J = CORNWELL_PARAMS["j"].to_numpy()
+_CORNWELL_P = CORNWELL_PARAMS[["p0", "p1", "p2", "p3"]].to_numpy()
+
+# Plain Python copies of the Cornwell table for the scalar lookup, which is too small to benefit from pandas or numpy
+_CORNWELL_J_VALUES = tuple(_CORNWELL_J.tolist())
+_CORNWELL_P_VALUES = tuple(tuple(row) for row in _CORNWELL_P.tolist())
+
+# Inputs of the analytical model, named as in the tool input schema
+DESIGN_COLUMNS = (
+    "load",
+    "preload",
+    "num_bolts",
+    "bolt_diameter",
+    "bolt_yield_strength",
+    "bolt_elastic_modulus",
+    "plate_thickness",
+    "plate_elastic_modulus",
+    "plate_yield_strength",
+    "pitch",
+)
+
 
 def get_tensile_stress_area(
     d_major: float,
@@ -133,50 +182,23 @@ def get_joint_constant(d_b: float, l: float, E_m: float, E_b: float):
     """
     j = d_b / l
 
-    # Linearly interpolate through the table to obtain values for p0, p1, p2, and p3
-
-    j_2 = CORNWELL_PARAMS[CORNWELL_PARAMS["j"] >= j - 0.01].iloc[0, 0]
+    # Linearly interpolate through the table to obtain values for p0, p1, p2, and p3. Table entries within 0.01 of j
+    # are used as is, and designs outside the published range take the values at the ends of the table
+    last = len(_CORNWELL_J_VALUES) - 1
+    i_2 = min(bisect.bisect_left(_CORNWELL_J_VALUES, j - 0.01), last)
 
     # Check if j_2 is the max value in the table, if yes, then there is no need to linearly interpolate
-    if j_2 > 1.75:
-        j_1 = j_2
+    if _CORNWELL_J_VALUES[i_2] > 1.75:
+        i_1 = i_2
     else:
-        j_1 = CORNWELL_PARAMS[CORNWELL_PARAMS["j"] <= j + 0.01].iloc[-1, 0]
-
-    # Bound the values for the range of J values published
-    j_1 = bound_val(j_1, [0.1, 2])
-    j_2 = bound_val(j_2, [0.1, 2])
-
-    p_0 = linterp(
-        j_1,
-        j_2,
-        float(CORNWELL_PARAMS.loc[CORNWELL_PARAMS["j"] == j_1]["p0"]),
-        float(CORNWELL_PARAMS.loc[CORNWELL_PARAMS["j"] == j_2]["p0"]),
-        j,
-    )
+        i_1 = max(bisect.bisect_right(_CORNWELL_J_VALUES, j + 0.01) - 1, 0)
 
-    p_1 = linterp(
-        j_1,
-        j_2,
-        float(CORNWELL_PARAMS.loc[CORNWELL_PARAMS["j"] == j_1]["p1"]),
-        float(CORNWELL_PARAMS.loc[CORNWELL_PARAMS["j"] == j_2]["p1"]),
-        j,
-    )
-
-    p_2 = linterp(
-        j_1,
-        j_2,
-        float(CORNWELL_PARAMS.loc[CORNWELL_PARAMS["j"] == j_1]["p2"]),
-        float(CORNWELL_PARAMS.loc[CORNWELL_PARAMS["j"] == j_2]["p2"]),
-        j,
-    )
+    j_1 = _CORNWELL_J_VALUES[i_1]
+    j_2 = _CORNWELL_J_VALUES[i_2]
 
-    p_3 = linterp(
-        j_1,
-        j_2,
-        float(CORNWELL_PARAMS.loc[CORNWELL_PARAMS["j"] == j_1]["p3"]),
-        float(CORNWELL_PARAMS.loc[CORNWELL_PARAMS["j"] == j_2]["p3"]),
-        j,
+    p_0, p_1, p_2, p_3 = (
+        linterp(j_1, j_2, y_1, y_2, j)
+        for y_1, y_2 in zip(_CORNWELL_P_VALUES[i_1], _CORNWELL_P_VALUES[i_2])
     )
 
     # Plate to modulus ratio, r
@@ -187,6 +209,77 @@ def get_joint_constant(d_b: float, l: float, E_m: float, E_b: float):
     return c
 
 
+def _interpolate_cornwell(j: numpy.ndarray) -> typing.Tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Vectorized lookup of the Cornwell coefficients p0 to p3 at ratios j of the bolt diameter to the clamped length,
+    with the same table search as get_joint_constant, including its 0.01 tolerance around each entry
+    :param j: Ratios of the bolt diameter to the clamped length
+    :return: the coefficients and their derivatives with respect to j, both with a last axis of length 4
+    """
+    last = len(_CORNWELL_J) - 1
+    i_2 = numpy.clip(numpy.searchsorted(_CORNWELL_J, j - 0.01, side="left"), 0, last)
+    i_1 = numpy.clip(numpy.searchsorted(_CORNWELL_J, j + 0.01, side="right") - 1, 0, last)
+    i_1 = numpy.where(_CORNWELL_J[i_2] > 1.75, i_2, i_1)
+
+    j_1 = _CORNWELL_J[i_1][..., None]
+    j_2 = _CORNWELL_J[i_2][..., None]
+    p_1 = _CORNWELL_P[i_1]
+    p_2 = _CORNWELL_P[i_2]
+
+    # Linearly interpolate, falling back to the lower entry when both entries coincide (as linterp does)
+    span = j_2 - j_1
+    m = numpy.divide(p_2 - p_1, span, out=numpy.zeros_like(p_1), where=span != 0)
+
+    return (j[..., None] - j_1) * m + p_1, m
+
+
+def get_joint_constants(d_b, l, E_m, E_b) -> numpy.ndarray:
+    """
+    Vectorized form of get_joint_constant. Arguments may be scalars or arrays and are broadcast against each other.
+    Designs outside the published range of j take the coefficients at the end of the table
+    :param d_b: The diameter of the bolt [mm or in]
+    :param l: The clamped length of the joint [mm or in]
+    :param E_m: The member material Young's modulus [MPa or psi]
+    :param E_b: The bolt material Young's modulus [MPa or psi]
+    :return: The joint constant of every design
+    """
+    j = numpy.asarray(d_b, dtype=float) / numpy.asarray(l, dtype=float)
+    r = numpy.asarray(E_m, dtype=float) / numpy.asarray(E_b, dtype=float)
+    j, r = numpy.broadcast_arrays(j, r)
+
+    p, _ = _interpolate_cornwell(j)
+
+    return p[..., 3] * r**3 + p[..., 2] * r**2 + p[..., 1] * r + p[..., 0]
+
+
+def get_joint_constant_gradients(
+    d_b, l, E_m, E_b
+) -> typing.Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """
+    Vectorized joint constant with its partial derivatives with respect to the diameter to length ratio j and the
+    modulus ratio r. The interpolation through the Cornwell table is piecewise linear in j, so the derivatives are
+    exact within each piece. Within 0.01 of a table entry, and beyond the ends of the table, the coefficients are
+    constant and the derivative with respect to j is zero
+    :param d_b: The diameter of the bolt [mm or in]
+    :param l: The clamped length of the joint [mm or in]
+    :param E_m: The member material Young's modulus [MPa or psi]
+    :param E_b: The bolt material Young's modulus [MPa or psi]
+    :return: the joint constant, its derivative with respect to j = d_b / l, its derivative with respect to
+        r = E_m / E_b
+    """
+    j = numpy.asarray(d_b, dtype=float) / numpy.asarray(l, dtype=float)
+    r = numpy.asarray(E_m, dtype=float) / numpy.asarray(E_b, dtype=float)
+    j, r = numpy.broadcast_arrays(j, r)
+
+    p, dp_dj = _interpolate_cornwell(j)
+
+    c = p[..., 3] * r**3 + p[..., 2] * r**2 + p[..., 1] * r + p[..., 0]
+    dc_dj = dp_dj[..., 3] * r**3 + dp_dj[..., 2] * r**2 + dp_dj[..., 1] * r + dp_dj[..., 0]
+    dc_dr = 3 * p[..., 3] * r**2 + 2 * p[..., 2] * r + p[..., 1]
+
+    return c, dc_dj, dc_dr
+
+
 def segregate_loads(c: float, load: float) -> typing.Tuple[float, float]:
     """
     Identifies the quantity of a load carried by the bolt and by the members
@@ -225,6 +318,162 @@ def bolt_yield_safety_factor(
     return n_y
 
 
+def plate_bearing_safety_factor(
+    load: float, d_b: float, t: float, num_bolts: int, p_ys: float
+) -> float:
+    """
+    Determines the factor of safety against bearing failure of the plates, allowing a bearing stress of 1.5 times
+    the plate yield strength
+    :param load: Load applied to the joint [N or lbf]
+    :param d_b: The diameter of the bolt [mm or in]
+    :param t: Thickness of the plate [mm or in]
+    :param num_bolts: Number of bolts sharing the load
+    :param p_ys: Yield strength of the plate [MPa or psi]
+    :return: Factor of safety against bearing failure
+    """
+    bearing_area = d_b * t * num_bolts
+    bearing_stress = load / bearing_area
+    allowable_bearing_stress = 1.5 * p_ys
+
+    return allowable_bearing_stress / bearing_stress
+
+
+def batch_safety_factors(
+    designs: typing.Mapping[str, typing.Any],
+) -> typing.Tuple[numpy.ndarray, numpy.ndarray]:
+    """
+    Evaluates the analytical bolt and plate factors of safety for many designs in one vectorized pass. Matches the
+    results of AnalyticalTool design by design
+    :param designs: A DataFrame, or a mapping of arrays, with one entry per name in DESIGN_COLUMNS using the units of
+        the tool inputs. Scalars are broadcast against the arrays
+    :return: factor of safety of the bolts, factor of safety of the plates
+    """
+    values = numpy.broadcast_arrays(
+        *(numpy.asarray(designs[name], dtype=float) for name in DESIGN_COLUMNS)
+    )
+    design = dict(zip(DESIGN_COLUMNS, values))
+
+    num_bolts = design["num_bolts"]
+    tensile_area = get_tensile_stress_area(design["bolt_diameter"], design["pitch"])
+
+    c = get_joint_constants(
+        design["bolt_diameter"],
+        design["plate_thickness"] * 2,
+        design["plate_elastic_modulus"],
+        design["bolt_elastic_modulus"],
+    )
+
+    bolt_fos = bolt_yield_safety_factor(
+        c=c,
+        load=design["load"] / num_bolts,
+        preload=design["preload"] / num_bolts,
+        a_ts=tensile_area,
+        b_ys=design["bolt_yield_strength"],
+    )
+
+    plate_fos = plate_bearing_safety_factor(
+        load=design["load"],
+        d_b=design["bolt_diameter"],
+        t=design["plate_thickness"],
+        num_bolts=num_bolts,
+        p_ys=design["plate_yield_strength"],
+    )
+
+    return bolt_fos, plate_fos
+
+
+def batch_safety_factor_gradients(
+    designs: typing.Mapping[str, typing.Any],
+) -> typing.Tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray]:
+    """
+    Evaluates the analytical bolt and plate factors of safety of many designs together with their exact partial
+    derivatives with respect to every input, in one vectorized pass. The factors of safety match
+    batch_safety_factors. The derivatives follow the piecewise linear interpolation of the Cornwell table, see
+    get_joint_constant_gradients, and treat the number of bolts as continuous
+    :param designs: A DataFrame, or a mapping of arrays, with one entry per name in DESIGN_COLUMNS using the units of
+        the tool inputs. Scalars are broadcast against the arrays
+    :return: factor of safety of the bolts, factor of safety of the plates, and their gradients, whose last axis
+        holds the partial derivatives with respect to the inputs in the order of DESIGN_COLUMNS
+    """
+    values = numpy.broadcast_arrays(
+        *(numpy.asarray(designs[name], dtype=float) for name in DESIGN_COLUMNS)
+    )
+    design = dict(zip(DESIGN_COLUMNS, values))
+
+    load = design["load"]
+    preload = design["preload"]
+    n = design["num_bolts"]
+    d = design["bolt_diameter"]
+    pitch = design["pitch"]
+    t = design["plate_thickness"]
+    E_b = design["bolt_elastic_modulus"]
+    E_m = design["plate_elastic_modulus"]
+
+    # Factor of safety of the bolts, n * S_y * A_ts / (c * load + preload), see batch_safety_factors
+    tensile_area = get_tensile_stress_area(d, pitch)
+    c, dc_dj, dc_dr = get_joint_constant_gradients(d, t * 2, E_m, E_b)
+    bolt_load = c * load + preload
+    bolt_fos = bolt_yield_safety_factor(
+        c=c,
+        load=load / n,
+        preload=preload / n,
+        a_ts=tensile_area,
+        b_ys=design["bolt_yield_strength"],
+    )
+
+    plate_fos = plate_bearing_safety_factor(
+        load=load,
+        d_b=d,
+        t=t,
+        num_bolts=n,
+        p_ys=design["plate_yield_strength"],
+    )
+
+    # Derivatives of the tensile stress area, whose diameter is the mean of the pitch and minor diameters (Norton
+    # eq 15.1), relative to the area
+    stress_diameter = d - (1.2268 + 0.649519) / 2 * pitch
+    dlog_area_dd = 2 / stress_diameter
+    dlog_area_dpitch = -(1.2268 + 0.649519) / stress_diameter
+
+    # Derivatives of the joint constant through j = d / 2t and r = E_m / E_b
+    dc_dd = dc_dj / (t * 2)
+    dc_dt = -dc_dj * d / (t**2 * 2)
+    dc_dE_m = dc_dr / E_b
+    dc_dE_b = -dc_dr * E_m / E_b**2
+
+    bolt_partials = {
+        "load": -c / bolt_load,
+        "preload": -1 / bolt_load,
+        "num_bolts": 1 / n,
+        "bolt_diameter": dlog_area_dd - dc_dd * load / bolt_load,
+        "bolt_yield_strength": 1 / design["bolt_yield_strength"],
+        "bolt_elastic_modulus": -dc_dE_b * load / bolt_load,
+        "plate_thickness": -dc_dt * load / bolt_load,
+        "plate_elastic_modulus": -dc_dE_m * load / bolt_load,
+        "plate_yield_strength": numpy.zeros_like(d),
+        "pitch": dlog_area_dpitch,
+    }
+
+    # The bearing factor of safety is proportional to the diameter, thickness, bolt count and yield strength
+    plate_partials = {
+        "load": -1 / load,
+        "num_bolts": 1 / n,
+        "bolt_diameter": 1 / d,
+        "plate_thickness": 1 / t,
+        "plate_yield_strength": 1 / design["plate_yield_strength"],
+    }
+
+    # Both sets of partials are relative to the factor of safety
+    bolt_gradient = numpy.stack(
+        [bolt_fos * bolt_partials[name] for name in DESIGN_COLUMNS], axis=-1
+    )
+    plate_gradient = numpy.stack(
+        [plate_fos * plate_partials.get(name, 0.0) for name in DESIGN_COLUMNS], axis=-1
+    )
+
+    return bolt_fos, plate_fos, bolt_gradient, plate_gradient
+
+
 def bound_val(val: float, limits: typing.List[float]) -> float:
     """
     Bounds a value within limits, setting its value to the upper or lower limit if it is out of bounds
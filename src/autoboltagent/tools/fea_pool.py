@@ -0,0 +1,308 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+
+class FEASolveError(RuntimeError):
+    """
+    Raised when a finite element solve fails, exceeds its time limit, or its worker process dies.
+    """
+
+
+class FEASolveCancelled(FEASolveError):
+    """
+    Raised when a finite element solve is cancelled through its cancel event before it finished.
+    """
+
+
+# Interval at which a waiting solve checks its cancel event [s]
+CANCEL_POLL_INTERVAL = 0.05
+
+
+def calculate_fos(**arguments) -> float:
+    """
+    Default solver of the worker processes, a thin wrapper around autobolt.calculate_fos.
+    """
+    import autobolt
+
+    return float(autobolt.calculate_fos(**arguments))
+
+
+def _worker_main(
+    conn,
+    solver: Callable[..., float],
+    warmup_arguments: Optional[Dict[str, Any]],
+) -> None:
+    """
+    Entry point of a worker process. Solves the designs received over `conn` until it receives None.
+    """
+    if solver is calculate_fos:
+        # Pay the FEniCS/gmsh import cost before the first job arrives
+        import autobolt  # noqa: F401
+
+    if warmup_arguments is not None:
+        try:
+            solver(**warmup_arguments)
+        except Exception:
+            pass
+
+    conn.send(("ready", None))
+
+    while True:
+        try:
+            arguments = conn.recv()
+        except EOFError:
+            break
+
+        if arguments is None:
+            break
+
+        try:
+            conn.send(("ok", solver(**arguments)))
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    """
+    A worker process and the parent's end of the pipe used to talk to it.
+    """
+
+    def __init__(self, context, solver, warmup_arguments) -> None:
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main,
+            args=(child_conn, solver, warmup_arguments),
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        self.ready = False
+
+    def wait_until_ready(self, timeout: Optional[float], cancel_event: Optional[threading.Event] = None) -> bool:
+        """
+        Waits up to `timeout` seconds for the worker to finish importing and warming up, and returns whether it did.
+        Startup has its own time limit, so it does not count against the time limit of the first solve.
+        """
+        if not self.ready:
+            if not self.poll(timeout, cancel_event):
+                return False
+            self.conn.recv()
+            self.ready = True
+        return True
+
+    def poll(self, timeout: Optional[float], cancel_event: Optional[threading.Event] = None) -> bool:
+        """
+        Waits up to `timeout` seconds, or indefinitely, for the worker to send a message and returns whether it did.
+
+        Raises:
+            FEASolveCancelled: If `cancel_event` is set while waiting.
+        """
+        if cancel_event is None:
+            return self.conn.poll(timeout)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not cancel_event.is_set():
+            interval = CANCEL_POLL_INTERVAL
+            if deadline is not None:
+                interval = max(min(deadline - time.monotonic(), interval), 0)
+            if self.conn.poll(interval):
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+        raise FEASolveCancelled("The finite element solve was cancelled")
+
+    def stop(self) -> None:
+        """
+        Asks the worker to exit, killing it if it does not.
+        """
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=5)
+        self.kill()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class FEAWorkerPool:
+    """
+    A pool of pre-warmed worker processes that run finite element solves outside of the agent's process.
+
+    Every solve, and the startup of every worker, runs under a wall-clock time limit, after which the worker is
+    killed and replaced. Workers are recycled after a fixed number of jobs to bound the memory leaked by the
+    FEniCS/gmsh stack, and a worker that crashes is replaced while the solve it was running fails with a
+    `FEASolveError`.
+    """
+
+    def __init__(
+        self,
+        num_workers: Optional[int] = None,
+        timeout: float = 600.0,
+        max_jobs_per_worker: int = 25,
+        warmup_arguments: Optional[Dict[str, Any]] = None,
+        solver: Callable[..., float] = calculate_fos,
+        start_method: str = "spawn",
+        startup_timeout: float = 600.0,
+    ) -> None:
+        """
+        Starts the worker processes.
+
+        Args:
+            num_workers: Number of worker processes. Defaults to the number of CPUs.
+            timeout: Default time limit of a solve [s].
+            max_jobs_per_worker: Number of solves after which a worker process is replaced.
+            warmup_arguments: Optional design each worker solves on startup, so the first real solve does not pay
+                for just-in-time compilation.
+            solver: Picklable function run by the workers with the keyword arguments of autobolt.calculate_fos.
+            start_method: multiprocessing start method of the workers.
+            startup_timeout: Time limit of the imports and warmup solve of a worker [s].
+        """
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.startup_timeout = startup_timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.warmup_arguments = warmup_arguments
+        self.solver = solver
+
+        self._context = multiprocessing.get_context(start_method)
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        for _ in range(self.num_workers):
+            self._idle.put(self._spawn())
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.num_workers, thread_name_prefix="fea-pool"
+        )
+
+    def _spawn(self) -> _Worker:
+        return _Worker(self._context, self.solver, self.warmup_arguments)
+
+    def _get_idle(self, cancel_event: Optional[threading.Event]) -> _Worker:
+        if cancel_event is None:
+            return self._idle.get()
+
+        while not cancel_event.is_set():
+            try:
+                return self._idle.get(timeout=CANCEL_POLL_INTERVAL)
+            except queue.Empty:
+                pass
+        raise FEASolveCancelled("The finite element solve was cancelled")
+
+    def solve(
+        self,
+        arguments: Dict[str, Any],
+        timeout: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> float:
+        """
+        Solves one design on an idle worker, blocking until a worker is available and the solve is done.
+
+        Args:
+            arguments: Keyword arguments of autobolt.calculate_fos.
+            timeout: Time limit of this solve [s]. Defaults to the pool's timeout.
+            cancel_event: Optional event cancelling the solve when set. A solve cancelled while running kills its
+                worker, which is replaced like after a timeout.
+
+        Returns:
+            The factor of safety of the design.
+
+        Raises:
+            FEASolveCancelled: If `cancel_event` was set before the solve finished.
+            FEASolveError: If the solve raised, timed out, or its worker process died.
+        """
+        if self._closed:
+            raise FEASolveError("The finite element worker pool is closed")
+
+        timeout = self.timeout if timeout is None else timeout
+        worker = self._get_idle(cancel_event)
+
+        try:
+            try:
+                if not worker.wait_until_ready(self.startup_timeout, cancel_event):
+                    worker.kill()
+                    worker = self._spawn()
+                    raise FEASolveError(
+                        f"The finite element worker process did not start within {self.startup_timeout:g} s"
+                    )
+                worker.conn.send(arguments)
+                try:
+                    finished = worker.poll(timeout, cancel_event)
+                except FEASolveCancelled:
+                    worker.kill()
+                    worker = self._spawn()
+                    raise
+                if finished:
+                    status, result = worker.conn.recv()
+            except (EOFError, OSError):
+                exitcode = worker.process.exitcode
+                worker.kill()
+                worker = self._spawn()
+                raise FEASolveError(
+                    f"The finite element worker process crashed (exit code {exitcode})"
+                )
+
+            if not finished:
+                worker.kill()
+                worker = self._spawn()
+                raise FEASolveError(
+                    f"The finite element solve did not finish within {timeout:g} s"
+                )
+
+            worker.jobs += 1
+            if worker.jobs >= self.max_jobs_per_worker:
+                worker.stop()
+                worker = self._spawn()
+
+            if status == "error":
+                raise FEASolveError(f"The finite element solve failed: {result}")
+
+            return result
+        finally:
+            self._return(worker)
+
+    def _return(self, worker: _Worker) -> None:
+        with self._lock:
+            if self._closed:
+                worker.stop()
+            else:
+                self._idle.put(worker)
+
+    def submit(
+        self,
+        arguments: Dict[str, Any],
+        timeout: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> "Future[float]":
+        """
+        Queues a solve and returns a future for its factor of safety, see `solve`.
+        """
+        return self._executor.submit(self.solve, arguments, timeout, cancel_event)
+
+    def close(self) -> None:
+        """
+        Waits for queued solves to finish and stops the worker processes.
+        """
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self._closed = True
+            while not self._idle.empty():
+                self._idle.get_nowait().stop()
+
+    def __enter__(self) -> "FEAWorkerPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
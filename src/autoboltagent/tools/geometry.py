@@ -0,0 +1,89 @@
+import typing
+
+import numpy
+
+# Dimensions of the plate modelled by the finite element tool
+PLATE_WIDTH = 0.1  # [m]
+PLATE_LENGTH = 0.2  # [m]
+HOLE_OFFSET_FROM_BOTTOM = 0.020  # [m] vertical position of hole centers (Y from bottom edge)
+
+
+class FeasibilityCheck(typing.NamedTuple):
+    """
+    Outcome of the geometric feasibility check of a design. `code` identifies the violated constraint and `reason`
+    explains it, both are None for feasible designs.
+    """
+
+    feasible: bool
+    code: typing.Optional[str] = None
+    reason: typing.Optional[str] = None
+
+
+def _violations(num_bolts, bolt_diameter, plate_thickness):
+    """
+    Evaluates every geometric constraint on scalars or arrays of designs. Holes are spread evenly along the plate
+    length, so the edge margin is half the hole spacing and a hole reaching the plate end is covered by the
+    spacing check.
+    """
+    n = numpy.asarray(num_bolts, dtype=float)
+    d = numpy.asarray(bolt_diameter, dtype=float)
+    t = numpy.asarray(plate_thickness, dtype=float)
+
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        hole_spacing = PLATE_LENGTH * 1000 / n
+
+    return (
+        ("invalid_bolt_count", (n < 1) | (n != numpy.floor(n))),
+        ("non_positive_dimension", (d <= 0) | (t <= 0)),
+        ("holes_overlap", d >= hole_spacing),
+        ("hole_cuts_plate_edge", d / 2 >= HOLE_OFFSET_FROM_BOTTOM * 1000),
+    )
+
+
+def check_geometry(
+    num_bolts: float, bolt_diameter: float, plate_thickness: float
+) -> FeasibilityCheck:
+    """
+    Checks that a design can be built on the plate before any analysis is run.
+
+    Args:
+        num_bolts: Number of bolts used in the joint.
+        bolt_diameter: Diameter of the bolt [mm].
+        plate_thickness: Thickness of the plate [mm].
+
+    Returns:
+        The first violated constraint, or a feasible result.
+    """
+    for code, violated in _violations(num_bolts, bolt_diameter, plate_thickness):
+        if not violated:
+            continue
+
+        if code == "invalid_bolt_count":
+            reason = f"the number of bolts must be a positive whole number, got {num_bolts:g}"
+        elif code == "non_positive_dimension":
+            reason = "the bolt diameter and plate thickness must be positive"
+        elif code == "holes_overlap":
+            reason = (
+                f"{num_bolts:g} holes of {bolt_diameter:g} mm do not fit along the "
+                f"{PLATE_LENGTH * 1000:g} mm plate, the holes overlap or reach the plate ends"
+            )
+        else:
+            reason = (
+                f"a {bolt_diameter:g} mm hole centered {HOLE_OFFSET_FROM_BOTTOM * 1000:g} mm from the "
+                f"plate edge cuts through the edge of the {PLATE_WIDTH * 1000:g} mm wide plate"
+            )
+
+        return FeasibilityCheck(feasible=False, code=code, reason=reason)
+
+    return FeasibilityCheck(feasible=True)
+
+
+def feasible_designs(num_bolts, bolt_diameter, plate_thickness) -> numpy.ndarray:
+    """
+    Vectorized form of check_geometry.
+
+    Returns:
+        A boolean array that is True for the designs satisfying every geometric constraint.
+    """
+    violated = [mask for _, mask in _violations(num_bolts, bolt_diameter, plate_thickness)]
+    return ~numpy.logical_or.reduce(numpy.broadcast_arrays(*violated))
@@ -1,8 +1,117 @@
-import autobolt
+import atexit
+import importlib.metadata
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
 import smolagents
-from typing import Dict, Any, Union, cast
+from typing import Dict, Any, List, NamedTuple, Optional, Sequence, Tuple, Union, cast
+
+from .acceptance import ASSEMBLY_FOS_TOLERANCE, Convergence, compare_fos, is_acceptable
+from .cache import ResultCache
+from . import fea_pool
+from .fea_pool import FEASolveCancelled, FEASolveError, FEAWorkerPool
+from .geometry import (
+    HOLE_OFFSET_FROM_BOTTOM,
+    PLATE_LENGTH,
+    PLATE_WIDTH,
+    check_geometry,
+)
+from .inputs import BATCH_INPUTS, INPUTS
+
+# Traction of the single solve per geometry and material used by the linear scaling mode [Pa]
+REFERENCE_TRACTION = -1e6
+
+
+class MeshLevel(NamedTuple):
+    """
+    A level of the mesh ladder of FiniteElementTool.
+
+    Attributes:
+        name: Name of the level reported to the agent, e.g. "coarse".
+        arguments: Keyword arguments of autobolt.calculate_fos setting the mesh resolution of the level.
+        relative_error: Estimated discretization error of the level relative to the factor of safety, typically
+            calibrated against the finest level on a few designs. Used until a finer level was solved.
+    """
+
+    name: str
+    arguments: Dict[str, Any]
+    relative_error: float = 0.0
+
+
+class MeshSolution(NamedTuple):
+    """
+    Factor of safety found by the mesh ladder, the level it was solved on and its estimated discretization error.
+    """
 
-from .inputs import INPUTS
+    fos: float
+    level: str
+    error: float
+
+
+def autobolt_version() -> str:
+    """
+    Returns the installed version of autobolt, used to tell cached results of different solver versions apart.
+    """
+    try:
+        return importlib.metadata.version("autobolt")
+    except importlib.metadata.PackageNotFoundError:
+        import autobolt
+
+        return str(getattr(autobolt, "__version__", "unknown"))
+
+
+def open_fea_cache(path: Union[str, Path], max_entries: int = 10000) -> ResultCache:
+    """
+    Opens a persistent cache of finite element results for the installed version of autobolt.
+
+    Args:
+        path: Location of the SQLite file holding the cache.
+        max_entries: Number of results kept before the least recently used ones are evicted.
+    """
+    return ResultCache(path, max_entries=max_entries, version=autobolt_version())
+
+
+def fos_arguments(
+    load: float,
+    num_bolts: int,
+    bolt_diameter: float,
+    plate_thickness: float,
+    plate_elastic_modulus: float,
+    plate_yield_strength: float,
+) -> Dict[str, Any]:
+    """
+    Converts the tool inputs into the keyword arguments of autobolt.calculate_fos.
+
+    Args:
+        load: Load applied to the bolted connection [N].
+        num_bolts: Number of bolts used in the joint.
+        bolt_diameter: Diameter of the bolt [mm].
+        plate_thickness: Thickness of the plate [mm].
+        plate_elastic_modulus: Elastic modulus of the plate [GPa].
+        plate_yield_strength: Yield strength of the plate material [MPa].
+    """
+
+    # Compute traction
+    traction = -load / (plate_thickness / 1000 * PLATE_LENGTH)
+
+    return dict(
+        plate_thickness_m=plate_thickness / 1000,
+        num_holes=num_bolts,
+        elastic_modulus=plate_elastic_modulus * 10**9,
+        yield_strength=plate_yield_strength * 10**6,
+        traction_values=[(0, traction, 0)],
+        hole_radius_m=bolt_diameter / 2 / 1000,
+        plate_length_m=PLATE_LENGTH,
+        plate_width_m=PLATE_WIDTH,
+        edge_margin_m=PLATE_LENGTH / (2 * num_bolts),
+        hole_spacing_m=PLATE_LENGTH / num_bolts,
+        hole_offset_from_bottom_m=HOLE_OFFSET_FROM_BOTTOM,
+        plate_gap_mm=0.01,  # [mm] gap between the two plates
+        poissons_ratio=0.3,  # Poisson's ratio for steel
+    )
 
 
 class FiniteElementTool(smolagents.tools.Tool):
@@ -10,7 +119,18 @@ class FiniteElementTool(smolagents.tools.Tool):
     A tool that calculates the factor of safety for a bolted connection using finite element analysis.
 
     This tool leverages the autobolt library to perform finite element calculations and determine the factor of safety
-    for a bolted connection based on the provided parameters.
+    for a bolted connection based on the provided parameters. autobolt is only imported once a design is solved, so
+    creating the tool is cheap. Designs within the acceptable range are recorded in `convergence`. Results can be
+    kept in a persistent `ResultCache` so that designs which were already solved are not meshed and solved again,
+    and solves can be dispatched to a `FEAWorkerPool` so they run in separate processes under a time limit.
+
+    With `linear_scaling` enabled the tool relies on the plate model being linear elastic: the peak stress is
+    proportional to the applied traction, so each geometry and material is solved once at `REFERENCE_TRACTION` and
+    the factor of safety for any load is obtained by rescaling that solve.
+
+    With `mesh_levels`, designs are solved from the coarsest mesh to the finest and the tool answers as soon as the
+    factor of safety is outside the acceptable range by more than its estimated discretization error, so only
+    designs near the target pay for fine meshes.
     """
 
     name = "fea_fos_calculation"
@@ -21,6 +141,215 @@ class FiniteElementTool(smolagents.tools.Tool):
 
     output_type = "number"
 
+    # First design evaluated since the agent last cleared it that passed every check, see Convergence
+    convergence: Optional[Convergence] = None
+
+    # Optional event cancelling the solves of the tool when set. Solves running on a pool are interrupted, inline
+    # solves only check the event before they start.
+    cancel_event: Optional[threading.Event] = None
+
+    def __init__(
+        self,
+        cache: Optional[ResultCache] = None,
+        pool: Optional[FEAWorkerPool] = None,
+        linear_scaling: bool = False,
+        mesh_levels: Optional[Sequence[MeshLevel]] = None,
+        **kwargs,
+    ) -> None:
+        """
+        Initializes a FiniteElementTool.
+
+        Args:
+            cache: Optional cache of solved designs, see `open_fea_cache`.
+            pool: Optional pool of worker processes running the solves. Solves run inline when not given, except
+                for batches, see `calculate_many`.
+            linear_scaling: Whether to solve once per geometry and material and rescale the result to each load.
+            mesh_levels: Optional mesh ladder, from the coarsest to the finest level. Designs are solved with the
+                default mesh of autobolt when not given.
+        """
+        super().__init__(**kwargs)
+        self.cache = cache
+        self.pool = pool
+        self.linear_scaling = linear_scaling
+        self.mesh_levels = list(mesh_levels or [])
+        self._reference_solutions: Dict[str, float] = {}
+        self._batch_pool: Optional[FEAWorkerPool] = None
+
+    def batch_pool(self) -> FEAWorkerPool:
+        """
+        Returns the pool running batches of solves: the pool of the tool, or a pool with a worker per CPU started on
+        the first batch and kept until the tool is closed, so its workers are only warmed up once.
+        """
+        if self.pool is not None:
+            return self.pool
+        if self._batch_pool is None:
+            self._batch_pool = FEAWorkerPool(num_workers=os.cpu_count() or 1)
+            atexit.register(self.close)
+        return self._batch_pool
+
+    def close(self) -> None:
+        """
+        Stops the batch pool started by the tool, if any. A pool given to the tool is left to its owner.
+        """
+        if self._batch_pool is not None:
+            self._batch_pool.close()
+            self._batch_pool = None
+            atexit.unregister(self.close)
+
+    def _solve(self, arguments: Dict[str, Any]) -> float:
+        if self.pool is not None:
+            return self.pool.solve(arguments, cancel_event=self.cancel_event)
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise FEASolveCancelled("The finite element solve was cancelled")
+        # autobolt and its FEniCS/gmsh stack are imported on the first inline solve
+        return fea_pool.calculate_fos(**arguments)
+
+    def calculate_fos(self, **arguments) -> float:
+        """
+        Solves for the factor of safety of a design given the keyword arguments of autobolt.calculate_fos, reusing
+        the cached result when the same design was already solved.
+        """
+        if self.cache is None:
+            return self._solve(arguments)
+
+        key = ResultCache.make_key(arguments)
+        fos = self.cache.get(key)
+        if fos is None:
+            fos = float(self._solve(arguments))
+            self.cache.put(key, fos)
+
+        return fos
+
+    def calculate_scaled_fos(self, **arguments) -> float:
+        """
+        Determines the factor of safety of a design given the keyword arguments of autobolt.calculate_fos by
+        rescaling the solve of the same geometry and material at `REFERENCE_TRACTION`.
+        """
+        ((_, traction, _),) = arguments["traction_values"]
+        if traction == 0:
+            return math.inf
+
+        reference = dict(arguments, traction_values=[(0, REFERENCE_TRACTION, 0)])
+        key = ResultCache.make_key(reference)
+
+        reference_fos = self._reference_solutions.get(key)
+        if reference_fos is None:
+            reference_fos = float(self.calculate_fos(**reference))
+            self._reference_solutions[key] = reference_fos
+
+        # Stress scales with the traction, so the factor of safety scales with its inverse
+        return reference_fos * abs(REFERENCE_TRACTION / traction)
+
+    def calculate_adaptive_fos(self, desired_safety_factor: float, **arguments) -> MeshSolution:
+        """
+        Solves a design given the keyword arguments of autobolt.calculate_fos on the mesh ladder, refining only
+        while the factor of safety could be within the acceptable range of `desired_safety_factor`.
+
+        The error of a level is estimated from its `relative_error` until a finer level is solved, and from the
+        change of the factor of safety between the last two levels afterwards.
+        """
+        if not self.mesh_levels:
+            raise ValueError("The tool has no mesh levels")
+
+        calculate = self.calculate_scaled_fos if self.linear_scaling else self.calculate_fos
+
+        previous = None
+        for level in self.mesh_levels:
+            fos = float(calculate(**arguments, **level.arguments))
+            error = abs(fos) * level.relative_error if previous is None else abs(fos - previous)
+
+            # The finer levels cannot bring a design back within the acceptable range
+            if abs(fos - desired_safety_factor) > ASSEMBLY_FOS_TOLERANCE + error:
+                break
+
+            previous = fos
+
+        return MeshSolution(fos=fos, level=level.name, error=error)
+
+    def _reference_arguments(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Returns the arguments of the solve a design needs: the design itself, or with `linear_scaling` the same
+        geometry and material at `REFERENCE_TRACTION`.
+        """
+        if self.linear_scaling:
+            return dict(arguments, traction_values=[(0, REFERENCE_TRACTION, 0)])
+        return arguments
+
+    def _rescale(self, arguments: Dict[str, Any], reference_fos: float) -> float:
+        """
+        Returns the factor of safety of a design from the one of the solve it needs, see `_reference_arguments`.
+        """
+        if not self.linear_scaling:
+            return reference_fos
+        ((_, traction, _),) = arguments["traction_values"]
+        return reference_fos * abs(REFERENCE_TRACTION / traction)
+
+    def _solved_fos(self, arguments: Dict[str, Any]) -> Optional[float]:
+        """
+        Returns the factor of safety of a design given the keyword arguments of autobolt.calculate_fos when it can
+        be obtained without a solve, or None.
+        """
+        if self.linear_scaling:
+            ((_, traction, _),) = arguments["traction_values"]
+            if traction == 0:
+                return math.inf
+
+        key = ResultCache.make_key(self._reference_arguments(arguments))
+        reference_fos = self._reference_solutions.get(key) if self.linear_scaling else None
+        if reference_fos is None and self.cache is not None:
+            reference_fos = self.cache.get(key)
+            if reference_fos is not None and self.linear_scaling:
+                self._reference_solutions[key] = reference_fos
+        return None if reference_fos is None else self._rescale(arguments, reference_fos)
+
+    def calculate_many(
+        self, designs: List[Dict[str, Any]]
+    ) -> List[Tuple[float, Optional[str]]]:
+        """
+        Solves several designs concurrently, each given as the keyword arguments of autobolt.calculate_fos.
+
+        Designs found in the cache are answered first. The others are grouped by the solve they need, so identical
+        designs, or with `linear_scaling` designs differing only in their load, share one solve. The solves run on
+        `batch_pool`.
+
+        Returns:
+            For every design, its factor of safety and None, or NaN and the reason the solve failed.
+        """
+        results: List[Optional[Tuple[float, Optional[str]]]] = [None] * len(designs)
+        groups: Dict[str, Tuple[Dict[str, Any], List[int]]] = {}
+        for i, arguments in enumerate(designs):
+            fos = self._solved_fos(arguments)
+            if fos is not None:
+                results[i] = (float(fos), None)
+                continue
+            reference = self._reference_arguments(arguments)
+            groups.setdefault(ResultCache.make_key(reference), (reference, []))[1].append(i)
+
+        if not groups:
+            return cast(List[Tuple[float, Optional[str]]], results)
+
+        pool = self.batch_pool()
+
+        def solve(key: str) -> Tuple[float, Optional[str]]:
+            try:
+                reference_fos = float(pool.solve(groups[key][0], cancel_event=self.cancel_event))
+            except FEASolveError as e:
+                return math.nan, str(e)
+
+            if self.linear_scaling:
+                self._reference_solutions[key] = reference_fos
+            if self.cache is not None:
+                self.cache.put(key, reference_fos)
+            return reference_fos, None
+
+        with ThreadPoolExecutor(max_workers=min(len(groups), pool.num_workers)) as executor:
+            for (reference, indices), (reference_fos, error) in zip(groups.values(), executor.map(solve, groups)):
+                for i in indices:
+                    fos = reference_fos if error is not None else self._rescale(designs[i], reference_fos)
+                    results[i] = (fos, error)
+
+        return cast(List[Tuple[float, Optional[str]]], results)
+
     def forward(
         self,
         desired_safety_factor: float,
@@ -36,34 +365,115 @@ class FiniteElementTool(smolagents.tools.Tool):
         pitch: float,  # not used but kept for interface consistency
     ) -> str:
 
-        # Define dimensions of the plate
-        plate_width = 0.1  # [m]
-        plate_length = 0.2  # [m]
-
-        # Compute traction
-        traction = -load / (plate_thickness / 1000 * plate_length)
-
-        fos = autobolt.calculate_fos(
-            plate_thickness_m=plate_thickness / 1000,
-            num_holes=num_bolts,
-            elastic_modulus=plate_elastic_modulus * 10**9,
-            yield_strength=plate_yield_strength * 10**6,
-            traction_values=[(0, traction, 0)],
-            hole_radius_m=bolt_diameter / 2 / 1000,
-            plate_length_m=plate_length,
-            plate_width_m=plate_width,
-            edge_margin_m=plate_length / (2 * num_bolts),
-            hole_spacing_m=plate_length / num_bolts,
-            hole_offset_from_bottom_m=0.020,  # [m] vertical position of hole centers (Y from bottom edge)
-            plate_gap_mm=0.01,  # [mm] gap between the two plates
-            poissons_ratio=0.3,  # Poisson's ratio for steel
+        # Reject designs that cannot be meshed before handing them to autobolt
+        geometry = check_geometry(num_bolts, bolt_diameter, plate_thickness)
+        if not geometry.feasible:
+            return f"The design is not feasible: {geometry.reason}."
+
+        arguments = fos_arguments(
+            load=load,
+            num_bolts=num_bolts,
+            bolt_diameter=bolt_diameter,
+            plate_thickness=plate_thickness,
+            plate_elastic_modulus=plate_elastic_modulus,
+            plate_yield_strength=plate_yield_strength,
         )
 
-        if fos > desired_safety_factor + 0.1:
-            comparison = "higher than desired"
-        elif fos < desired_safety_factor - 0.1:
-            comparison = "lower than desired"
+        if self.mesh_levels:
+            solution = self.calculate_adaptive_fos(desired_safety_factor, **arguments)
+            comparison = compare_fos(solution.fos, desired_safety_factor, ASSEMBLY_FOS_TOLERANCE)
+            self._signal_convergence(comparison, num_bolts, bolt_diameter, solution.fos)
+            return (
+                f"The factor of safety for the assembly is {solution.fos:.2f} ({comparison}), solved on the "
+                f"{solution.level} mesh with an estimated discretization error of {solution.error:.2f}."
+            )
+
+        if self.linear_scaling:
+            fos = self.calculate_scaled_fos(**arguments)
         else:
-            comparison = "within acceptable range"
+            fos = self.calculate_fos(**arguments)
+
+        comparison = compare_fos(fos, desired_safety_factor, ASSEMBLY_FOS_TOLERANCE)
+        self._signal_convergence(comparison, num_bolts, bolt_diameter, fos)
 
         return f"The factor of safety for the assembly is {fos:.2f} ({comparison})."
+
+    def _signal_convergence(self, comparison: str, num_bolts: float, bolt_diameter: float, fos: float) -> None:
+        if is_acceptable(comparison) and self.convergence is None:
+            self.convergence = Convergence(
+                tool=self.name,
+                num_bolts=num_bolts,
+                bolt_diameter=bolt_diameter,
+                factors_of_safety={"assembly": float(fos)},
+            )
+
+
+class BatchFiniteElementTool(FiniteElementTool):
+    """
+    A variant of FiniteElementTool that evaluates several designs of the same joint in one call.
+
+    The designs are given as lists of bolt counts and diameters and are solved concurrently, so the agent can
+    explore several candidates per model generation.
+    """
+
+    name = "batch_fea_fos_calculation"
+    description = (
+        "Calculates the factor of safety of several designs using finite element analysis. Give one entry per "
+        "design in num_bolts and bolt_diameter."
+    )
+
+    inputs = cast(FiniteElementTool.input_type, BATCH_INPUTS)
+
+    output_type = "string"
+
+    def forward(
+        self,
+        desired_safety_factor: float,
+        load: float,
+        preload: float,  # not used but kept for interface consistency
+        num_bolts: list,
+        bolt_diameter: list,
+        bolt_yield_strength: float,  # not used but kept for interface consistency
+        bolt_elastic_modulus: float,  # not used but kept for interface consistency
+        plate_thickness: float,
+        plate_elastic_modulus: float,
+        plate_yield_strength: float,
+        pitch: float,  # not used but kept for interface consistency
+    ) -> str:
+
+        if len(num_bolts) != len(bolt_diameter):
+            raise ValueError("num_bolts and bolt_diameter must have one entry per design")
+
+        rows = [None] * len(num_bolts)
+        feasible = []
+        for i, (n, d) in enumerate(zip(num_bolts, bolt_diameter)):
+            geometry = check_geometry(n, d, plate_thickness)
+            if geometry.feasible:
+                feasible.append(i)
+            else:
+                rows[i] = f"- {n:g} x {d:g} mm: not feasible, {geometry.reason}"
+
+        results = self.calculate_many(
+            [
+                fos_arguments(
+                    load=load,
+                    num_bolts=int(num_bolts[i]),
+                    bolt_diameter=bolt_diameter[i],
+                    plate_thickness=plate_thickness,
+                    plate_elastic_modulus=plate_elastic_modulus,
+                    plate_yield_strength=plate_yield_strength,
+                )
+                for i in feasible
+            ]
+        )
+
+        for i, (fos, error) in zip(feasible, results):
+            design = f"- {num_bolts[i]:g} x {bolt_diameter[i]:g} mm"
+            if error is not None:
+                rows[i] = f"{design}: finite element analysis failed ({error})"
+            else:
+                comparison = compare_fos(fos, desired_safety_factor, ASSEMBLY_FOS_TOLERANCE)
+                self._signal_convergence(comparison, num_bolts[i], bolt_diameter[i], fos)
+                rows[i] = f"{design}: assembly FOS {fos:.2f} ({comparison})"
+
+        return "\n".join(["Factor of safety per design (bolts x diameter):", *rows])
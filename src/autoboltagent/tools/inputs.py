@@ -44,3 +44,16 @@ INPUTS = {
         "description": "Pitch of the bolt in mm",
     },
 }
+
+# Inputs of the batch tools, which evaluate several designs of the same joint in one call
+BATCH_INPUTS = {
+    **INPUTS,
+    "num_bolts": {
+        "type": "array",
+        "description": "Number of bolts used in the joint, one entry per design",
+    },
+    "bolt_diameter": {
+        "type": "array",
+        "description": "Diameter of the bolt in mm, one entry per design",
+    },
+}
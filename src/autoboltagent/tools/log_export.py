@@ -0,0 +1,177 @@
+import json
+import typing
+from pathlib import Path
+
+import pandas
+from sqlalchemy import JSON, Boolean, DateTime, Float, Integer, create_engine, select
+
+from .logger import Iteration
+
+# Columns the iteration log is partitioned by, in directory order
+PARTITION_COLUMNS = ("run_id", "agent_id")
+
+# Rows read from the database or the Parquet files at a time
+CHUNK_SIZE = 50000
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "Parquet export of the iteration log requires pyarrow, install it with `pip install autoboltagent[parquet]`"
+        ) from e
+    return pyarrow
+
+
+def iteration_schema(columns: typing.Optional[typing.Sequence[str]] = None):
+    """
+    Returns the Arrow schema of the iteration log, optionally restricted to some columns. Tool arguments are stored
+    as JSON text and times as UTC timestamps.
+    """
+    pyarrow = _pyarrow()
+
+    fields = []
+    for column in Iteration.__table__.columns:
+        if columns is not None and column.name not in columns:
+            continue
+
+        if isinstance(column.type, Boolean):
+            arrow_type = pyarrow.bool_()
+        elif isinstance(column.type, Integer):
+            arrow_type = pyarrow.int64()
+        elif isinstance(column.type, Float):
+            arrow_type = pyarrow.float64()
+        elif isinstance(column.type, DateTime):
+            arrow_type = pyarrow.timestamp("us", tz="UTC")
+        else:
+            arrow_type = pyarrow.string()
+        fields.append(pyarrow.field(column.name, arrow_type))
+
+    return pyarrow.schema(fields)
+
+
+def iter_log_chunks(
+    db_url: str,
+    columns: typing.Optional[typing.Sequence[str]] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> typing.Iterator[pandas.DataFrame]:
+    """
+    Streams the iteration log out of its database, ordered by run, agent and iteration.
+
+    Args:
+        db_url: Database URL of the log.
+        columns: Columns read, all by default.
+        chunk_size: Number of rows per DataFrame.
+
+    Yields:
+        DataFrames of at most `chunk_size` rows. Tool arguments are JSON text and times are UTC.
+    """
+    table = Iteration.__table__
+    selected = [table.c[name] for name in columns] if columns is not None else list(table.columns)
+    json_columns = [column.name for column in selected if isinstance(column.type, JSON)]
+    time_columns = [column.name for column in selected if isinstance(column.type, DateTime)]
+
+    query = select(*selected).order_by(table.c.run_id, table.c.agent_id, table.c.iteration_no)
+
+    engine = create_engine(db_url, future=True)
+    try:
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(query)
+            for rows in result.partitions():
+                chunk = pandas.DataFrame(rows, columns=[column.name for column in selected])
+                for name in json_columns:
+                    chunk[name] = [None if value is None else json.dumps(value) for value in chunk[name]]
+                for name in time_columns:
+                    # SQLite drops the time zone of the UTC times written by AgentLogger
+                    chunk[name] = pandas.to_datetime(chunk[name]).dt.tz_localize("UTC")
+                yield chunk
+    finally:
+        engine.dispose()
+
+
+def export_log_to_parquet(
+    db_url: str,
+    directory: typing.Union[str, Path],
+    chunk_size: int = CHUNK_SIZE,
+    overwrite: bool = False,
+) -> int:
+    """
+    Exports the iteration log to Parquet files partitioned by run and agent, as `run_id=.../agent_id=.../*.parquet`.
+    The log is streamed in chunks, so memory use does not depend on its size.
+
+    Args:
+        db_url: Database URL of the log.
+        directory: Directory the files are written to.
+        chunk_size: Number of rows read and written at a time.
+        overwrite: Whether to replace the files of an earlier export in `directory`.
+
+    Returns:
+        The number of rows exported.
+    """
+    pyarrow = _pyarrow()
+
+    directory = Path(directory)
+    existing = list(directory.rglob("*.parquet")) if directory.exists() else []
+    if existing and not overwrite:
+        raise FileExistsError(f"{directory} already holds an export, pass overwrite=True to replace it")
+    for path in existing:
+        path.unlink()
+
+    schema = iteration_schema()
+    rows = 0
+    for i, chunk in enumerate(iter_log_chunks(db_url, chunk_size=chunk_size)):
+        table = pyarrow.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+        pyarrow.parquet.write_to_dataset(
+            table,
+            root_path=str(directory),
+            partition_cols=list(PARTITION_COLUMNS),
+            basename_template=f"part-{i:06d}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        rows += len(chunk)
+
+    return rows
+
+
+def read_log_parquet(
+    directory: typing.Union[str, Path],
+    columns: typing.Optional[typing.Sequence[str]] = None,
+    run_ids: typing.Optional[typing.Iterable[str]] = None,
+    agent_ids: typing.Optional[typing.Iterable[str]] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> typing.Iterator[pandas.DataFrame]:
+    """
+    Reads an export of the iteration log chunk by chunk, see `export_log_to_parquet`.
+
+    Only the requested columns are read, and the partitions of other runs and agents are skipped without being
+    opened.
+
+    Args:
+        directory: Directory of the export.
+        columns: Columns read, all by default. The partition columns run_id and agent_id can be requested as well.
+        run_ids: Runs read, all by default.
+        agent_ids: Agents read, all by default.
+        chunk_size: Maximum number of rows per DataFrame.
+
+    Yields:
+        DataFrames of at most `chunk_size` rows.
+    """
+    pyarrow = _pyarrow()
+
+    partitioning = pyarrow.dataset.partitioning(
+        pyarrow.schema([pyarrow.field(name, pyarrow.string()) for name in PARTITION_COLUMNS]), flavor="hive"
+    )
+    dataset = pyarrow.dataset.dataset(str(directory), format="parquet", partitioning=partitioning)
+
+    expression = None
+    for name, values in zip(PARTITION_COLUMNS, (run_ids, agent_ids)):
+        if values is not None:
+            condition = pyarrow.dataset.field(name).isin(list(values))
+            expression = condition if expression is None else expression & condition
+
+    for batch in dataset.to_batches(columns=columns, filter=expression, batch_size=chunk_size):
+        if batch.num_rows:
+            yield batch.to_pandas()
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import JSON, Index, case, create_engine, delete, func, insert, inspect, select
 
 from sqlalchemy.orm import declarative_base, Session, sessionmaker, Mapped, mapped_column
 from contextlib import contextmanager
@@ -7,10 +7,26 @@ from pathlib import Path
 
 from datetime import datetime, timezone
 
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from .acceptance import observations_accepted
+
 Base = declarative_base()
 
+_log = logging.getLogger(__name__)
+
+# Queue marker asking the writer to write the rows it holds without waiting for the flush interval
+_FLUSH = object()
+
 class Iteration(Base):
     __tablename__ = "iterations"
+    __table_args__ = (
+        Index("ix_iterations_run_agent_iteration", "run_id", "agent_id", "iteration_no"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     agent_id: Mapped[str] = mapped_column()
@@ -21,17 +37,51 @@ class Iteration(Base):
     end_time: Mapped[datetime] = mapped_column(nullable=True)
 
     status: Mapped[str] = mapped_column(nullable=True)
-    tool_call: Mapped[str] = mapped_column(nullable=True)
+    tool_name: Mapped[str] = mapped_column(nullable=True)
+    tool_arguments: Mapped[dict] = mapped_column(JSON, nullable=True)
+    num_tool_calls: Mapped[int] = mapped_column(nullable=True)
     observations: Mapped[str] = mapped_column(nullable=True)
     target_fos: Mapped[float] = mapped_column(nullable=True)
+    converged: Mapped[bool] = mapped_column(nullable=True)
+
+    input_tokens: Mapped[int] = mapped_column(nullable=True)
+    output_tokens: Mapped[int] = mapped_column(nullable=True)
+    llm_latency: Mapped[float] = mapped_column(nullable=True)
+    tool_latency: Mapped[float] = mapped_column(nullable=True)
 
     failure_reason: Mapped[str] = mapped_column(nullable=True)
     llm_output: Mapped[str] = mapped_column(nullable=True)
     error_message: Mapped[str] = mapped_column(nullable=True)
 
+class Run(Base):
+    __tablename__ = "runs"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    run_id: Mapped[str] = mapped_column(index=True)
+    agent_id: Mapped[str] = mapped_column()
+
+    start_time: Mapped[datetime] = mapped_column(nullable=True)
+    end_time: Mapped[datetime] = mapped_column(nullable=True)
+
+    status: Mapped[str] = mapped_column()
+    final_answer: Mapped[str] = mapped_column(nullable=True)
+    error_message: Mapped[str] = mapped_column(nullable=True)
+
 class AgentLogger:
+    """
+    Records the steps of agent runs in a database.
+
+    Rows are handed to a background writer thread through a bounded queue and inserted in bulk transactions, so
+    logging does not add database latency to the agent loop. The writer commits once `batch_size` rows are waiting
+    or `flush_interval` seconds after the first waiting row, whichever comes first. When the queue is full, `log`
+    blocks until the writer catches up. `flush` waits for every queued row to be written, and `close`, `reset` and
+    interpreter shutdown drain the queue before stopping the writer. Rows the writer fails to insert are reported with
+    `logging` and the error is raised again by the next `flush` or `close`. A closed logger refuses new rows, and the
+    next `AgentLogger(db_url)` opens a new one.
+    """
+
     _instance = None
-    
+
     def connect_to_db(self, db_url: str):
         self.db_url = db_url
         self.engine = create_engine(db_url, future=True, pool_pre_ping=True)
@@ -47,80 +97,315 @@ class AgentLogger:
         except Exception as e:
             raise IOError("Failed to connect to DB, check if file in use", repr(e))
 
-    def __new__(cls, db_url: str):
-        if not cls._instance:
+        self.migrate()
+
+    def migrate(self):
+        """
+        Brings tables written by earlier versions of the logger up to date. create_all leaves existing tables alone,
+        so the columns they lack are added, empty for the existing rows, and their indexes are created.
+
+        Raises:
+            IOError: If a table lacks a required column, which cannot be added to existing rows.
+        """
+        inspector = inspect(self.engine)
+        with self.engine.begin() as conn:
+            for table in Base.metadata.sorted_tables:
+                existing = {column["name"] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing:
+                        continue
+                    if not column.nullable:
+                        raise IOError(
+                            f"The {table.name} table of {self.db_url} has a stale schema without the required "
+                            f"{column.name} column, move the database aside to start a new log"
+                        )
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+
+                for index in table.indexes:
+                    index.create(conn, checkfirst=True)
+
+    def __new__(
+        cls,
+        db_url: str,
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+        max_queue_size: int = 10000,
+    ):
+        if not cls._instance or cls._instance._closed:
             cls._instance = super().__new__(cls)
             cls._instance.db_url = None
             cls._instance.engine = None
             cls._instance.db_session = None
             cls._instance.connect_to_db(db_url)
+            cls._instance.start_writer(batch_size, flush_interval, max_queue_size)
         return cls._instance
-    
+
+    def start_writer(self, batch_size: int, flush_interval: float, max_queue_size: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._error_lock = threading.Lock()
+        self._closed = False
+        self._write_error = None
+        self._failed_rows = 0
+        self._writer = threading.Thread(target=self._write_loop, name="agent-logger", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _write_loop(self):
+        stopping = False
+        while not stopping:
+            row = self._queue.get()
+            if row is None:
+                self._queue.task_done()
+                break
+            if row is _FLUSH:
+                self._queue.task_done()
+                continue
+
+            # Rows are (table, values) pairs
+            rows = [row]
+            markers = 0
+            deadline = time.monotonic() + self.flush_interval
+            while len(rows) < self.batch_size:
+                try:
+                    row = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if row is None:
+                    stopping = True
+                    markers += 1
+                    break
+                if row is _FLUSH:
+                    # Someone is waiting on the rows collected so far, write them now
+                    markers += 1
+                    break
+                rows.append(row)
+
+            self._write(rows)
+            for _ in range(len(rows) + markers):
+                self._queue.task_done()
+
+    def _write(self, rows):
+        try:
+            with self.db_session() as session:
+                for table in (Iteration, Run):
+                    values = [row for row_table, row in rows if row_table is table]
+                    if values:
+                        session.execute(insert(table), values)
+                session.commit()
+
+        except Exception as e:
+            _log.exception("Failed to write %d rows to %s", len(rows), self.db_url)
+            with self._error_lock:
+                self._failed_rows += len(rows)
+                if self._write_error is None:
+                    self._write_error = e
+
+    def _raise_write_error(self):
+        """
+        Raises the first error the writer met since the last call, if any.
+        """
+        with self._error_lock:
+            error, failed_rows = self._write_error, self._failed_rows
+            self._write_error, self._failed_rows = None, 0
+        if error is not None:
+            raise IOError(f"Failed to write {failed_rows} logged rows to {self.db_url}") from error
+
+    def _put(self, row):
+        if self._closed:
+            raise RuntimeError("The logger is closed, create a new AgentLogger to keep logging")
+        self._queue.put(row)
+
+    def flush(self):
+        """
+        Blocks until every row logged so far is written to the database. Closed loggers have nothing left to write.
+
+        Raises:
+            IOError: If rows could not be written since the last flush.
+        """
+        if self._closed:
+            return
+        self._queue.put(_FLUSH)
+        self._queue.join()
+        self._raise_write_error()
+
+    def close(self):
+        """
+        Writes every queued row and stops the writer thread. The next AgentLogger is a new instance.
+
+        Raises:
+            IOError: If rows could not be written since the last flush.
+        """
+        self._closed = True
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        atexit.unregister(self.close)
+
+        if self.engine:
+            self.engine.dispose()
+
+        self._raise_write_error()
+
     @classmethod
     def reset(cls):
         if not cls._instance:
             return
-        
+
         inst = cls._instance
+        try:
+            inst.close()
+        finally:
+            if inst.engine:
+                inst.engine.dispose()
+
+            if inst.db_url:
+                for suffix in ("", "-wal", "-shm"):
+                    file_path = Path(inst.db_url.replace("sqlite:///", "") + suffix)
+                    file_path.unlink(missing_ok=True)
+
+            cls._instance = None
+
+    def log_run(self, run_id, agent_id, start_time, end_time, status, final_answer=None, error_message=None):
+        """
+        Records the outcome of a run, with status "completed" or "failed". Times are POSIX timestamps.
+        """
+        self._put(
+            (
+                Run,
+                dict(
+                    run_id=run_id,
+                    agent_id=agent_id,
+                    start_time=datetime.fromtimestamp(start_time, tz=timezone.utc),
+                    end_time=datetime.fromtimestamp(end_time, tz=timezone.utc),
+                    status=status,
+                    final_answer=None if final_answer is None else str(final_answer),
+                    error_message=error_message,
+                ),
+            )
+        )
 
-        if inst.engine:
-            inst.engine.dispose()
-        
-        if inst.db_url:
-            for suffix in ("", "-wal", "-shm"):
-                file_path = Path(inst.db_url.replace("sqlite:///", "") + suffix)
-                file_path.unlink(missing_ok=True)
+    def completed_run_ids(self):
+        """
+        Returns the identifiers of the runs recorded as completed.
+        """
+        self.flush()
+        with self.db_session() as session:
+            return set(
+                session.scalars(select(Run.run_id).where(Run.status == "completed").distinct())
+            )
+
+    def delete_run(self, run_id):
+        """
+        Removes every step and outcome recorded for a run, e.g. before running it again.
+        """
+        self.flush()
+        with self.db_session() as session:
+            session.execute(delete(Iteration).where(Iteration.run_id == run_id))
+            session.execute(delete(Run).where(Run.run_id == run_id))
+            session.commit()
+
+    def run_summaries(self, run_id=None):
+        """
+        Aggregates the logged steps per run and agent, optionally for a single run.
+
+        Returns a list of dicts with the run_id and agent_id, the number of steps, the first step number whose tool
+        results were all within the acceptable range (None if the agent never converged), the seconds from the
+        start of the run to the end of that step, the total input and output tokens, and the total LLM and tool
+        latencies [s].
+        """
+        self.flush()
+
+        converged_step = case((Iteration.converged, Iteration.iteration_no))
+        converged_end = case((Iteration.converged, Iteration.end_time))
+
+        query = (
+            select(
+                Iteration.run_id,
+                Iteration.agent_id,
+                func.count(Iteration.id).label("steps"),
+                func.min(converged_step).label("converged_at_step"),
+                func.min(Iteration.start_time).label("start_time"),
+                func.min(converged_end).label("converged_time"),
+                func.sum(Iteration.input_tokens).label("input_tokens"),
+                func.sum(Iteration.output_tokens).label("output_tokens"),
+                func.sum(Iteration.llm_latency).label("llm_latency"),
+                func.sum(Iteration.tool_latency).label("tool_latency"),
+            )
+            .group_by(Iteration.run_id, Iteration.agent_id)
+            .order_by(Iteration.run_id, Iteration.agent_id)
+        )
+        if run_id is not None:
+            query = query.where(Iteration.run_id == run_id)
+
+        with self.db_session() as session:
+            rows = session.execute(query).mappings().all()
+
+        summaries = []
+        for row in rows:
+            summary = dict(row)
+            start_time = summary.pop("start_time")
+            converged_time = summary.pop("converged_time")
+            summary["time_to_converge"] = (
+                (converged_time - start_time).total_seconds() if converged_time else None
+            )
+            summaries.append(summary)
+
+        return summaries
 
-        cls._instance = None
-    
     def log(
-            self, 
-            run_id, 
-            agent_id, 
+            self,
+            run_id,
+            agent_id,
             target_fos,
-            action_step
+            action_step,
+            llm_latency=None,
+            tool_latency=None
         ):
 
         iteration_no = action_step.step_number
         start_dt = datetime.fromtimestamp(action_step.timing.start_time, tz=timezone.utc)
         end_dt = datetime.fromtimestamp(action_step.timing.end_time, tz=timezone.utc)
-        
+
         error = getattr(action_step, "error", None)
         tool_calls = getattr(action_step, "tool_calls", None)
         observations = getattr(action_step, "observations", None)
         llm_message = getattr(action_step, "model_output_message", None)
         llm_output = getattr(llm_message, "content", None)
+        token_usage = getattr(action_step, "token_usage", None)
 
-        print(tool_calls)
-        print(error)
-        print(observations)
-        print(llm_message)
-        print(action_step.token_usage)
-
-        try:
+        tool_call = tool_calls[0] if tool_calls else None
+        tool_arguments = getattr(tool_call, "arguments", None)
+        if tool_arguments is not None and not isinstance(tool_arguments, dict):
+            tool_arguments = {"input": str(tool_arguments)}
 
-            with self.db_session() as session:
-                session.add(
-                    Iteration(
-                        run_id=run_id,
-                        agent_id=agent_id,
-                        iteration_no=iteration_no,
-                        start_time=start_dt,
-                        end_time=end_dt,
-                        tool_call=str(tool_calls[0] if tool_calls else None),
-                        observations=observations,
-                        target_fos=target_fos,
-                        llm_output=llm_output,
-                        error_message=error.message if (error and error.message) else None
-                    )
-                )
-                session.flush()
-                session.commit()
-
-        except Exception as e:
-            print("\n\n")
-            print(e)
-            print("\n\n")
-        
+        # A step converged when its tools judged every factor of safety to be within the acceptable range
+        converged = observations_accepted(observations)
 
-            
\ No newline at end of file
+        # Blocks while the queue is full so that a slow database applies backpressure instead of growing memory
+        self._put(
+            (
+                Iteration,
+                dict(
+                    run_id=run_id,
+                    agent_id=agent_id,
+                    iteration_no=iteration_no,
+                    start_time=start_dt,
+                    end_time=end_dt,
+                    tool_name=getattr(tool_call, "name", None),
+                    tool_arguments=tool_arguments,
+                    num_tool_calls=len(tool_calls) if tool_calls else 0,
+                    observations=observations,
+                    target_fos=target_fos,
+                    converged=converged,
+                    input_tokens=token_usage.input_tokens if token_usage else None,
+                    output_tokens=token_usage.output_tokens if token_usage else None,
+                    llm_latency=llm_latency,
+                    tool_latency=tool_latency,
+                    llm_output=llm_output,
+                    error_message=error.message if (error and error.message) else None
+                ),
+            )
+        )
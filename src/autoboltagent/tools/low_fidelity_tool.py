@@ -1,11 +1,18 @@
+import typing
+
+import numpy
 import smolagents
 
+from .acceptance import BOLT_FOS_TOLERANCE, PLATE_FOS_TOLERANCE, Convergence, compare_fos, is_acceptable
 from .fastener_toolkit import (
     get_joint_constant,
     get_tensile_stress_area,
     bolt_yield_safety_factor,
+    plate_bearing_safety_factor,
+    batch_safety_factors,
 )
-from .inputs import INPUTS
+from .geometry import check_geometry
+from .inputs import BATCH_INPUTS, INPUTS
 
 
 class AnalyticalTool(smolagents.Tool):
@@ -13,7 +20,8 @@ class AnalyticalTool(smolagents.Tool):
     A tool that calculates the factor of safety for a bolted connection using analytical expressions.
 
     This tool uses established engineering formulas to compute the factor of safety for a bolted connection
-    based on the provided parameters.
+    based on the provided parameters. When both factors of safety are within their acceptable range, the design is
+    recorded in `convergence`.
     """
 
     name = "analytical_fos_calculation"
@@ -23,6 +31,9 @@ class AnalyticalTool(smolagents.Tool):
 
     output_type = "number"
 
+    # First design evaluated since the agent last cleared it that passed every check, see Convergence
+    convergence: typing.Optional[Convergence] = None
+
     def forward(
         self,
         desired_safety_factor: float,
@@ -38,6 +49,10 @@ class AnalyticalTool(smolagents.Tool):
         pitch: float,
     ) -> str:
 
+        geometry = check_geometry(num_bolts, bolt_diameter, plate_thickness)
+        if not geometry.feasible:
+            return f"The design is not feasible: {geometry.reason}."
+
         load_per_bolt = load / num_bolts
         preload_per_bolt = preload / num_bolts
         tensile_area = get_tensile_stress_area(bolt_diameter, pitch)
@@ -57,27 +72,106 @@ class AnalyticalTool(smolagents.Tool):
             b_ys=bolt_yield_strength,
         )
 
-        bearing_area = bolt_diameter * plate_thickness * num_bolts
-        bearing_stress = load / bearing_area
-        allowable_bearing_stress = 1.5 * plate_yield_strength
-        plate_fos = allowable_bearing_stress / bearing_stress
-
-        if bolt_fos > desired_safety_factor + 0.1:
-            bolt_comparison = "higher than desired"
-        elif bolt_fos < desired_safety_factor - 0.1:
-            bolt_comparison = "lower than desired"
-        else:
-            bolt_comparison = "within acceptable range"
-
-        # Compare plate FOS
-        if plate_fos > desired_safety_factor + 0.5:
-            plate_comparison = "higher than desired"
-        elif plate_fos < desired_safety_factor - 0.5:
-            plate_comparison = "lower than desired"
-        else:
-            plate_comparison = "within acceptable range"
+        plate_fos = plate_bearing_safety_factor(
+            load=load,
+            d_b=bolt_diameter,
+            t=plate_thickness,
+            num_bolts=num_bolts,
+            p_ys=plate_yield_strength,
+        )
+
+        bolt_comparison = compare_fos(bolt_fos, desired_safety_factor, BOLT_FOS_TOLERANCE)
+        plate_comparison = compare_fos(plate_fos, desired_safety_factor, PLATE_FOS_TOLERANCE)
+
+        if is_acceptable(bolt_comparison, plate_comparison) and self.convergence is None:
+            self.convergence = Convergence(
+                tool=self.name,
+                num_bolts=num_bolts,
+                bolt_diameter=bolt_diameter,
+                factors_of_safety={"bolt": float(bolt_fos), "plate": float(plate_fos)},
+            )
 
         return (
             f"The factor of safety for bolts is {bolt_fos:.2f} ({bolt_comparison}) and "
             f"the factor of safety for plates is {plate_fos:.2f} ({plate_comparison})."
         )
+
+
+class BatchAnalyticalTool(smolagents.Tool):
+    """
+    A variant of AnalyticalTool that evaluates several designs of the same joint in one call.
+
+    The designs are given as lists of bolt counts and diameters and are evaluated in one vectorized pass, so the
+    agent can explore several candidates per model generation.
+    """
+
+    name = "batch_analytical_fos_calculation"
+    description = (
+        "Calculates the factor of safety of several designs using analytical expressions. Give one entry per "
+        "design in num_bolts and bolt_diameter."
+    )
+
+    inputs = BATCH_INPUTS
+
+    output_type = "string"
+
+    # First design evaluated since the agent last cleared it that passed every check, see Convergence
+    convergence: typing.Optional[Convergence] = None
+
+    def forward(
+        self,
+        desired_safety_factor: float,
+        load: float,
+        preload: float,
+        num_bolts: list,
+        bolt_diameter: list,
+        bolt_yield_strength: float,
+        bolt_elastic_modulus: float,
+        plate_thickness: float,
+        plate_elastic_modulus: float,
+        plate_yield_strength: float,
+        pitch: float,
+    ) -> str:
+
+        if len(num_bolts) != len(bolt_diameter):
+            raise ValueError("num_bolts and bolt_diameter must have one entry per design")
+
+        # Infeasible designs are evaluated along with the others and reported as infeasible below
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            bolt_fos, plate_fos = batch_safety_factors(
+                {
+                    "load": load,
+                    "preload": preload,
+                    "num_bolts": numpy.asarray(num_bolts, dtype=float),
+                    "bolt_diameter": numpy.asarray(bolt_diameter, dtype=float),
+                    "bolt_yield_strength": bolt_yield_strength,
+                    "bolt_elastic_modulus": bolt_elastic_modulus,
+                    "plate_thickness": plate_thickness,
+                    "plate_elastic_modulus": plate_elastic_modulus,
+                    "plate_yield_strength": plate_yield_strength,
+                    "pitch": pitch,
+                }
+            )
+
+        rows = ["Factors of safety per design (bolts x diameter):"]
+        for i, (n, d) in enumerate(zip(num_bolts, bolt_diameter)):
+            geometry = check_geometry(n, d, plate_thickness)
+            if not geometry.feasible:
+                rows.append(f"- {n:g} x {d:g} mm: not feasible, {geometry.reason}")
+                continue
+
+            bolt_comparison = compare_fos(bolt_fos[i], desired_safety_factor, BOLT_FOS_TOLERANCE)
+            plate_comparison = compare_fos(plate_fos[i], desired_safety_factor, PLATE_FOS_TOLERANCE)
+            if is_acceptable(bolt_comparison, plate_comparison) and self.convergence is None:
+                self.convergence = Convergence(
+                    tool=self.name,
+                    num_bolts=n,
+                    bolt_diameter=d,
+                    factors_of_safety={"bolt": float(bolt_fos[i]), "plate": float(plate_fos[i])},
+                )
+            rows.append(
+                f"- {n:g} x {d:g} mm: bolt FOS {bolt_fos[i]:.2f} ({bolt_comparison}), "
+                f"plate FOS {plate_fos[i]:.2f} ({plate_comparison})"
+            )
+
+        return "\n".join(rows)
@@ -0,0 +1,190 @@
+import math
+import typing
+
+import numpy
+import pandas
+import smolagents
+
+from .acceptance import (
+    ASSEMBLY_FOS_TOLERANCE,
+    BOLT_FOS_TOLERANCE,
+    PLATE_FOS_TOLERANCE,
+    compare_fos,
+)
+from .cache import ResultCache
+from .design_search_tool import DesignSearchTool, search_designs
+from .fea_pool import FEAWorkerPool
+from .high_fidelity_tool import FiniteElementTool, fos_arguments
+
+# Number of candidates passed on to finite element analysis by default
+TOP_K = 4
+
+
+def screen_designs(
+    desired_safety_factor: float,
+    top_k: int = TOP_K,
+    pool: typing.Optional[FEAWorkerPool] = None,
+    cache: typing.Optional[ResultCache] = None,
+    fea_tool: typing.Optional[FiniteElementTool] = None,
+    **joint,
+) -> pandas.DataFrame:
+    """
+    Screens the standard designs of a joint with the analytical model, then runs finite element analysis on the
+    candidates nearest the desired factor of safety, concurrently.
+
+    Args:
+        desired_safety_factor: Desired factor of safety.
+        top_k: Number of candidates analysed with finite elements.
+        pool: Worker pool running the solves. A pool with one worker per CPU is started for the call when neither
+            a pool nor a tool is given, see `FiniteElementTool.calculate_many`.
+        cache: Optional cache of solved designs, see `open_fea_cache`.
+        fea_tool: Finite element tool solving the candidates, which keeps its pool across calls. Replaces `pool`
+            and `cache` when given.
+        **joint: Description of the joint, see `candidate_designs`.
+
+    Returns:
+        One row per candidate with its analytical bolt and plate factors of safety, its finite element factor of
+        safety (NaN if the solve failed, with the reason in `fea_error`), and the comparison of the latter with the
+        desired factor of safety. Rows are ordered from nearest to farthest from the target.
+    """
+    designs = search_designs(desired_safety_factor, **joint)
+
+    # Distance to the target relative to the width of each accepted band
+    designs["distance"] = numpy.maximum(
+        (designs["bolt_fos"] - desired_safety_factor).abs() / BOLT_FOS_TOLERANCE,
+        (designs["plate_fos"] - desired_safety_factor).abs() / PLATE_FOS_TOLERANCE,
+    )
+    candidates = designs.nsmallest(top_k, "distance").reset_index(drop=True)
+
+    tool = fea_tool if fea_tool is not None else FiniteElementTool(cache=cache, pool=pool)
+    try:
+        results = tool.calculate_many(
+            [
+                fos_arguments(
+                    load=design.load,
+                    num_bolts=int(design.num_bolts),
+                    bolt_diameter=design.bolt_diameter,
+                    plate_thickness=design.plate_thickness,
+                    plate_elastic_modulus=design.plate_elastic_modulus,
+                    plate_yield_strength=design.plate_yield_strength,
+                )
+                for design in candidates.itertuples()
+            ]
+        )
+    finally:
+        if tool is not fea_tool:
+            tool.close()
+
+    candidates["fea_fos"] = [fos for fos, _ in results]
+    candidates["fea_error"] = [error for _, error in results]
+    candidates["fea_comparison"] = [
+        None if math.isnan(fos) else compare_fos(fos, desired_safety_factor, ASSEMBLY_FOS_TOLERANCE)
+        for fos in candidates["fea_fos"]
+    ]
+
+    return candidates[
+        [
+            "num_bolts",
+            "bolt_diameter",
+            "pitch",
+            "bolt_fos",
+            "plate_fos",
+            "accepted",
+            "fea_fos",
+            "fea_comparison",
+            "fea_error",
+        ]
+    ]
+
+
+class ScreeningTool(smolagents.Tool):
+    """
+    A tool that screens standard designs with analytical expressions and validates the best ones with finite
+    element analysis.
+
+    The analytical model ranks every standard bolt size and count, and only the candidates nearest the desired
+    factor of safety are solved with finite elements, in parallel, so expensive solves are spent where they can
+    change the answer.
+    """
+
+    name = "multi_fidelity_screening"
+    description = (
+        "Screens standard metric bolt sizes and counts with analytical expressions, then validates the designs "
+        "nearest the desired factor of safety with finite element analysis. Returns analytical and finite element "
+        "factors of safety for each validated design."
+    )
+
+    inputs = dict(DesignSearchTool.inputs)
+
+    output_type = "string"
+
+    def __init__(
+        self,
+        top_k: int = TOP_K,
+        pool: typing.Optional[FEAWorkerPool] = None,
+        cache: typing.Optional[ResultCache] = None,
+        **kwargs,
+    ) -> None:
+        """
+        Initializes a ScreeningTool.
+
+        Args:
+            top_k: Number of candidates analysed with finite elements per call.
+            pool: Worker pool running the solves. Without one, a pool is started on the first call and kept until
+                the tool is closed.
+            cache: Optional cache of solved designs, see `open_fea_cache`.
+        """
+        super().__init__(**kwargs)
+        self.top_k = top_k
+        self.pool = pool
+        self.cache = cache
+        self.fea_tool = FiniteElementTool(cache=cache, pool=pool)
+
+    def close(self) -> None:
+        """
+        Stops the pool started by the tool, if any.
+        """
+        self.fea_tool.close()
+
+    def forward(
+        self,
+        desired_safety_factor: float,
+        load: float,
+        preload: float,
+        bolt_yield_strength: float,
+        bolt_elastic_modulus: float,
+        plate_thickness: float,
+        plate_elastic_modulus: float,
+        plate_yield_strength: float,
+        pitch: typing.Optional[float] = None,
+    ) -> str:
+
+        candidates = screen_designs(
+            desired_safety_factor,
+            top_k=self.top_k,
+            fea_tool=self.fea_tool,
+            load=load,
+            preload=preload,
+            bolt_yield_strength=bolt_yield_strength,
+            bolt_elastic_modulus=bolt_elastic_modulus,
+            plate_thickness=plate_thickness,
+            plate_elastic_modulus=plate_elastic_modulus,
+            plate_yield_strength=plate_yield_strength,
+            pitch=pitch,
+        )
+
+        if candidates.empty:
+            return "No standard bolt size fits on the plate."
+
+        rows = []
+        for design in candidates.itertuples():
+            if design.fea_error:
+                fea = f"finite element analysis failed ({design.fea_error})"
+            else:
+                fea = f"FEA FOS {design.fea_fos:.2f} ({design.fea_comparison})"
+            rows.append(
+                f"- {design.num_bolts:.0f} x M{design.bolt_diameter:g} bolts: analytical bolt FOS "
+                f"{design.bolt_fos:.2f}, plate FOS {design.plate_fos:.2f}; {fea}"
+            )
+
+        return "\n".join(["Screened designs, nearest the target first:", *rows])
@@ -0,0 +1,45 @@
+import json
+
+import autoboltagent
+from autoboltagent import benchmarks
+from autoboltagent.tools.logger import AgentLogger
+
+
+def test_run_benchmarks_writes_comparable_results(tmp_path):
+    output = tmp_path / "results.json"
+    AgentLogger.reset()
+    logger = AgentLogger(f"sqlite:///{tmp_path / 'agent_logs.db'}")
+
+    status = benchmarks.main(
+        ["--output", str(output), "--repeat", "1", "--min-time", "0", "get_joint_constant", "logger_single_write"]
+    )
+
+    results = json.loads(output.read_text())
+    assert status == 0
+    assert set(results["results"]) == {"get_joint_constant", "logger_single_write"}
+    assert all(result["best"] > 0 for result in results["results"].values())
+
+    # The logger benchmark leaves the caller's logger open and its database in place
+    assert AgentLogger(logger.db_url) is logger
+    assert (tmp_path / "agent_logs.db").exists()
+    AgentLogger.reset()
+
+
+def test_compare_results_flags_regressions():
+    baseline = {"results": {"a": {"best": 1.0}, "b": {"best": 1.0}, "c": {"best": 1.0}}}
+    results = {"results": {"a": {"best": 1.1}, "b": {"best": 2.0}, "d": {"best": 1.0}}}
+
+    comparison = benchmarks.compare_results(results, baseline, threshold=1.25)
+
+    assert [(entry["name"], entry["regressed"]) for entry in comparison] == [("a", False), ("b", True)]
+    assert comparison[1]["ratio"] == 2.0
+
+
+def test_measure_agent_overhead():
+    overhead = benchmarks.measure_agent_overhead(autoboltagent.DualFidelityAgent, calls_per_tool=1, repeat=1)
+
+    # One call of each tool, then the final answer
+    assert overhead.agent == "DualFidelityAgent"
+    assert overhead.steps == 3
+    assert overhead.tool_time > 0
+    assert overhead.overhead > 0
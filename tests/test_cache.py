@@ -0,0 +1,77 @@
+import sqlite3
+
+import numpy
+
+from autoboltagent.tools.cache import ResultCache
+
+
+def test_cache_hits_and_misses(tmp_path):
+    cache = ResultCache(tmp_path / "cache.db")
+    key = ResultCache.make_key({"num_holes": 4, "hole_radius_m": 0.01})
+
+    assert cache.get(key) is None
+    cache.put(key, 3.2)
+    assert cache.get(key) == 3.2
+
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_cache_keys_ignore_float_noise():
+    assert ResultCache.make_key({"load": 0.1 + 0.2}) == ResultCache.make_key(
+        {"load": 0.3}
+    )
+    assert ResultCache.make_key({"load": 0.3}) != ResultCache.make_key({"load": 0.31})
+
+    # numpy scalars key like the Python numbers they hold
+    assert ResultCache.make_key({"num_holes": numpy.int64(4), "load": numpy.float32(0.5)}) == ResultCache.make_key(
+        {"num_holes": 4, "load": 0.5}
+    )
+
+
+def test_cache_persists_across_instances(tmp_path):
+    with ResultCache(tmp_path / "cache.db") as cache:
+        cache.put("design", 1.5)
+
+    with ResultCache(tmp_path / "cache.db") as cache:
+        assert cache.get("design") == 1.5
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(tmp_path / "cache.db", max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_cache_invalidates_other_versions(tmp_path):
+    with ResultCache(tmp_path / "cache.db", version="1.0") as cache:
+        cache.put("design", 1.5)
+
+    cache = ResultCache(tmp_path / "cache.db", version="2.0")
+    assert cache.get("design") is None
+
+    assert cache.invalidate() == 1
+    assert ResultCache(tmp_path / "cache.db", version="1.0").get("design") is None
+
+
+def test_cache_hits_write_recency_in_batches(tmp_path):
+    def last_used():
+        with sqlite3.connect(tmp_path / "cache.db") as conn:
+            return conn.execute("SELECT last_used FROM entries WHERE key = 'design'").fetchone()[0]
+
+    cache = ResultCache(tmp_path / "cache.db")
+    cache.put("design", 1.5)
+    written = last_used()
+
+    # A hit only reads, its recency is written when the cache is closed
+    assert cache.get("design") == 1.5
+    assert last_used() == written
+    cache.close()
+    assert last_used() > written
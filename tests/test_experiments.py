@@ -0,0 +1,97 @@
+import smolagents
+from smolagents.models import ChatMessageToolCall, ChatMessageToolCallFunction
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+import pytest
+
+import autoboltagent
+from autoboltagent.experiments import ExperimentRun, experiment_grid, run_experiments
+from autoboltagent.tools.logger import AgentLogger, Iteration, Run
+
+db_url = "sqlite:///experiments_test.db"
+
+
+class AnsweringModel(smolagents.models.Model):
+    """
+    Model that answers every task with its model_id, without calling any other tool
+    """
+
+    def generate(self, messages, stop_sequences=None, response_format=None, tools_to_call_from=None, **kwargs):
+        return smolagents.ChatMessage(
+            role=smolagents.MessageRole.ASSISTANT,
+            content=None,
+            tool_calls=[
+                ChatMessageToolCall(
+                    id="call_0",
+                    type="function",
+                    function=ChatMessageToolCallFunction(name="final_answer", arguments={"answer": self.model_id}),
+                )
+            ],
+        )
+
+
+class FailingModel(smolagents.models.Model):
+    def generate(self, *args, **kwargs):
+        raise RuntimeError("model unavailable")
+
+
+def make_model(model_id):
+    if model_id == "failing":
+        return FailingModel(model_id=model_id)
+    return AnsweringModel(model_id=model_id)
+
+
+@pytest.fixture
+def logger():
+    AgentLogger.reset()
+    yield AgentLogger(db_url)
+    AgentLogger.reset()
+
+
+def test_experiment_grid_run_ids():
+    runs = experiment_grid(
+        [autoboltagent.GuessingAgent, autoboltagent.LowFidelityAgent], ["a", "b"], [2.0, 3.0], ["task"], seeds=[0, 1]
+    )
+
+    assert len(runs) == 16
+    assert len({run.run_id for run in runs}) == 16
+    assert runs[0].run_id == ExperimentRun(autoboltagent.GuessingAgent, "a", 2.0, "task", 0).run_id
+
+
+def test_run_experiments_logs_and_resumes(logger):
+    runs = experiment_grid([autoboltagent.GuessingAgent], ["a", "b", "failing"], [3.0], ["Design a joint."])
+
+    results = run_experiments(runs, make_model, db_url, max_workers=3, max_steps=2)
+
+    assert [result.status for result in results] == ["completed", "completed", "failed"]
+    assert [result.answer for result in results[:2]] == ["a", "b"]
+    assert "model unavailable" in results[2].error
+
+    with Session(create_engine(db_url)) as session:
+        statuses = dict(session.execute(select(Run.run_id, Run.status)).all())
+        assert statuses == {result.run_id: result.status for result in results}
+        assert session.query(Iteration).filter(Iteration.run_id == results[0].run_id).count() == 1
+
+    # Completed runs are skipped and failed runs run again in place of their previous attempt
+    results = run_experiments(runs, make_model, db_url, max_workers=3, max_steps=2)
+
+    assert [result.status for result in results] == ["skipped", "skipped", "failed"]
+    with Session(create_engine(db_url)) as session:
+        assert session.query(Run).count() == 3
+
+
+def test_run_experiments_in_processes(logger):
+    runs = experiment_grid([autoboltagent.GuessingAgent], ["a", "b"], [3.0], ["Design a joint."])
+
+    results = run_experiments(runs, make_model, db_url, max_workers=2, executor="process", max_steps=2)
+
+    assert [result.status for result in results] == ["completed", "completed"]
+    assert logger.completed_run_ids() == {run.run_id for run in runs}
+
+
+def test_run_experiments_refuses_another_open_logger(logger):
+    runs = experiment_grid([autoboltagent.GuessingAgent], ["a"], [3.0], ["Design a joint."])
+
+    # The open logger writes to experiments_test.db, the experiment would silently log there as well
+    with pytest.raises(ValueError, match="already open"):
+        run_experiments(runs, make_model, "sqlite:///other_experiments_test.db")
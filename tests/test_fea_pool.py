@@ -0,0 +1,92 @@
+import os
+import threading
+import time
+
+import pytest
+
+from autoboltagent.tools.fea_pool import FEASolveCancelled, FEASolveError, FEAWorkerPool
+
+
+def scaled_solver(**arguments):
+    return arguments["yield_strength"] / arguments["stress"]
+
+
+def slow_solver(**arguments):
+    time.sleep(arguments["seconds"])
+    return 1.0
+
+
+def crashing_solver(**arguments):
+    os._exit(3)
+
+
+def failing_solver(**arguments):
+    raise ValueError("mesh generation failed")
+
+
+def pid_solver(**arguments):
+    return float(os.getpid())
+
+
+def test_pool_solves_concurrently():
+    with FEAWorkerPool(num_workers=2, solver=scaled_solver) as pool:
+        futures = [
+            pool.submit({"yield_strength": 250.0, "stress": stress})
+            for stress in (50.0, 100.0, 125.0)
+        ]
+        assert [f.result() for f in futures] == [5.0, 2.5, 2.0]
+
+
+def test_pool_times_out_and_recovers():
+    with FEAWorkerPool(num_workers=1, solver=slow_solver, timeout=0.5) as pool:
+        with pytest.raises(FEASolveError, match="did not finish"):
+            pool.solve({"seconds": 10})
+        assert pool.solve({"seconds": 0}) == 1.0
+
+
+def test_pool_bounds_worker_startup():
+    # The warmup solve of the worker hangs
+    with FEAWorkerPool(
+        num_workers=1, solver=slow_solver, warmup_arguments={"seconds": 60}, startup_timeout=0.5
+    ) as pool:
+        start = time.perf_counter()
+        with pytest.raises(FEASolveError, match="did not start"):
+            pool.solve({"seconds": 0})
+        assert time.perf_counter() - start < 10
+
+
+def test_pool_reports_crashes_and_failures():
+    with FEAWorkerPool(num_workers=1, solver=crashing_solver) as pool:
+        with pytest.raises(FEASolveError, match="crashed"):
+            pool.solve({})
+
+    with FEAWorkerPool(num_workers=1, solver=failing_solver) as pool:
+        with pytest.raises(FEASolveError, match="mesh generation failed"):
+            pool.solve({})
+
+
+def test_pool_recycles_workers():
+    with FEAWorkerPool(num_workers=1, solver=pid_solver, max_jobs_per_worker=2) as pool:
+        pids = [pool.solve({}) for _ in range(4)]
+
+    assert pids[0] == pids[1]
+    assert pids[1] != pids[2]
+    assert pids[2] == pids[3]
+
+
+def test_pool_cancels_solves():
+    cancel_event = threading.Event()
+    with FEAWorkerPool(num_workers=1, solver=slow_solver) as pool:
+        pool.solve({"seconds": 0})
+
+        timer = threading.Timer(0.2, cancel_event.set)
+        timer.start()
+        start = time.perf_counter()
+        with pytest.raises(FEASolveCancelled):
+            pool.solve({"seconds": 10}, cancel_event=cancel_event)
+        assert time.perf_counter() - start < 5
+
+        # The killed worker was replaced, and a cancelled event stops solves before they start
+        assert pool.solve({"seconds": 0}) == 1.0
+        with pytest.raises(FEASolveCancelled):
+            pool.solve({"seconds": 0}, cancel_event=cancel_event)
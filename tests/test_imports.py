@@ -0,0 +1,38 @@
+import json
+import os
+import subprocess
+import sys
+
+# Generous bound on the cold import time of the package [s], analytical-only programs should not pay for the
+# finite element stack or the database
+IMPORT_TIME_BUDGET = 5.0
+
+HEAVY_MODULES = ["autobolt", "dolfin", "gmsh", "sqlalchemy"]
+
+CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import autoboltagent
+elapsed = time.perf_counter() - start
+autoboltagent.LowFidelityAgent
+autoboltagent.tools.FiniteElementTool()
+print(json.dumps(dict(elapsed=elapsed, modules=sorted(sys.modules))))
+"""
+
+
+def import_in_fresh_interpreter():
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    output = subprocess.run([sys.executable, "-c", CHILD], env=env, check=True, capture_output=True, text=True)
+    return json.loads(output.stdout.splitlines()[-1])
+
+
+def test_import_does_not_load_heavy_backends():
+    result = import_in_fresh_interpreter()
+
+    assert not [module for module in HEAVY_MODULES if module in result["modules"]]
+
+
+def test_import_time_budget():
+    result = import_in_fresh_interpreter()
+
+    assert result["elapsed"] < IMPORT_TIME_BUDGET
@@ -0,0 +1,65 @@
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from smolagents import ActionStep, Timing, ToolCall, ChatMessage, MessageRole, TokenUsage
+
+from autoboltagent.tools.logger import AgentLogger
+from autoboltagent.tools.log_export import export_log_to_parquet, iter_log_chunks, read_log_parquet
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    """
+    Fixture logging 3 steps of 2 agents in 2 runs to a fresh db
+    """
+    db_url = f"sqlite:///{tmp_path / 'log.db'}"
+    AgentLogger.reset()
+    logger = AgentLogger(db_url)
+
+    for run_id in ("run/1", "run 2"):
+        for agent_id in ("agent_1", "agent_2"):
+            for step_number in range(1, 4):
+                step = ActionStep(
+                    step_number=step_number,
+                    timing=Timing(start_time=1000.0 + step_number, end_time=1001.0 + step_number),
+                    observations="observation",
+                    tool_calls=[ToolCall(name="tool", arguments={"num_bolts": step_number}, id="1")],
+                    model_output_message=ChatMessage(role=MessageRole("assistant"), content="output"),
+                    token_usage=TokenUsage(input_tokens=100, output_tokens=step_number),
+                )
+                logger.log(run_id=run_id, agent_id=agent_id, target_fos=3.0, action_step=step)
+
+    logger.flush()
+    yield db_url
+    AgentLogger.reset()
+
+
+def test_log_chunks(db_url):
+    chunks = list(iter_log_chunks(db_url, columns=["run_id", "iteration_no", "tool_arguments"], chunk_size=5))
+
+    assert [len(chunk) for chunk in chunks] == [5, 5, 2]
+    assert list(chunks[0].columns) == ["run_id", "iteration_no", "tool_arguments"]
+    assert chunks[0]["tool_arguments"][0] == '{"num_bolts": 1}'
+
+
+def test_parquet_export_round_trip(db_url, tmp_path):
+    directory = tmp_path / "export"
+    assert export_log_to_parquet(db_url, directory, chunk_size=5) == 12
+
+    # Exports are not silently mixed
+    with pytest.raises(FileExistsError):
+        export_log_to_parquet(db_url, directory)
+    assert export_log_to_parquet(db_url, directory, overwrite=True) == 12
+
+    frames = list(read_log_parquet(directory))
+    assert sum(len(frame) for frame in frames) == 12
+    assert set(frames[0]["run_id"]) <= {"run/1", "run 2"}
+    assert str(frames[0]["start_time"].dt.tz) == "UTC"
+
+    # Selecting columns and partitions
+    frames = list(
+        read_log_parquet(directory, columns=["iteration_no", "output_tokens"], run_ids=["run/1"], agent_ids=["agent_2"])
+    )
+    assert list(frames[0].columns) == ["iteration_no", "output_tokens"]
+    assert sorted(value for frame in frames for value in frame["output_tokens"]) == [1, 2, 3]
@@ -1,6 +1,6 @@
 from autoboltagent.tools.logger import AgentLogger
 from autoboltagent.tools.logger import Iteration
-from smolagents import ActionStep, Timing, ToolCall, ChatMessage, MessageRole, AgentError
+from smolagents import ActionStep, Timing, ToolCall, ChatMessage, MessageRole, AgentError, TokenUsage
 from sqlalchemy import create_engine, select
 from sqlalchemy.orm import Session
 from datetime import datetime, timezone
@@ -50,6 +50,7 @@ def test_logger_one_write_fields_persist(logger):
         observations = "observation observation",
         tool_calls=[ToolCall(name="tool call", arguments={"asdf": 1}, id="1341fad")],
         model_output_message=ChatMessage(role=MessageRole("assistant"), content="LLM output 1"),
+        token_usage=TokenUsage(input_tokens=120, output_tokens=30),
         error=None
     )
 
@@ -57,9 +58,12 @@ def test_logger_one_write_fields_persist(logger):
             run_id="run_1",
             agent_id="agent_1",
             target_fos=1,
-            action_step=step
+            action_step=step,
+            llm_latency=1.5,
+            tool_latency=0.25
         )
-    
+    logger.flush()
+
     with get_log_session(db_url) as session:
         iteration = session.query(Iteration).one()
 
@@ -71,6 +75,13 @@ def test_logger_one_write_fields_persist(logger):
         assert iteration.target_fos == 1
         assert iteration.llm_output == "LLM output 1"
         assert iteration.error_message == None
+        assert iteration.tool_name == "tool call"
+        assert iteration.tool_arguments == {"asdf": 1}
+        assert iteration.num_tool_calls == 1
+        assert iteration.input_tokens == 120
+        assert iteration.output_tokens == 30
+        assert iteration.llm_latency == 1.5
+        assert iteration.tool_latency == 0.25
 
 
 def test_logger_large_write(logger):
@@ -97,7 +108,149 @@ def test_logger_large_write(logger):
             target_fos=1,
             action_step=step
         )
+    logger.flush()
+
     with get_log_session(db_url) as session:
         iterations = session.query(Iteration).all()
     
-    assert len(iterations) == 50
\ No newline at end of file
+    assert len(iterations) == 50
+
+
+def test_logger_close_drains_queue():
+    """
+    Test that closing the logger writes every queued row, even with a long flush interval
+    """
+    AgentLogger.reset()
+    logger = AgentLogger(db_url, batch_size=1000, flush_interval=60)
+
+    for i in range(20):
+        now = datetime.now(timezone.utc).timestamp()
+        logger.log(
+            run_id="run_1",
+            agent_id="agent_1",
+            target_fos=1,
+            action_step=ActionStep(step_number=i, timing=Timing(start_time=now, end_time=now))
+        )
+    logger.close()
+
+    with get_log_session(db_url) as session:
+        assert session.query(Iteration).count() == 20
+
+    AgentLogger.reset()
+
+
+def test_logger_run_summaries(logger):
+    """
+    Test the per run and agent aggregates, including the step at which the agent converged
+    """
+    observations = [
+        "The factor of safety for the assembly is 2.10 (lower than desired).",
+        "The factor of safety for the assembly is 3.05 (within acceptable range).",
+        "The factor of safety for the assembly is 3.02 (within acceptable range).",
+    ]
+    for i, observation in enumerate(observations, start=1):
+        step = ActionStep(
+            step_number=i,
+            timing=Timing(start_time=100.0 + 10 * i, end_time=105.0 + 10 * i),
+            observations=observation,
+            token_usage=TokenUsage(input_tokens=100, output_tokens=10),
+        )
+        logger.log(run_id="run_1", agent_id="agent_1", target_fos=3, action_step=step, llm_latency=4.0, tool_latency=1.0)
+
+    step = ActionStep(step_number=1, timing=Timing(start_time=0.0, end_time=1.0), observations=observations[0])
+    logger.log(run_id="run_2", agent_id="agent_1", target_fos=3, action_step=step)
+
+    summary, = logger.run_summaries(run_id="run_1")
+
+    assert summary["steps"] == 3
+    assert summary["converged_at_step"] == 2
+    assert summary["time_to_converge"] == 15.0
+    assert summary["input_tokens"] == 300
+    assert summary["output_tokens"] == 30
+    assert summary["llm_latency"] == 12.0
+    assert summary["tool_latency"] == 3.0
+
+    summaries = logger.run_summaries()
+    assert [s["run_id"] for s in summaries] == ["run_1", "run_2"]
+    assert summaries[1]["converged_at_step"] is None
+    assert summaries[1]["time_to_converge"] is None
+
+
+def test_logger_closed_refuses_rows():
+    """
+    Test that a closed logger refuses new rows, that flushing it returns, and that the next logger is a new one
+    """
+    AgentLogger.reset()
+    logger = AgentLogger(db_url)
+    logger.close()
+
+    now = datetime.now(timezone.utc).timestamp()
+    step = ActionStep(step_number=1, timing=Timing(start_time=now, end_time=now))
+    with pytest.raises(RuntimeError, match="closed"):
+        logger.log(run_id="run_1", agent_id="agent_1", target_fos=1, action_step=step)
+    logger.flush()
+
+    reopened = AgentLogger(db_url)
+    assert reopened is not logger
+    reopened.log(run_id="run_1", agent_id="agent_1", target_fos=1, action_step=step)
+    assert reopened.run_summaries()[0]["steps"] == 1
+
+    AgentLogger.reset()
+
+
+def test_logger_reports_failed_writes(logger):
+    """
+    Test that rows the writer fails to insert make the next flush raise, instead of being dropped silently
+    """
+    now = datetime.now(timezone.utc).timestamp()
+    step = ActionStep(
+        step_number=1,
+        timing=Timing(start_time=now, end_time=now),
+        tool_calls=[ToolCall(name="tool call", arguments={"design": object()}, id="1")],
+    )
+    logger.log(run_id="run_1", agent_id="agent_1", target_fos=1, action_step=step)
+
+    with pytest.raises(IOError, match="Failed to write 1 logged rows"):
+        logger.flush()
+
+    # The error is reported once, later rows are written as usual
+    step = ActionStep(step_number=2, timing=Timing(start_time=now, end_time=now))
+    logger.log(run_id="run_1", agent_id="agent_1", target_fos=1, action_step=step)
+    logger.flush()
+    with get_log_session(db_url) as session:
+        assert session.query(Iteration).count() == 1
+
+
+def test_logger_migrates_old_schema(tmp_path):
+    """
+    Test that a database written by the first version of the logger gains the new columns and index
+    """
+    import sqlite3
+
+    path = tmp_path / "old_logs.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE iterations (id INTEGER PRIMARY KEY, agent_id VARCHAR NOT NULL, run_id VARCHAR NOT NULL, "
+            "iteration_no INTEGER NOT NULL, start_time DATETIME, end_time DATETIME, status VARCHAR, tool_call VARCHAR, "
+            "observations VARCHAR, target_fos FLOAT, failure_reason VARCHAR, llm_output VARCHAR, error_message VARCHAR)"
+        )
+        conn.execute("INSERT INTO iterations (agent_id, run_id, iteration_no) VALUES ('agent_1', 'run_0', 1)")
+
+    AgentLogger.reset()
+    logger = AgentLogger(f"sqlite:///{path}")
+    now = datetime.now(timezone.utc).timestamp()
+    step = ActionStep(
+        step_number=1,
+        timing=Timing(start_time=now, end_time=now),
+        observations="The factor of safety for the assembly is 3.02 (within acceptable range).",
+    )
+    logger.log(run_id="run_1", agent_id="agent_1", target_fos=3, action_step=step)
+
+    summaries = logger.run_summaries()
+    assert [(s["run_id"], s["converged_at_step"]) for s in summaries] == [("run_0", None), ("run_1", 1)]
+    with sqlite3.connect(path) as conn:
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(iterations)")}
+    assert "ix_iterations_run_agent_iteration" in indexes
+
+    logger.close()
+    AgentLogger._instance = None
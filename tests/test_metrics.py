@@ -0,0 +1,73 @@
+import json
+
+import autoboltagent
+from autoboltagent.metrics import AgentMetrics, Histogram
+from autoboltagent.scripted_model import ScriptedModel, final_answer
+
+DESIGN = dict(
+    desired_safety_factor=3.0,
+    load=60000.0,
+    preload=150000.0,
+    num_bolts=4,
+    bolt_diameter=12.0,
+    bolt_yield_strength=940.0,
+    bolt_elastic_modulus=210.0,
+    plate_thickness=10.0,
+    plate_elastic_modulus=210.0,
+    plate_yield_strength=250.0,
+    pitch=1.5,
+)
+
+
+def run_agents(metrics):
+    script = [("analytical_fos_calculation", DESIGN), ("analytical_fos_calculation", DESIGN), final_answer("4 x M12")]
+    autoboltagent.LowFidelityAgent(ScriptedModel(script), metrics=metrics).run("task")
+    autoboltagent.GuessingAgent(ScriptedModel([final_answer("4 x M12")]), agent_id="guess", metrics=metrics).run("task")
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram([1, 2, 5])
+    for value in [0.5, 1, 1.5, 6]:
+        histogram.observe(value)
+
+    assert histogram.cumulative_counts() == [2, 3, 3, 4]
+    assert histogram.count == 4
+    assert histogram.sum == 9.0
+
+
+def test_agents_record_metrics():
+    metrics = AgentMetrics()
+    run_agents(metrics)
+
+    snapshot = metrics.snapshot()
+    steps = {entry["labels"]["agent"]: entry["value"] for entry in snapshot["autoboltagent_steps_total"]}
+    assert steps == {"LowFidelityAgent": 3, "guess": 1}
+
+    tools = {
+        (entry["labels"]["agent"], entry["labels"]["tool"]): entry["count"]
+        for entry in snapshot["autoboltagent_tool_latency_seconds"]
+    }
+    assert tools[("LowFidelityAgent", "analytical_fos_calculation")] == 2
+    assert ("guess", "analytical_fos_calculation") not in tools
+
+    run_steps = {entry["labels"]["agent"]: entry["sum"] for entry in snapshot["autoboltagent_run_steps"]}
+    assert run_steps == {"LowFidelityAgent": 3, "guess": 1}
+
+    llm = {entry["labels"]["agent"]: entry["count"] for entry in snapshot["autoboltagent_llm_latency_seconds"]}
+    assert llm == {"LowFidelityAgent": 3, "guess": 1}
+    assert snapshot["autoboltagent_input_tokens"][0]["sum"] > 0
+
+
+def test_metrics_export(tmp_path):
+    metrics = AgentMetrics()
+    run_agents(metrics)
+
+    metrics.write_prometheus(tmp_path / "agents.prom")
+    text = (tmp_path / "agents.prom").read_text()
+    assert "# TYPE autoboltagent_llm_latency_seconds histogram" in text
+    assert 'autoboltagent_steps_total{agent="LowFidelityAgent"} 3' in text
+    assert 'autoboltagent_run_steps_bucket{agent="guess",le="+Inf"} 1' in text
+    assert 'autoboltagent_tool_latency_seconds_count{agent="LowFidelityAgent",tool="analytical_fos_calculation"} 2' in text
+
+    metrics.write_json(tmp_path / "agents.json")
+    assert json.loads((tmp_path / "agents.json").read_text()) == metrics.snapshot()
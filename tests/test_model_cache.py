@@ -0,0 +1,74 @@
+import numpy
+import pytest
+
+import autoboltagent
+from autoboltagent.model_cache import CachedModel, GenerationCacheMiss, open_generation_cache
+from autoboltagent.scripted_model import ScriptedModel, final_answer
+
+DESIGN = dict(
+    desired_safety_factor=3.0,
+    load=60000.0,
+    preload=150000.0,
+    num_bolts=4,
+    bolt_diameter=12.0,
+    bolt_yield_strength=940.0,
+    bolt_elastic_modulus=210.0,
+    plate_thickness=10.0,
+    plate_elastic_modulus=210.0,
+    plate_yield_strength=250.0,
+    pitch=1.5,
+)
+
+SCRIPT = [("analytical_fos_calculation", DESIGN), "Thinking about it.", final_answer("4 x M12")]
+
+
+def test_cached_model_replays_run(tmp_path):
+    cache = open_generation_cache(tmp_path / "generations.db")
+    model = ScriptedModel(SCRIPT)
+
+    first = autoboltagent.LowFidelityAgent(CachedModel(model, cache))
+    assert first.run(autoboltagent.prompts.EXAMPLE_TASK_INSTRUCTIONS) == "4 x M12"
+    assert model.calls == 3
+    assert len(cache) == 3
+
+    # A strict replay over an empty script only reads from the cache
+    replay = autoboltagent.LowFidelityAgent(CachedModel(ScriptedModel([]), cache, strict=True))
+    assert replay.run(autoboltagent.prompts.EXAMPLE_TASK_INSTRUCTIONS) == "4 x M12"
+    assert cache.hits == 3
+
+    steps = replay.memory.steps[1:]
+    assert steps[0].observations == first.memory.steps[1].observations
+    assert steps[0].token_usage.input_tokens == first.memory.steps[1].token_usage.input_tokens
+
+
+def test_cached_model_keys_on_tools_and_model(tmp_path):
+    cache = open_generation_cache(tmp_path / "generations.db")
+    autoboltagent.LowFidelityAgent(CachedModel(ScriptedModel(SCRIPT), cache)).run("task")
+
+    # Other tools, or another model, make other requests
+    with pytest.raises(Exception) as error:
+        autoboltagent.DualFidelityAgent(CachedModel(ScriptedModel([]), cache, strict=True)).run("task")
+    assert isinstance(error.value.__cause__, GenerationCacheMiss)
+
+    with pytest.raises(Exception) as error:
+        autoboltagent.LowFidelityAgent(CachedModel(ScriptedModel([], model_id="other"), cache, strict=True)).run("task")
+    assert isinstance(error.value.__cause__, GenerationCacheMiss)
+
+
+def test_cached_model_keys_on_content(tmp_path):
+    cache = open_generation_cache(tmp_path / "generations.db")
+    model = CachedModel(ScriptedModel(["Looks fine.", "Looks fine."]), cache)
+
+    # Images are keyed by their content, not by their address in memory
+    def message(content):
+        return [{"role": "user", "content": [{"type": "image", "image": content}]}]
+
+    image = numpy.zeros((4, 4), dtype=numpy.uint8)
+    assert model.request_key(message(image)) == model.request_key(message(image.copy()))
+    assert model.request_key(message(image)) != model.request_key(message(image + 1))
+
+    # Values without a stable key are generated without being cached
+    assert model.generate(message(object())).content == "Looks fine."
+    assert len(cache) == 0
+    with pytest.raises(GenerationCacheMiss, match="cannot be cached"):
+        CachedModel(ScriptedModel([]), cache, strict=True).generate(message(object()))
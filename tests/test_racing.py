@@ -0,0 +1,89 @@
+import time
+
+import autoboltagent
+import autoboltagent.prompts
+from autoboltagent.racing import race_agents
+from autoboltagent.scripted_model import ScriptedModel, final_answer
+from autoboltagent.tools.fea_pool import FEAWorkerPool
+
+# Design of prompts.EXAMPLE_TASK_INSTRUCTIONS
+DESIGN = dict(
+    desired_safety_factor=3.0,
+    load=60000.0,
+    preload=150000.0,
+    num_bolts=4,
+    bolt_diameter=12.0,
+    bolt_yield_strength=940.0,
+    bolt_elastic_modulus=210.0,
+    plate_thickness=10.0,
+    plate_elastic_modulus=210.0,
+    plate_yield_strength=250.0,
+    pitch=1.5,
+)
+CONVERGED = dict(DESIGN, preload=80000.0, num_bolts=5, bolt_diameter=10.0)
+
+
+def stuck_solver(**arguments):
+    time.sleep(60)
+    return 3.0
+
+
+def final_entry(result, agent_id):
+    if agent_id in result.stopping:
+        return result.stopping[agent_id].result(timeout=30)
+    return result.entries[agent_id]
+
+
+def test_race_cancels_losers_and_their_solves():
+    low = autoboltagent.LowFidelityAgent(
+        ScriptedModel(
+            [("analytical_fos_calculation", DESIGN), ("analytical_fos_calculation", CONVERGED)], latency=0.2
+        )
+    )
+
+    with FEAWorkerPool(num_workers=1, solver=stuck_solver) as pool:
+        high = autoboltagent.HighFidelityAgent(
+            ScriptedModel([("fea_fos_calculation", CONVERGED), final_answer("5 x M10")]), fea_pool=pool
+        )
+        result = race_agents([low, high], autoboltagent.prompts.EXAMPLE_TASK_INSTRUCTIONS)
+
+        # The finite element agent was stopped in the middle of its solve instead of waiting for it
+        entry = final_entry(result, "HighFidelityAgent")
+
+    assert result.winner == "LowFidelityAgent"
+    assert result.answer.startswith("Converged design: 5 bolts of 10 mm diameter")
+    assert result.convergence.tool == "analytical_fos_calculation"
+
+    assert entry.status == "cancelled"
+    assert entry.duration < 10
+    assert "interrupted" in entry.error
+
+    # The settings of the agents and tools are restored once they stopped
+    assert low.stop_on_convergence is False
+    assert high.cancel_event is None and high.tools["fea_fos_calculation"].cancel_event is None
+
+
+def test_race_returns_without_waiting_for_losers():
+    low = autoboltagent.LowFidelityAgent(ScriptedModel([("analytical_fos_calculation", CONVERGED)], latency=0.3))
+    slow = autoboltagent.GuessingAgent(ScriptedModel([final_answer("4 x M12")], latency=2.0))
+
+    result = race_agents([low, slow], autoboltagent.prompts.EXAMPLE_TASK_INSTRUCTIONS)
+
+    # The winner does not wait for the generation the loser is stuck in
+    assert result.winner == "LowFidelityAgent"
+    assert result.duration < 1.5
+    assert result.entries["GuessingAgent"].status == "cancelling"
+    assert final_entry(result, "GuessingAgent").duration >= 2.0
+
+
+def test_race_without_convergence():
+    low = autoboltagent.LowFidelityAgent(ScriptedModel([final_answer("4 x M12")]))
+    guess = autoboltagent.GuessingAgent(ScriptedModel(["thinking"] * 5, latency=0.2), max_steps=5)
+
+    result = race_agents([low, guess], "task", timeout=0.5)
+
+    assert result.winner is None
+    assert result.duration < 1.0
+    assert result.entries["LowFidelityAgent"].status == "finished"
+    assert result.entries["LowFidelityAgent"].answer == "4 x M12"
+    assert final_entry(result, "GuessingAgent").status == "cancelled"
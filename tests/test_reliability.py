@@ -0,0 +1,65 @@
+import statistics
+
+import pytest
+
+from autoboltagent.reliability import LogNormal, Normal, Uniform, analyze_reliability, wilson_interval
+
+# Design of prompts.EXAMPLE_TASK_INSTRUCTIONS
+DESIGN = dict(
+    load=60000.0,
+    preload=150000.0,
+    num_bolts=4,
+    bolt_diameter=12.0,
+    bolt_yield_strength=940.0,
+    bolt_elastic_modulus=210.0,
+    plate_thickness=10.0,
+    plate_elastic_modulus=210.0,
+    plate_yield_strength=250.0,
+    pitch=1.5,
+)
+
+
+def test_failure_probability_matches_closed_form():
+    # The plate bearing factor of safety is proportional to the plate yield strength, which fails below 83.3 MPa
+    result = analyze_reliability(
+        DESIGN, {"plate_yield_strength": Normal(100.0, 10.0)}, samples=200000, chunk_size=30000
+    )
+    expected = statistics.NormalDist(100.0, 10.0).cdf(60000.0 / (1.5 * 12.0 * 10.0 * 4))
+
+    low, high = result.confidence_interval
+    assert low < expected < high
+    assert result.bolt_failure_probability == 0
+    assert result.plate_failure_probability == result.failure_probability
+    assert result.reliability_index == pytest.approx(5 / 3, abs=0.02)
+
+
+def test_sensitivities_and_reproducibility():
+    scatter = {
+        "load": LogNormal(60000.0, 15000.0),
+        "preload": Normal(150000.0, 30000.0),
+        "bolt_yield_strength": Normal(940.0, 10.0),
+        "plate_thickness": Uniform(9.9, 10.1),
+    }
+    result = analyze_reliability(DESIGN, scatter, samples=50000, required_fos=2.5, chunk_size=20000, seed=1)
+
+    # The bolts govern, so preload and load dominate and both make failure more likely
+    assert list(result.sensitivities)[:2] == ["preload", "load"]
+    assert result.sensitivities["preload"] < 0 and result.sensitivities["load"] < 0
+    assert 0 < result.failure_probability < 1
+
+    # The result only depends on the seed and chunk size, also when the chunks are spread across processes
+    settings = dict(samples=50000, required_fos=2.5, chunk_size=20000)
+    assert analyze_reliability(DESIGN, scatter, seed=1, **settings) == result
+    assert analyze_reliability(DESIGN, scatter, seed=1, max_workers=2, **settings) == result
+    assert analyze_reliability(DESIGN, scatter, seed=2, **settings) != result
+
+    with pytest.raises(ValueError, match="No nominal value"):
+        analyze_reliability({"load": 1.0}, scatter)
+
+
+def test_wilson_interval():
+    low, high = wilson_interval(0, 1000)
+    assert low == 0 and 0 < high < 0.005
+
+    low, high = wilson_interval(50, 1000)
+    assert low < 0.05 < high
@@ -1,4 +1,10 @@
+import re
+
+import numpy
+import pandas
+
 import autoboltagent.tools
+from autoboltagent.tools import fastener_toolkit
 
 
 def test_analytical_tool():
@@ -27,6 +33,212 @@ def test_analytical_tool():
     )
 
 
+def test_joint_constant_matches_cornwell_table():
+    # At the published values of j the interpolation returns the table coefficients
+    for _, row in fastener_toolkit.CORNWELL_PARAMS.iterrows():
+        c = fastener_toolkit.get_joint_constant(row["j"] * 10, 10, 210, 210)
+        assert numpy.isclose(c, row["p0"] + row["p1"] + row["p2"] + row["p3"])
+
+    # The scalar and vectorized lookups agree across and beyond the published range
+    j = numpy.linspace(0.05, 2.5, 491)
+    expected = [fastener_toolkit.get_joint_constant(x * 10, 10, 70, 210) for x in j]
+    assert numpy.allclose(
+        fastener_toolkit.get_joint_constants(j * 10, 10, 70, 210), expected
+    )
+
+
+def test_tools_reject_infeasible_geometry():
+    inputs = dict(
+        desired_safety_factor=3.0,
+        load=60000,
+        preload=0,
+        num_bolts=8,
+        bolt_diameter=30,
+        bolt_elastic_modulus=210,
+        plate_elastic_modulus=210,
+        bolt_yield_strength=250,
+        plate_yield_strength=250,
+        plate_thickness=30,
+        pitch=1.5,
+    )
+
+    assert autoboltagent.tools.geometry.check_geometry(8, 30, 30).code == "holes_overlap"
+    assert autoboltagent.tools.geometry.check_geometry(2, 50, 30).code == "hole_cuts_plate_edge"
+    assert autoboltagent.tools.geometry.check_geometry(2.5, 10, 30).code == "invalid_bolt_count"
+    assert autoboltagent.tools.geometry.check_geometry(4, 20, 30).feasible
+    assert list(
+        autoboltagent.tools.geometry.feasible_designs([8, 2, 4], [30, 50, 20], 30)
+    ) == [False, False, True]
+
+    for tool in (
+        autoboltagent.tools.AnalyticalTool(),
+        autoboltagent.tools.FiniteElementTool(),
+    ):
+        assert "not feasible" in tool.forward(**inputs)
+
+
+def test_batch_safety_factors_match_scalar_path():
+    designs = pandas.DataFrame(
+        {
+            "load": [60000, 60000, 30000],
+            "preload": [0, 150000, 50000],
+            "num_bolts": [4, 6, 2],
+            "bolt_diameter": [20, 12, 16],
+            "bolt_yield_strength": [250, 940, 640],
+            "bolt_elastic_modulus": [210, 210, 200],
+            "plate_thickness": [30, 10, 8],
+            "plate_elastic_modulus": [210, 210, 70],
+            "plate_yield_strength": [250, 250, 280],
+            "pitch": [1.5, 1.5, 2.0],
+        }
+    )
+
+    bolt_fos, plate_fos = fastener_toolkit.batch_safety_factors(designs)
+
+    for i, design in designs.iterrows():
+        c = fastener_toolkit.get_joint_constant(
+            design["bolt_diameter"],
+            design["plate_thickness"] * 2,
+            design["plate_elastic_modulus"],
+            design["bolt_elastic_modulus"],
+        )
+        expected_bolt_fos = fastener_toolkit.bolt_yield_safety_factor(
+            c=c,
+            load=design["load"] / design["num_bolts"],
+            preload=design["preload"] / design["num_bolts"],
+            a_ts=fastener_toolkit.get_tensile_stress_area(
+                design["bolt_diameter"], design["pitch"]
+            ),
+            b_ys=design["bolt_yield_strength"],
+        )
+        expected_plate_fos = fastener_toolkit.plate_bearing_safety_factor(
+            load=design["load"],
+            d_b=design["bolt_diameter"],
+            t=design["plate_thickness"],
+            num_bolts=design["num_bolts"],
+            p_ys=design["plate_yield_strength"],
+        )
+
+        assert numpy.isclose(bolt_fos[i], expected_bolt_fos)
+        assert numpy.isclose(plate_fos[i], expected_plate_fos)
+
+
+def test_batch_safety_factor_gradients_match_finite_differences():
+    rng = numpy.random.default_rng(0)
+    designs = pandas.DataFrame(
+        {
+            "load": rng.uniform(1e4, 2e5, 200),
+            "preload": rng.uniform(1e4, 3e5, 200),
+            "num_bolts": rng.integers(1, 12, 200).astype(float),
+            "bolt_diameter": rng.uniform(6, 30, 200),
+            "bolt_yield_strength": rng.uniform(300, 1200, 200),
+            "bolt_elastic_modulus": rng.uniform(190, 220, 200),
+            "plate_thickness": rng.uniform(4, 40, 200),
+            "plate_elastic_modulus": rng.uniform(60, 220, 200),
+            "plate_yield_strength": rng.uniform(200, 500, 200),
+            "pitch": rng.uniform(1, 3, 200),
+        }
+    )
+
+    bolt_fos, plate_fos, bolt_gradient, plate_gradient = fastener_toolkit.batch_safety_factor_gradients(designs)
+    expected_bolt_fos, expected_plate_fos = fastener_toolkit.batch_safety_factors(designs)
+    assert numpy.allclose(bolt_fos, expected_bolt_fos)
+    assert numpy.allclose(plate_fos, expected_plate_fos)
+    assert bolt_gradient.shape == plate_gradient.shape == (200, len(fastener_toolkit.DESIGN_COLUMNS))
+
+    # Central differences, with steps small enough to stay within a piece of the Cornwell interpolation
+    for i, name in enumerate(fastener_toolkit.DESIGN_COLUMNS):
+        step = 1e-6 * designs[name]
+        up, down = designs.copy(), designs.copy()
+        up[name] += step
+        down[name] -= step
+        (bolt_up, plate_up), (bolt_down, plate_down) = map(fastener_toolkit.batch_safety_factors, (up, down))
+
+        assert numpy.allclose(bolt_gradient[:, i], (bolt_up - bolt_down) / (2 * step), rtol=1e-5, atol=1e-12)
+        assert numpy.allclose(plate_gradient[:, i], (plate_up - plate_down) / (2 * step), rtol=1e-5, atol=1e-12)
+
+    # Within 0.01 of a table entry the coefficients are constant in j
+    _, dc_dj, _ = fastener_toolkit.get_joint_constant_gradients([3.5, 5.05], 10, 210, 210)
+    assert dc_dj[0] != 0 and dc_dj[1] == 0
+
+
+def test_design_search_tool():
+    joint = dict(
+        load=60000,
+        preload=150000,
+        bolt_yield_strength=940,
+        bolt_elastic_modulus=210,
+        plate_thickness=10,
+        plate_elastic_modulus=210,
+        plate_yield_strength=250,
+        pitch=1.5,
+    )
+
+    designs = autoboltagent.tools.design_search_tool.search_designs(2.5, **joint)
+    accepted = designs[designs["accepted"]]
+    assert not accepted.empty
+
+    # Every accepted design is accepted by the analytical tool as well
+    for design in accepted.itertuples():
+        result = autoboltagent.tools.AnalyticalTool().forward(
+            desired_safety_factor=2.5,
+            num_bolts=design.num_bolts,
+            bolt_diameter=design.bolt_diameter,
+            **joint,
+        )
+        assert result.count("within acceptable range") == 2
+
+    result = autoboltagent.tools.DesignSearchTool().forward(
+        desired_safety_factor=2.5, **joint
+    )
+    assert "M18" in result
+
+
+def test_diameter_solver_tool():
+    joint = dict(
+        load=60000,
+        preload=150000,
+        bolt_yield_strength=940,
+        bolt_elastic_modulus=210,
+        plate_thickness=10,
+        plate_elastic_modulus=210,
+        plate_yield_strength=250,
+    )
+    solver = autoboltagent.tools.diameter_solver_tool
+
+    for solution in solver.solve_diameters(3.0, pitch=1.5, **joint):
+        if solution.diameter is None:
+            continue
+
+        # The solved diameter is the smallest reaching the desired factor of safety on a fine grid of diameters
+        n = solution.num_bolts
+        d = numpy.linspace(1.9, solver.diameter_limit(n), 20000, endpoint=False)
+        bolt_fos, plate_fos = fastener_toolkit.batch_safety_factors(
+            dict(joint, num_bolts=n, bolt_diameter=d, pitch=1.5)
+        )
+        reached = d[(bolt_fos >= 3.0) & (plate_fos >= 3.0)]
+        assert abs(solution.diameter - reached[0]) <= d[1] - d[0]
+
+        # The standard size is the smallest one reaching it
+        assert solution.standard_diameter >= solution.diameter
+        assert min(solution.bolt_fos, solution.plate_fos) >= 3.0
+        smaller = fastener_toolkit.ISO_METRIC_BOLTS["d"] < solution.standard_diameter
+        assert all(fastener_toolkit.ISO_METRIC_BOLTS["d"][smaller] < solution.diameter)
+
+    # At the bolt diameter the analytical tool finds the desired factor of safety
+    bolt_diameter = solver.solve_bolt_diameter(
+        3.0, num_bolts=4, pitch=1.5, **{k: v for k, v in joint.items() if k != "plate_yield_strength"}
+    )
+    result = autoboltagent.tools.AnalyticalTool().forward(
+        desired_safety_factor=3.0, num_bolts=4, bolt_diameter=bolt_diameter, pitch=1.5, **joint
+    )
+    assert "bolts is 3.00" in result
+
+    result = autoboltagent.tools.DiameterSolverTool().forward(desired_safety_factor=3.0, **joint)
+    assert "- 1 bolts: no diameter" in result
+    assert "- 4 bolts: 14.80 mm (bolt governs), standard size M16 x 2" in result
+
+
 def test_fea_tool():
     tool = autoboltagent.tools.FiniteElementTool()
 
@@ -52,3 +264,216 @@ def test_fea_tool():
         or "lower than desired" in result
         or "within acceptable range" in result
     )
+
+
+def test_fea_tool_cache(tmp_path, monkeypatch):
+    cache = autoboltagent.tools.high_fidelity_tool.open_fea_cache(tmp_path / "fea.db")
+    tool = autoboltagent.tools.FiniteElementTool(cache=cache)
+
+    inputs = dict(
+        desired_safety_factor=3.0,
+        load=60000,
+        preload=0,
+        num_bolts=4,
+        bolt_diameter=20,
+        bolt_elastic_modulus=210,
+        plate_elastic_modulus=210,
+        bolt_yield_strength=250,
+        plate_yield_strength=250,
+        plate_thickness=30,
+        pitch=1.5,
+    )
+
+    assert tool.forward(**inputs) == tool.forward(**inputs)
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+    # Batches answer cached designs first and only start worker processes for the others
+    designs = [
+        autoboltagent.tools.high_fidelity_tool.fos_arguments(
+            load=60000,
+            num_bolts=4,
+            bolt_diameter=d,
+            plate_thickness=30,
+            plate_elastic_modulus=210,
+            plate_yield_strength=250,
+        )
+        for d in (20, 16)
+    ]
+    solved = tool.calculate_many(designs)
+    assert cache.hits == 2
+    assert cache.misses == 2
+
+    monkeypatch.setattr(autoboltagent.tools.high_fidelity_tool, "FEAWorkerPool", None)
+    assert tool.calculate_many(designs) == solved
+    assert cache.hits == 4
+
+
+def test_fea_tool_linear_scaling():
+    direct = autoboltagent.tools.FiniteElementTool()
+    scaled = autoboltagent.tools.FiniteElementTool(linear_scaling=True)
+
+    arguments = autoboltagent.tools.high_fidelity_tool.fos_arguments(
+        load=60000,
+        num_bolts=4,
+        bolt_diameter=20,
+        plate_thickness=30,
+        plate_elastic_modulus=210,
+        plate_yield_strength=250,
+    )
+    fos = scaled.calculate_scaled_fos(**arguments)
+
+    assert numpy.isclose(fos, direct.calculate_fos(**arguments), rtol=1e-2)
+
+    # Doubling the load halves the factor of safety without another solve
+    arguments["traction_values"] = [(0, 2 * arguments["traction_values"][0][1], 0)]
+    assert numpy.isclose(scaled.calculate_scaled_fos(**arguments), fos / 2)
+    assert len(scaled._reference_solutions) == 1
+
+
+def test_fea_tool_batches_share_solves(tmp_path):
+    cache = autoboltagent.tools.high_fidelity_tool.open_fea_cache(tmp_path / "fea.db")
+    tool = autoboltagent.tools.FiniteElementTool(cache=cache, linear_scaling=True)
+
+    designs = [
+        autoboltagent.tools.high_fidelity_tool.fos_arguments(
+            load=load,
+            num_bolts=4,
+            bolt_diameter=20,
+            plate_thickness=30,
+            plate_elastic_modulus=210,
+            plate_yield_strength=250,
+        )
+        for load in (30000, 60000, 120000)
+    ]
+    (fos, _), (half, _), (quarter, _) = tool.calculate_many(designs)
+
+    # Designs differing only in their load share one reference solve
+    assert len(cache) == 1
+    assert numpy.isclose(half, fos / 2) and numpy.isclose(quarter, fos / 4)
+
+    # The pool started for the first batch is kept for the next ones
+    pool = tool.batch_pool()
+    tool.calculate_many([dict(designs[0], plate_thickness_m=0.02)])
+    assert tool.batch_pool() is pool
+    tool.close()
+
+
+class MeshDependentTool(autoboltagent.tools.FiniteElementTool):
+    """
+    Finite element tool whose solution converges to a factor of safety of 2 x traction_scale as the mesh is refined
+    """
+
+    def _solve(self, arguments):
+        self.solved_meshes.append(arguments["mesh_size"])
+        return 2.0 * abs(arguments["traction_values"][0][1]) / 1e6 + arguments["mesh_size"]
+
+
+def test_fea_tool_mesh_ladder():
+    levels = [
+        autoboltagent.tools.high_fidelity_tool.MeshLevel("coarse", {"mesh_size": 0.2}, relative_error=0.1),
+        autoboltagent.tools.high_fidelity_tool.MeshLevel("medium", {"mesh_size": 0.05}),
+        autoboltagent.tools.high_fidelity_tool.MeshLevel("fine", {"mesh_size": 0.01}),
+    ]
+    tool = MeshDependentTool(mesh_levels=levels)
+    arguments = dict(traction_values=[(0, -1e6, 0)])
+
+    # Far from the target, the coarse mesh is enough
+    tool.solved_meshes = []
+    solution = tool.calculate_adaptive_fos(4.0, **arguments)
+    assert solution.level == "coarse"
+    assert numpy.isclose(solution.error, 0.22)
+    assert tool.solved_meshes == [0.2]
+
+    # Near the target, the mesh is refined until the change between levels rules the design out, or to the end
+    tool.solved_meshes = []
+    solution = tool.calculate_adaptive_fos(2.0, **arguments)
+    assert solution.level == "fine"
+    assert numpy.isclose(solution.fos, 2.01)
+    assert numpy.isclose(solution.error, 0.04)
+    assert tool.solved_meshes == [0.2, 0.05, 0.01]
+
+    tool.solved_meshes = []
+    result = tool.forward(
+        desired_safety_factor=10.0,
+        load=60000,
+        preload=0,
+        num_bolts=4,
+        bolt_diameter=20,
+        bolt_elastic_modulus=210,
+        plate_elastic_modulus=210,
+        bolt_yield_strength=250,
+        plate_yield_strength=250,
+        plate_thickness=30,
+        pitch=1.5,
+    )
+    assert "higher than desired" in result
+    assert "coarse mesh" in result
+    assert tool.solved_meshes == [0.2]
+
+
+def test_screen_designs():
+    candidates = autoboltagent.tools.screening_tool.screen_designs(
+        3.0,
+        top_k=2,
+        load=60000,
+        preload=150000,
+        bolt_yield_strength=940,
+        bolt_elastic_modulus=210,
+        plate_thickness=10,
+        plate_elastic_modulus=210,
+        plate_yield_strength=250,
+        pitch=1.5,
+    )
+
+    assert len(candidates) == 2
+    assert candidates["fea_fos"].notna().all()
+    assert set(candidates["fea_comparison"]) <= {
+        "higher than desired",
+        "lower than desired",
+        "within acceptable range",
+    }
+
+
+def test_batch_tools():
+    inputs = dict(
+        desired_safety_factor=3.0,
+        load=60000,
+        preload=0,
+        num_bolts=[4, 6, 0],
+        bolt_diameter=[20, 12, 10],
+        bolt_elastic_modulus=210,
+        plate_elastic_modulus=210,
+        bolt_yield_strength=250,
+        plate_yield_strength=250,
+        plate_thickness=30,
+        pitch=1.5,
+    )
+
+    for batch_tool, tool in (
+        (autoboltagent.tools.BatchAnalyticalTool(), autoboltagent.tools.AnalyticalTool()),
+        (autoboltagent.tools.BatchFiniteElementTool(), autoboltagent.tools.FiniteElementTool()),
+    ):
+        rows = batch_tool.forward(**inputs).splitlines()[1:]
+        assert len(rows) == 3
+        assert "not feasible" in rows[2]
+
+        # Each feasible design reports the same factors of safety as the single-design tool
+        for row, n, d in zip(rows[:2], [4, 6], [20, 12]):
+            single = tool.forward(**dict(inputs, num_bolts=n, bolt_diameter=d))
+            for fos in re.findall(r"FOS (\d+\.\d+)", row):
+                assert fos in single
+
+
+def test_acceptance_checks():
+    from autoboltagent.tools.acceptance import compare_fos, is_acceptable, observations_accepted
+
+    assert is_acceptable(compare_fos(3.05, 3.0, 0.1), compare_fos(3.4, 3.0, 0.5))
+    assert not is_acceptable(compare_fos(3.05, 3.0, 0.1), compare_fos(2.4, 3.0, 0.5))
+
+    assert observations_accepted("The factor of safety for the assembly is 3.02 (within acceptable range).")
+    assert not observations_accepted(
+        "The factor of safety for bolts is 3.02 (within acceptable range) and the factor of safety for plates is "
+        "2.10 (lower than desired)."
+    )
+    assert not observations_accepted(None)